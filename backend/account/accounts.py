@@ -32,6 +32,14 @@ from apigw.client import BkLoginClient
 from apigw.exceptions import BkLoginNoAccessPermission
 from bk_i18n.constants import BK_LANG_TO_DJANGO_LANG
 from common.log import logger
+from common.utils.upstream import request_memo
+
+
+def get_bk_login_userinfo(request, bk_token):
+    """
+    获取登录用户信息，同一请求内复用（登录中间件校验登录态时已获取）
+    """
+    return request_memo(request, ("bk_login_userinfo", bk_token), BkLoginClient().get_user, bk_token)
 
 
 class AccountSingleton(object):
@@ -68,7 +76,7 @@ class Account(AccountSingleton):
 
         # 校验并获取用户信息
         try:
-            data = BkLoginClient().get_user(bk_token)
+            data = get_bk_login_userinfo(request, bk_token)
         except BkLoginNoAccessPermission as e:
             raise AccessPermissionDenied(e)
         except Exception:
@@ -98,7 +106,7 @@ class Account(AccountSingleton):
                 # 设置language session
                 request.session[settings.LANGUAGE_SESSION_KEY] = BK_LANG_TO_DJANGO_LANG[data.get("language")]
             except Exception as e:
-                logger.error("Get and record user information failed：%s" % e)
+                logger.error("Get and record user information failed：%s", e)
         return True, user
 
     def build_callback_url(self, request, jump_url):
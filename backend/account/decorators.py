@@ -89,7 +89,7 @@ def verfy_request_header(view_func):
                     }
                 )
         except Exception as e:
-            logger.exception("Verification of HTTP request header is abnormal:%s" % e)
+            logger.exception("Verification of HTTP request header is abnormal:%s", e)
             return JsonResponse({"result": False, "code": "1102", "message": _(u"参数不合法:HTTP_X_APP_ID"), "data": {}})
 
         return view_func(request, *args, **kwargs)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.core.management.base import BaseCommand
+
+from analysis.models import AppRecentUse, AppUseRecord
+
+
+class Command(BaseCommand):
+    """
+    从应用访问记录回填用户最近使用的应用（一次性执行）
+
+    示例: python manage.py backfill_app_recent_use --batch-size 1000
+    """
+
+    help = "Backfill per-user recently used apps from app use records"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, dest="batch_size", default=1000)
+
+    def handle(self, batch_size, *args, **options):
+        total = AppRecentUse.objects.backfill(AppUseRecord.objects.all(), batch_size=batch_size)
+        self.stdout.write("backfilled %d recent use records" % total)
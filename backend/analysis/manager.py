@@ -19,12 +19,16 @@ to the current version of the project delivered to anyone in the future.
 """
 import datetime
 
-from django.db import models
-from django.db.models import Sum
+from django.db import IntegrityError, models, transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
 
 from app.models import App
 from common.log import logger
 
+# 每个用户保留的最近使用应用数
+APP_RECENT_USE_MAX_COUNT = 20
+
 
 class AppOnlineTimeRecordManager(models.Manager):
     def get_onlinetime(self, stime, etime, app_code, user_name):
@@ -60,12 +64,21 @@ class AppUseRecordManager(models.Manager):
         """
         try:
             app = App.objects.get(id=app_id)
-            self.model(user=user, app=app, access_host=access_host, source_ip=source_ip).save()
-            return True
+            record = self.model(user=user, app=app, access_host=access_host, source_ip=source_ip)
+            record.save()
         except Exception as error:
-            logger.error("An error occurred while saving App use records：%s" % error)
+            logger.error("An error occurred while saving App use records：%s", error)
             return False
 
+        # 更新用户最近使用的应用列表，失败不影响访问记录
+        from analysis.models import AppRecentUse
+
+        try:
+            AppRecentUse.objects.touch(user, app, record.use_time)
+        except Exception as error:
+            logger.error("An error occurred while saving recently used apps：%s", error)
+        return True
+
     def get_appuserecord(self, stime, etime, app_code):
         """
         获取经过过滤的app使用记录数据
@@ -86,6 +99,91 @@ class AppUseRecordManager(models.Manager):
         return all_visit, total_visit
 
 
+class AppRecentUseManager(models.Manager):
+    """
+    用户最近使用的应用
+    """
+
+    def touch(self, user, app, use_time=None):
+        """
+        更新用户使用应用的时间，超出保留数量时删除最早使用的应用
+        """
+        use_time = use_time or timezone.now()
+        if self.filter(user=user, app=app).update(use_time=use_time):
+            return
+        try:
+            with transaction.atomic():
+                self.create(user=user, app=app, use_time=use_time)
+        except IntegrityError:
+            # 并发请求已创建
+            self.filter(user=user, app=app, use_time__lt=use_time).update(use_time=use_time)
+            return
+        self.trim(user.id)
+
+    def trim(self, user_id, max_count=APP_RECENT_USE_MAX_COUNT):
+        expired_ids = list(
+            self.filter(user_id=user_id)
+            .order_by("-use_time")
+            .values_list("id", flat=True)[max_count : max_count + 100]
+        )
+        if expired_ids:
+            self.filter(id__in=expired_ids).delete()
+
+    def get_recent_apps(self, user, limit):
+        """
+        用户最近使用的应用
+        """
+        return self.filter(user=user).order_by("-use_time")[:limit]
+
+    def backfill(self, use_records, max_count=APP_RECENT_USE_MAX_COUNT, batch_size=1000):
+        """
+        从访问记录回填最近使用的应用，已存在的记录保留较新的使用时间
+        use_records: AppUseRecord queryset
+        返回回填的记录数
+        """
+        rows = (
+            use_records.values("user_id", "app_id")
+            .annotate(last_use_time=Max("use_time"))
+            .order_by("user_id", "-last_use_time")
+            .iterator(chunk_size=batch_size)
+        )
+        total = 0
+        current_user_id = None
+        user_count = 0
+        batch = []
+        for row in rows:
+            if row["user_id"] != current_user_id:
+                current_user_id = row["user_id"]
+                user_count = 0
+            user_count += 1
+            if user_count > max_count or not row["last_use_time"]:
+                continue
+            batch.append(self.model(user_id=row["user_id"], app_id=row["app_id"], use_time=row["last_use_time"]))
+            if len(batch) >= batch_size:
+                total += self._backfill_batch(batch)
+                batch = []
+        if batch:
+            total += self._backfill_batch(batch)
+        return total
+
+    def _backfill_batch(self, batch):
+        existing = {
+            (user_id, app_id): use_time
+            for user_id, app_id, use_time in self.filter(
+                user_id__in={i.user_id for i in batch}, app_id__in={i.app_id for i in batch}
+            ).values_list("user_id", "app_id", "use_time")
+        }
+        creates = []
+        for item in batch:
+            use_time = existing.get((item.user_id, item.app_id))
+            if use_time is None:
+                creates.append(item)
+            elif use_time < item.use_time:
+                self.filter(user_id=item.user_id, app_id=item.app_id).update(use_time=item.use_time)
+        self.bulk_create(creates, ignore_conflicts=True)
+        return len(batch)
+
+
 class AppLivenessManager(models.Manager):
     def get_appliveness(self, stime, etime, app_code):
         """
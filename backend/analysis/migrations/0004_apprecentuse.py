@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("app", "0037_app_last_online_time"),
+        ("analysis", "0003_auto_20171120_1842"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppRecentUse",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("use_time", models.DateTimeField(verbose_name="最近使用时间")),
+                (
+                    "app",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="app.app", verbose_name="应用"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="用户",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "用户最近使用的应用",
+                "verbose_name_plural": "用户最近使用的应用",
+                "db_table": "console_analysis_apprecentuse",
+                "unique_together": {("user", "app")},
+                "indexes": [models.Index(fields=["user", "-use_time"], name="analysis_recentuse_user_idx")],
+            },
+        ),
+    ]
@@ -22,7 +22,7 @@ from builtins import object
 from django.conf import settings
 from django.db import models
 
-from analysis.manager import AppLivenessManager, AppOnlineTimeRecordManager, AppUseRecordManager
+from analysis.manager import AppLivenessManager, AppOnlineTimeRecordManager, AppRecentUseManager, AppUseRecordManager
 from app.models import App
 
 
@@ -48,6 +48,28 @@ class AppUseRecord(models.Model):
         verbose_name_plural = u"App访问记录数据"
 
 
+class AppRecentUse(models.Model):
+    """
+    用户最近使用的应用，每个用户每个应用一条记录，只保留最近使用的若干个应用
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name=u"用户")
+    app = models.ForeignKey(App, on_delete=models.CASCADE, verbose_name=u"应用")
+    use_time = models.DateTimeField(u"最近使用时间")
+
+    objects = AppRecentUseManager()
+
+    def __unicode__(self):
+        return "%s(%s)" % (self.user, self.app)
+
+    class Meta(object):
+        db_table = "console_analysis_apprecentuse"
+        unique_together = ("user", "app")
+        indexes = [models.Index(fields=["user", "-use_time"], name="analysis_recentuse_user_idx")]
+        verbose_name = u"用户最近使用的应用"
+        verbose_name_plural = u"用户最近使用的应用"
+
+
 class AppLiveness(models.Model):
     """
     app页面点击量、活跃度统计
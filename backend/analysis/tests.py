@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+
+import pytest
+
+from analysis.models import AppLiveness
+
+pytestmark = pytest.mark.django_db
+
+
+class TestAnalysisQueryBudget:
+    def test_app_record_by_user(self, login_client, synthetic_data, assert_query_budget):
+        app = synthetic_data["apps"][0]
+        assert_query_budget(
+            "analysis.views.app_record_by_user", login_client.post, "/console/analysis/app_record_by_user/%s/" % app.id
+        )
+
+    def test_app_liveness_save(self, login_client, synthetic_data, assert_query_budget):
+        apps = synthetic_data["apps"][:5]
+        app_msg = json.dumps({app.code: 2 for app in apps})
+        for _ in range(2):
+            assert_query_budget(
+                "analysis.views.app_liveness_save",
+                login_client.get,
+                "/console/analysis/app_liveness_save/",
+                {"app_msg": app_msg},
+            )
+
+        user = synthetic_data["users"][0]
+        assert list(AppLiveness.objects.filter(user=user).values_list("hits", flat=True)) == [4] * len(apps)
+
+    def test_app_online_time_save(self, login_client, synthetic_data, assert_query_budget):
+        app_msg = json.dumps({app.code: {"2024-01-01": 5000} for app in synthetic_data["apps"][:5]})
+        assert_query_budget(
+            "analysis.views.app_online_time_save",
+            login_client.get,
+            "/console/analysis/app_online_time_save/",
+            {"app_msg": app_msg},
+        )
@@ -73,26 +73,35 @@ def app_liveness_save(request):
     access_host = request.get_host()
     source_ip = get_source_ip(request)
 
+    # 上报的 app 及已有点击量记录一次查出
+    try:
+        app_dict = {app.code: app for app in App.objects.filter(code__in=[str(code) for code in app_msg])}
+    except TypeError:
+        logger.exception("invalid param app_msg: %s", app_msg)
+        return response_json_or_jsonp({"result": False}, callback)
+    liveness_app_ids = set(
+        AppLiveness.objects.filter(app__in=list(app_dict.values()), user=user).values_list("app_id", flat=True)
+    )
+
     # 遍历 上报的 app
     for _app in app_msg:
         try:
-            app = App.objects.filter(code=_app)
-            app = app[0] if app else None
+            app = app_dict.get(_app)
             if not app:
                 continue
 
-            app_data = AppLiveness.objects.filter(app=app, user=user)
             # 判断是否有今日的数据
-            if app_data:
+            if app.id in liveness_app_ids:
                 # 当日数据累加
-                app_data.update(hits=F("hits") + int(app_msg[_app]))
+                AppLiveness.objects.filter(app=app, user=user).update(hits=F("hits") + int(app_msg[_app]))
             else:
                 # 创建新的记录
                 AppLiveness(
                     app=app, user=user, hits=int(app_msg[_app]), access_host=access_host, source_ip=source_ip
                 ).save()
+                liveness_app_ids.add(app.id)
         except Exception as error:
-            logger.error("An error occurred while saving App liveness: %s" % error)
+            logger.error("An error occurred while saving App liveness: %s", error)
     return response_json_or_jsonp({"result": True}, callback)
 
 
@@ -134,5 +143,5 @@ def app_online_time_save(request):
                     source_ip=source_ip,
                 ).save()
         except Exception as error:
-            logger.error("An error occurred while saving App online time data:%s" % error)
+            logger.error("An error occurred while saving App online time data:%s", error)
     return response_json_or_jsonp({"result": True}, callback)
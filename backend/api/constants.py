@@ -29,3 +29,9 @@ ApiErrorCodeEnumV2 = enum(
     APP_NOT_EXIST=1301104,
     NO_PERMISSION=1301105,
 )
+
+# get_app_info 分页查询默认及最大每页数量
+APP_INFO_DEFAULT_PAGE_SIZE = 500
+APP_INFO_MAX_PAGE_SIZE = 2000
+# get_app_info 流式输出时每次输出的应用数量
+APP_INFO_STREAM_CHUNK_SIZE = 200
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# 依赖 ESB 模块提供的鉴权 token
+pytest.importorskip("esb.bkcore.utils")
+
+from api.views import get_app_info  # noqa: E402
+from app.models import App  # noqa: E402
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def esb_token():
+    with mock.patch("api.decorators.get_esb_token", return_value="token"):
+        yield
+
+
+def _get_app_info(params, etag=None):
+    headers = {"HTTP_X_APP_CODE": "esb", "HTTP_X_APP_TOKEN": "token"}
+    if etag:
+        headers["HTTP_IF_NONE_MATCH"] = etag
+    return get_app_info(RequestFactory().get("/api/app_info/", params, **headers))
+
+
+def _get_content(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
+class TestGetAppInfo:
+    def test_not_modified(self, synthetic_data):
+        response = _get_app_info({"page_size": 10})
+        assert response.status_code == 200
+        assert len(_get_content(response)["data"]) == 10
+        assert _get_app_info({"page_size": 10}, response["ETag"]).status_code == 304
+
+    def test_etag_changes_on_external_rename(self, synthetic_data):
+        app = synthetic_data["apps"][0]
+        etag = _get_app_info({"target_app_code": app.code})["ETag"]
+        # PaaS 直接修改数据库，不触发信号，updated_time 由 MySQL 的 ON UPDATE CURRENT_TIMESTAMP 更新（测试库需显式更新）
+        App.objects.filter(id=app.id).update(name="renamed", updated_time=timezone.now())
+        response = _get_app_info({"target_app_code": app.code}, etag)
+        assert response.status_code == 200
+        assert _get_content(response)["data"] == [{"app_code": app.code, "app_name": "renamed"}]
+
+    def test_not_modified_with_one_aggregate_query(self, synthetic_data):
+        etag = _get_app_info({})["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            assert _get_app_info({}, etag).status_code == 304
+        assert len(queries) == 1
+
+    def test_etag_changes_on_delete(self, synthetic_data):
+        etag = _get_app_info({})["ETag"]
+        App.objects.filter(id=synthetic_data["apps"][0].id).delete()
+        assert _get_app_info({}, etag).status_code == 200
+
+    def test_etag_differs_by_params(self, synthetic_data):
+        assert _get_app_info({"page_size": 10})["ETag"] != _get_app_info({"page_size": 20})["ETag"]
+
+    def test_invalid_params(self):
+        response = _get_app_info({"page_size": "abc"})
+        assert not response.has_header("ETag")
+        assert json.loads(response.content)["result"] is False
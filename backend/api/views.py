@@ -18,26 +18,163 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
-from django.http import JsonResponse
+import base64
+import hashlib
+import json
+
+from django.db.models import Count, F, Max, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 
 from account.decorators import login_exempt
+from api.constants import (
+    APP_INFO_DEFAULT_PAGE_SIZE,
+    APP_INFO_MAX_PAGE_SIZE,
+    APP_INFO_STREAM_CHUNK_SIZE,
+    ApiErrorCodeEnumV2,
+)
 from api.decorators import esb_required
 from api.utils import InnerFeedback
 from app.models import App
 
 
+def _get_app_info_etag(request):
+    """
+    应用信息 ETag：查询条件 + 符合条件的应用数量及最近修改时间，只做一次聚合查询
+    最近修改时间由数据库在插入、修改时维护（见 app 迁移 0040），PaaS 直接修改数据库时同样会变化
+    参数不合法时不计算 ETag
+    """
+    try:
+        all_app, _page_size = _get_app_info_queryset(request)
+    except (TypeError, ValueError):
+        return None
+
+    stats = all_app.aggregate(total=Count("id"), updated_time=Max("updated_time"))
+    updated_time = stats["updated_time"].isoformat() if stats["updated_time"] else ""
+    etag_parts = [stats["total"], updated_time, request.GET.urlencode()]
+    return hashlib.md5(repr(etag_parts).encode("utf-8")).hexdigest()
+
+
+def _get_app_info_queryset(request):
+    """
+    根据查询参数构造应用信息的过滤条件，返回 (查询集, 每页数量)，参数不合法时抛出 ValueError
+    排序及分页数量由调用方处理
+    """
+    app_code = request.GET.get("target_app_code")
+    # app_state = request.GET.get('app_state')
+    cursor = request.GET.get("cursor")
+    modified_since = request.GET.get("modified_since")
+    modified_since = _parse_modified_since(modified_since) if modified_since else None
+    position = _parse_app_info_cursor(cursor) if cursor else None
+    page_size = request.GET.get("page_size")
+    if page_size or cursor:
+        page_size = int(page_size or APP_INFO_DEFAULT_PAGE_SIZE)
+        if not 0 < page_size <= APP_INFO_MAX_PAGE_SIZE:
+            raise ValueError("invalid page_size")
+
+    all_app = App.objects.filter(is_lapp=False)
+    # 过滤查询的app_code
+    if app_code:
+        app_code_list = app_code.split(";")
+        all_app = all_app.filter(code__in=app_code_list)
+
+    # 增量查询，最近修改时间为空（数据库维护最近修改时间之前的历史数据）的应用无法判断，一并返回
+    if modified_since:
+        all_app = all_app.filter(Q(updated_time__gte=modified_since) | Q(updated_time__isnull=True))
+
+    # 根据应用状态筛选
+    # if app_state == 'develop':
+    #     all_app = all_app.filter(state__in=[AppStateEnum.DEVELOPMENT])
+    # elif app_state == 'test':
+    #     all_app = all_app.filter(state__gt=AppStateEnum.DEVELOPMENT, is_already_test=True)
+    # elif app_state == 'online':
+    #     all_app = all_app.filter(state__in=[AppStateEnum.TEST, AppStateEnum.ONLINE], is_already_online=True)
+    # elif app_state == 'outline':
+    #     all_app = all_app.filter(state__in=[AppStateEnum.OUTLINE])
+
+    # 按上一页最后一个应用的 (创建时间, id) 定位
+    if position:
+        created_date, app_id = position
+        if created_date:
+            all_app = all_app.filter(
+                Q(created_date__lt=created_date)
+                | Q(created_date=created_date, id__lt=app_id)
+                | Q(created_date__isnull=True)
+            )
+        else:
+            all_app = all_app.filter(created_date__isnull=True, id__lt=app_id)
+    return all_app, page_size
+
+
+def _make_app_info_cursor(app):
+    created_date = app["created_date"].isoformat() if app["created_date"] else None
+    return base64.urlsafe_b64encode(json.dumps([created_date, app["id"]]).encode("utf-8")).decode("utf-8")
+
+
+def _parse_app_info_cursor(cursor):
+    """
+    解析上一页返回的 cursor，返回 (创建时间, 应用 id)，不合法时抛出 ValueError
+    """
+    created_date, app_id = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+    if created_date is not None:
+        created_date = parse_datetime(created_date)
+        if created_date is None:
+            raise ValueError("invalid cursor")
+    return created_date, int(app_id)
+
+
+def _parse_modified_since(modified_since):
+    modified_since = parse_datetime(modified_since)
+    if modified_since is None:
+        raise ValueError("invalid modified_since")
+    if timezone.is_naive(modified_since):
+        modified_since = timezone.make_aware(modified_since)
+    return modified_since
+
+
+def _stream_app_info(all_app, page_size):
+    """
+    流式输出应用信息，内存占用与应用数量无关
+    """
+    yield '{"result": true, "code": "00", "message": "", "data": ['
+    last_app = None
+    count = 0
+    chunk = []
+    for app in all_app.iterator(chunk_size=APP_INFO_STREAM_CHUNK_SIZE):
+        chunk.append(json.dumps({"app_code": app["code"], "app_name": app["name"]}))
+        last_app = app
+        count += 1
+        if len(chunk) >= APP_INFO_STREAM_CHUNK_SIZE:
+            yield ("," if count > len(chunk) else "") + ", ".join(chunk)
+            chunk = []
+    if chunk:
+        yield ("," if count > len(chunk) else "") + ", ".join(chunk)
+
+    next_cursor = ""
+    if page_size and count == page_size:
+        next_cursor = _make_app_info_cursor(last_app)
+    yield '], "next_cursor": %s}' % json.dumps(next_cursor)
+
+
 @csrf_exempt
 @login_exempt
 @esb_required()
+@condition(etag_func=_get_app_info_etag)
 def get_app_info(request):
     """
     @api {GET} /paas/api/app_info/ get_app_info
     @apiName get_app_info
     @apiGroup BK_PAAS
     @apiVersion 1.0.0
-    @apiDescription 获取应用信息[支持批量获取]
+    @apiDescription 获取应用信息[支持批量获取、分页、增量查询]，响应带 ETag，请求头 If-None-Match 未变化时返回 304
     @apiParam (GET参数) {String} target_app_code 应用ID，多个target_app_code以英文分号分隔，target_app_code为空则表示所有应用
+    @apiParam (GET参数) {String} [modified_since] 只返回该时间（ISO 8601）之后创建或修改的应用
+    @apiParam (GET参数) {Number} [page_size] 每页数量，传入 page_size 或 cursor 时分页返回
+    @apiParam (GET参数) {String} [cursor] 上一页返回的 next_cursor
     @apiParamExample {json} 接口参数示例:
         {
             "target_app_code": "test1;test2",
@@ -57,32 +194,24 @@ def get_app_info(request):
                     'app_code': 'test2',
                     'app_name': '测试2'
                 }
-            ]
+            ],
+            "next_cursor": ""
         }
     """
     feedback = InnerFeedback()
 
-    app_code = request.GET.get("target_app_code")
-    # app_state = request.GET.get('app_state')
-
-    all_app = App.objects.filter(is_lapp=False)
-    # 过滤查询的app_code
-    if app_code:
-        app_code_list = app_code.split(";")
-        all_app = all_app.filter(code__in=app_code_list)
-
-    # 根据应用状态筛选
-    # if app_state == 'develop':
-    #     all_app = all_app.filter(state__in=[AppStateEnum.DEVELOPMENT])
-    # elif app_state == 'test':
-    #     all_app = all_app.filter(state__gt=AppStateEnum.DEVELOPMENT, is_already_test=True)
-    # elif app_state == 'online':
-    #     all_app = all_app.filter(state__in=[AppStateEnum.TEST, AppStateEnum.ONLINE], is_already_online=True)
-    # elif app_state == 'outline':
-    #     all_app = all_app.filter(state__in=[AppStateEnum.OUTLINE])
+    try:
+        all_app, page_size = _get_app_info_queryset(request)
+    except (TypeError, ValueError) as error:
+        feedback["result"] = False
+        feedback["code"] = ApiErrorCodeEnumV2.PARAM_NOT_VALID
+        feedback["message"] = _(u"参数不合法: %s") % error
+        return JsonResponse(feedback)
 
-    # 按照创建时间逆排序
-    all_app = all_app.values("code", "name").order_by("-created_date")
-    app_list = [{"app_code": i["code"], "app_name": i["name"]} for i in all_app]
-    feedback["data"] = app_list
-    return JsonResponse(feedback)
+    # 按照创建时间逆排序，创建时间为空的排在最后
+    all_app = all_app.values("id", "code", "name", "created_date").order_by(
+        F("created_date").desc(nulls_last=True), "-id"
+    )
+    if page_size:
+        all_app = all_app[:page_size]
+    return StreamingHttpResponse(_stream_app_info(all_app, page_size), content_type="application/json")
@@ -48,7 +48,7 @@ class BkLoginClient:
         try:
             resp = self.client.get_bk_token_userinfo(params={"bk_token": bk_token})
         except (APIGatewayResponseError, ResponseError) as e:
-            logger.exception(f"call bk login api error, detail: {e}")
+            logger.exception("call bk login api error, detail: %s", e)
             # 用户无权限时需要单独处理
             if e.response.status_code == 403:
                 raise BkLoginNoAccessPermission(e.response.json()["error"]["message"])
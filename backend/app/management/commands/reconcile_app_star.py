@@ -17,26 +17,23 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
-from __future__ import division
-
-from django.db import models
-from past.utils import old_div
-
-
-class AppTagManager(models.Manager):
-    def get_all_tags_with_100id(self):
-        """
-        获取所有分类，并将返回的ID*100，以便应用市场分类的筛选,与创建者分类区分开来
-        """
-        alltags = self.all()
-        tags = [(100 * tag.id, tag.name_display) for tag in alltags if tag]
-        return tags
-
-    def get_tags_by_100id(self, search_id):
-        """
-        筛选id=search_id/100的应用分类
-        """
-        search_id = old_div(search_id, 100)
-        if self.filter(id=search_id).exists():
-            return self.get(id=search_id)
-        return None
+from django.core.management.base import BaseCommand
+
+from app.models import App
+
+
+class Command(BaseCommand):
+    """
+    根据评分记录重新计算应用的评分总和、评分人数及平均分，可配置为定时任务
+
+    示例: python manage.py reconcile_app_star --app-id 1 --app-id 2
+    """
+
+    help = "Rebuild app star sum/count/average from star records"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--app-id", type=int, action="append", dest="app_ids", default=None)
+
+    def handle(self, app_ids, *args, **options):
+        updated = App.objects.reconcile_star(app_ids)
+        self.stdout.write("reconciled %d apps" % updated)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def init_app_star(apps, schema_editor):
+    """
+    根据已有评分记录初始化评分总和及评分人数
+    """
+    App = apps.get_model("app", "App")
+    AppStar = apps.get_model("app", "AppStar")
+    stars = AppStar.objects.filter(app__isnull=False).values("app_id")
+    for i in stars.annotate(star_sum=Sum("star_num"), star_count=Count("id")):
+        App.objects.filter(id=i["app_id"]).update(star_sum=i["star_sum"], star_count=i["star_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0037_app_last_online_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="app",
+            name="star_sum",
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12, verbose_name="评分总和"),
+        ),
+        migrations.AddField(
+            model_name="app",
+            name="star_count",
+            field=models.IntegerField(default=0, verbose_name="评分人数"),
+        ),
+        migrations.RunPython(init_app_star, migrations.RunPython.noop),
+    ]
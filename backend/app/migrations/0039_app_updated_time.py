@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def init_app_updated_time(apps, schema_editor):
+    """
+    已有应用的最近修改时间初始化为创建时间
+    """
+    App = apps.get_model("app", "App")
+    App.objects.filter(updated_time__isnull=True).update(updated_time=F("created_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0038_app_star_sum_star_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="app",
+            name="updated_time",
+            field=models.DateTimeField(auto_now=True, blank=True, db_index=True, null=True, verbose_name="最近修改时间"),
+        ),
+        migrations.RunPython(init_app_updated_time, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from django.db import migrations
+
+# PaaS 直接修改 paas_app 时不会经过 Django 的 auto_now，由数据库在插入、修改时维护最近修改时间
+# 数据库写入的时间使用 MySQL 会话时区，服务器时区比 UTC 快时只会偏大，增量查询不会遗漏
+ON_UPDATE_SQL = (
+    "ALTER TABLE paas_app MODIFY updated_time datetime(6) NULL "
+    "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+)
+REVERSE_ON_UPDATE_SQL = "ALTER TABLE paas_app MODIFY updated_time datetime(6) NULL"
+
+
+def add_on_update(apps, schema_editor):
+    # 仅 MySQL 支持 ON UPDATE CURRENT_TIMESTAMP
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(ON_UPDATE_SQL)
+
+
+def remove_on_update(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(REVERSE_ON_UPDATE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0039_app_updated_time"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_on_update, remove_on_update),
+    ]
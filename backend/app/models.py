@@ -22,7 +22,7 @@ from builtins import object, str  # noqa
 
 from django.conf import settings
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, ExpressionWrapper, F, Q, Sum
 from django.db.models.deletion import SET_NULL
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -37,7 +37,6 @@ from app.constants import (
     STATE_CHOICES_DISPALY_DICT,
     VCS_TYPE_CHOICES,
 )
-from app.manager import AppTagManager
 from common.constants import DEFAULT_TENANT_ID, AppTenantMode
 
 APP_LOGO_IMG_RELATED = "applogo"
@@ -52,8 +51,6 @@ class AppTags(models.Model):
     code = models.CharField(u"分类英文ID", max_length=30, unique=True)
     index = models.IntegerField(u"排序", default=0, help_text=u"降序排序，即 9 在 0 之前")
 
-    objects = AppTagManager()
-
     @property
     def name_display(self):
         if not self.name:
@@ -94,6 +91,55 @@ class AppManager(models.Manager):
             Q(app_tenant_mode=AppTenantMode.GLOBAL) | Q(app_tenant_mode=AppTenantMode.SINGLE, app_tenant_id=tenant_id)
         )
 
+    def update_last_online_time(self, app_code, online_time):
+        """
+        更新应用最近上线时间，只会往后更新
+        """
+        return (
+            super(AppManager, self)
+            .get_queryset()
+            .filter(code=app_code)
+            .filter(Q(last_online_time__isnull=True) | Q(last_online_time__lt=online_time))
+            .update(last_online_time=online_time)
+        )
+
+    def add_star(self, app_id, star_num):
+        """
+        累加应用评分，并由评分总和/评分人数更新平均分
+        需在事务中调用，第一条 update 持有行锁，保证两次更新之间不会被其他评分修改
+        """
+        queryset = super(AppManager, self).get_queryset().filter(id=app_id)
+        queryset.update(star_sum=F("star_sum") + star_num, star_count=F("star_count") + 1)
+        # sqlite 中小数位为 0 的 Decimal 会按整数存储，乘以 1.0 避免整数除法
+        queryset.update(
+            star_num=ExpressionWrapper(F("star_sum") * 1.0 / F("star_count"), output_field=models.DecimalField())
+        )
+
+    def reconcile_star(self, app_ids=None):
+        """
+        根据评分记录重新计算应用的评分总和、评分人数及平均分
+        返回更新的应用数
+        """
+        queryset = super(AppManager, self).get_queryset()
+        if app_ids:
+            queryset = queryset.filter(id__in=app_ids)
+
+        stars = AppStar.objects.filter(app_id__in=queryset.values("id")).values("app_id")
+        stars = {
+            i["app_id"]: (i["star_sum"], i["star_count"])
+            for i in stars.annotate(star_sum=Sum("star_num"), star_count=Count("id"))
+        }
+
+        updated = 0
+        for app_id, star_sum, star_count in queryset.values_list("id", "star_sum", "star_count"):
+            real_sum, real_count = stars.get(app_id, (0, 0))
+            if (star_sum, star_count) == (real_sum, real_count):
+                continue
+            star_num = real_sum / real_count if real_count else 0
+            queryset.filter(id=app_id).update(star_sum=real_sum, star_count=real_count, star_num=star_num)
+            updated += 1
+        return updated
+
 
 class App(models.Model):
     """
@@ -120,6 +166,10 @@ class App(models.Model):
     first_online_time = models.DateTimeField(
         u"应用首次上线时间", help_text=u"记录应用首次上线时间", blank=True, null=True, db_index=True
     )
+    # 冗余字段，由发布记录更新，避免查询发布记录表
+    last_online_time = models.DateTimeField(u"应用最近上线时间", help_text=u"记录应用最近一次成功上线的时间", blank=True, null=True)
+    # 应用信息最近修改时间，供增量查询应用信息；直接 update 的字段（评分、使用人数等）不更新该时间
+    updated_time = models.DateTimeField(u"最近修改时间", auto_now=True, blank=True, null=True, db_index=True)
     # 开发者信息
     developer = models.ManyToManyField(settings.AUTH_USER_MODEL, verbose_name=u"开发者", related_name="developers")
     # APP语言
@@ -166,6 +216,8 @@ class App(models.Model):
     visiable_labels = models.CharField(u"可见范围标签", max_length=1024, blank=True, null=True)
     # 应用评分
     star_num = models.DecimalField(u"星级评分", default=0.00, max_digits=5, decimal_places=2, null=True)
+    star_sum = models.DecimalField(u"评分总和", default=0.00, max_digits=12, decimal_places=2)
+    star_count = models.IntegerField(u"评分人数", default=0)
 
     # 在 PaaS3.0 上创建的应用，ESB/APIGW 会从这个表获取应用鉴权信息，所以需要把 PaaS3.0 应用的 app_code/app_secret 同步到这个表中
     from_paasv3 = models.BooleanField(u"是否 Paas3.0 上创建的应用", default=False)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app_esb_auth.constants import (
+    APPROVAL_TASK_MAX_RETRIES,
+    APPROVAL_TASK_RETRY_BACKOFF_SECONDS,
+    ApprovalTaskStatusEnum,
+)
+from app_esb_auth.models import EsbApprovalTask, EsbAuthApplyReocrd
+from blueking.component.shortcuts import get_client_by_user
+from common.constants import ApprovalResultEnum
+from common.log import logger
+
+# 后台审批任务，gevent 模式下线程会被替换为协程
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="esb_approval")
+
+
+def submit_batch(batch_id):
+    """
+    提交批次到后台执行
+    进程退出(如 gunicorn worker 被回收)时队列中及执行中的任务会中断，由 resume_stale_batch 在租约过期后重新执行
+    """
+    _executor.submit(run_batch, batch_id)
+
+
+def resume_stale_batch(batch_id):
+    """
+    重新执行批次中租约过期的未完成任务，返回是否重新提交
+    """
+    if not EsbApprovalTask.objects.reclaim_stale_tasks(batch_id):
+        return False
+    logger.warning("resume stale esb approval batch, batch_id: %s", batch_id)
+    submit_batch(batch_id)
+    return True
+
+
+def run_batch(batch_id):
+    """
+    执行批次中等待处理的任务，同一应用的组件合并为一次 ESB 调用
+    """
+    try:
+        tasks = list(EsbApprovalTask.objects.filter(batch_id=batch_id, status=ApprovalTaskStatusEnum.PENDING))
+        app_tasks = defaultdict(list)
+        for task in tasks:
+            app_tasks[(task.operator, task.app_code)].append(task)
+
+        for (operator, app_code), tasks in app_tasks.items():
+            _approve_app_tasks(operator, app_code, tasks)
+    except Exception:
+        logger.exception("run esb approval batch fail, batch_id: %s", batch_id)
+    finally:
+        EsbAuthApplyReocrd.objects.clear_done_total()
+        close_old_connections()
+
+
+def _approve_app_tasks(operator, app_code, tasks):
+    task_ids = [task.id for task in tasks]
+    # 只处理仍为等待状态的任务，避免与其他执行者重复处理；同时续约，租约过期前不会被重新执行
+    updated = EsbApprovalTask.objects.filter(id__in=task_ids, status=ApprovalTaskStatusEnum.PENDING).update(
+        status=ApprovalTaskStatusEnum.RUNNING, update_time=timezone.now()
+    )
+    if updated != len(task_ids):
+        task_ids = set(
+            EsbApprovalTask.objects.filter(id__in=task_ids, status=ApprovalTaskStatusEnum.RUNNING).values_list(
+                "id", flat=True
+            )
+        )
+        tasks = [task for task in tasks if task.id in task_ids]
+        if not tasks:
+            return
+
+    component_ids = sorted({task.api_id for task in tasks})
+    ok, message, retries = _add_app_component_perm(operator, app_code, component_ids)
+    if ok:
+        EsbAuthApplyReocrd.objects.filter(
+            id__in=[task.record_id for task in tasks], approval_result=ApprovalResultEnum.APPLYING
+        ).update(approval_result=ApprovalResultEnum.PASS, approver=operator, approval_time=timezone.now())
+        EsbApprovalTask.objects.filter(id__in=task_ids).update(
+            status=ApprovalTaskStatusEnum.SUCCEEDED, retries=retries, update_time=timezone.now()
+        )
+    else:
+        EsbApprovalTask.objects.filter(id__in=task_ids).update(
+            status=ApprovalTaskStatusEnum.FAILED, retries=retries, message=message[:512], update_time=timezone.now()
+        )
+
+
+def _add_app_component_perm(operator, app_code, component_ids):
+    """
+    调用组件为应用添加组件权限，失败时按退避时间重试
+    返回 (是否成功, 错误信息, 重试次数)
+    """
+    client = get_client_by_user(operator)
+    param = {"component_ids": component_ids, "added_app_code": app_code}
+    message = ""
+    for retry in range(APPROVAL_TASK_MAX_RETRIES + 1):
+        if retry:
+            time.sleep(random.uniform(0, APPROVAL_TASK_RETRY_BACKOFF_SECONDS * 2**retry))
+        try:
+            esb_result = client.esb.add_app_component_perm(param)
+        except Exception as e:  # pylint: disable=broad-except
+            esb_result = {"result": False, "message": str(e)}
+        if esb_result.get("result", False):
+            return True, "", retry
+
+        message = esb_result.get("message", "") or ""
+        logger.error(
+            "An error occurred while calling a component to add component permissions to the app, "
+            "app_code: %s, component_ids: %s, retry: %s, Error message: %s",
+            app_code,
+            component_ids,
+            retry,
+            message,
+        )
+    return False, message, APPROVAL_TASK_MAX_RETRIES
@@ -19,6 +19,8 @@ to the current version of the project delivered to anyone in the future.
 """
 from django.utils.translation import gettext_lazy as _
 
+from common.constants import enum
+
 ESB_API_AUTH_LEVEL = [
     (0, _(u"无限制")),
     (1, _(u"普通权限")),
@@ -27,3 +29,23 @@ ESB_API_AUTH_LEVEL = [
 ]
 
 ESB_API_AUTH_LEVEL_DICT = dict(ESB_API_AUTH_LEVEL)
+
+# 批量审批任务状态
+ApprovalTaskStatusEnum = enum(PENDING="pending", RUNNING="running", SUCCEEDED="succeeded", FAILED="failed")
+
+APPROVAL_TASK_STATUS_CHOICES = [
+    (ApprovalTaskStatusEnum.PENDING, _(u"等待处理")),
+    (ApprovalTaskStatusEnum.RUNNING, _(u"处理中")),
+    (ApprovalTaskStatusEnum.SUCCEEDED, _(u"成功")),
+    (ApprovalTaskStatusEnum.FAILED, _(u"失败")),
+]
+
+# 未完成的任务状态
+APPROVAL_TASK_UNFINISHED_STATUS = [ApprovalTaskStatusEnum.PENDING, ApprovalTaskStatusEnum.RUNNING]
+
+# 调用 ESB 添加组件权限失败时的重试次数，及退避时间基数(秒)
+APPROVAL_TASK_MAX_RETRIES = 3
+APPROVAL_TASK_RETRY_BACKOFF_SECONDS = 1
+
+# 未完成任务的租约时长(秒)，超过该时长未更新的等待/处理中任务视为执行进程已退出(如 worker 被回收)，可重新执行
+APPROVAL_TASK_LEASE_SECONDS = 600
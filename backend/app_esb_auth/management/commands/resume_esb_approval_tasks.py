@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.core.management.base import BaseCommand
+
+from app_esb_auth.approval import run_batch
+from app_esb_auth.constants import ApprovalTaskStatusEnum
+from app_esb_auth.models import EsbApprovalTask
+
+
+class Command(BaseCommand):
+    """
+    继续执行未完成的组件权限批量审批任务（如进程重启导致中断），可配置为定时任务
+    查询审批进度时会自动重新执行租约过期的任务，无人查询的批次可由该命令处理
+    默认只重新执行租约过期的任务，指定 --reset-running 时所有处理中(running)的任务均重置为等待处理后重新执行
+
+    示例: python manage.py resume_esb_approval_tasks --reset-running
+    """
+
+    help = "Resume unfinished ESB component permission approval tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset-running", action="store_true", dest="reset_running", default=False)
+
+    def handle(self, reset_running, *args, **options):
+        if reset_running:
+            EsbApprovalTask.objects.filter(status=ApprovalTaskStatusEnum.RUNNING).update(
+                status=ApprovalTaskStatusEnum.PENDING
+            )
+        else:
+            EsbApprovalTask.objects.reclaim_stale_tasks()
+        batch_ids = EsbApprovalTask.objects.get_unfinished_batch_ids()
+        for batch_id in batch_ids:
+            run_batch(batch_id)
+        self.stdout.write("resumed %d batches" % len(batch_ids))
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from app_esb_auth.constants import APPROVAL_TASK_LEASE_SECONDS, APPROVAL_TASK_UNFINISHED_STATUS, ApprovalTaskStatusEnum
+from common.constants import ESB_DONE_RECORD_TOTAL_CACHE_KEY, ApprovalResultEnum
+
+# 已审批记录总数缓存时间(秒)，历史记录只增不减，允许短时间内不精确
+ESB_DONE_RECORD_TOTAL_CACHE_SECONDS = 60
+# 分页 cursor 中表示创建时间为空的值
+CURSOR_NULL_CREATE_TIME = "null"
+
+
+class EsbAuthApplyReocrdManager(models.Manager):
+    """
+    组件权限申请记录
+    """
+
+    def get_not_done_records(self):
+        return self.filter(approval_result=ApprovalResultEnum.APPLYING).order_by("-create_time", "-id")
+
+    def get_done_records(self):
+        return self.exclude(approval_result=ApprovalResultEnum.APPLYING).order_by("-create_time", "-id")
+
+    def get_done_total(self):
+        """
+        已审批记录总数，缓存一段时间，避免每次翻页都对整个历史表做 count
+        """
+        total = cache.get(ESB_DONE_RECORD_TOTAL_CACHE_KEY)
+        if total is None:
+            total = self.get_done_records().count()
+            cache.set(ESB_DONE_RECORD_TOTAL_CACHE_KEY, total, ESB_DONE_RECORD_TOTAL_CACHE_SECONDS)
+        return total
+
+    def clear_done_total(self):
+        cache.delete(ESB_DONE_RECORD_TOTAL_CACHE_KEY)
+
+    def get_page(self, records, start, page_size, cursor=None):
+        """
+        分页查询，records 需按 (-create_time, -id) 排序
+        传入上一页返回的 cursor 时按 (create_time, id) 定位，避免大偏移量的 OFFSET 扫描；否则按 start 偏移
+        创建时间为空的历史记录排在最后，作为单独的一段按 id 定位，保证各段的查询条件都能使用索引
+        返回 (当前页记录, 下一页 cursor)
+        """
+        position = _parse_cursor(cursor)
+        if not position:
+            part_record = list(records[start : start + page_size])
+        elif position[0] is None:
+            part_record = list(records.filter(create_time__isnull=True, id__lt=position[1])[:page_size])
+        else:
+            create_time, record_id = position
+            after_q = Q(create_time__lt=create_time) | Q(create_time=create_time, id__lt=record_id)
+            part_record = list(records.filter(after_q)[:page_size])
+            # 有创建时间的记录已取完，从创建时间为空的记录开始补齐
+            if len(part_record) < page_size:
+                part_record += list(records.filter(create_time__isnull=True)[: page_size - len(part_record)])
+
+        next_cursor = ""
+        if len(part_record) == page_size:
+            last = part_record[-1]
+            create_time = last.create_time.isoformat() if last.create_time else CURSOR_NULL_CREATE_TIME
+            next_cursor = "%s,%s" % (create_time, last.id)
+        return part_record, next_cursor
+
+
+class EsbApprovalTaskManager(models.Manager):
+    """
+    组件权限批量审批任务
+    """
+
+    def create_batch(self, records, operator):
+        """
+        为一批待审批记录创建任务，返回批次ID
+        已有未完成任务的记录不会重复创建
+        """
+        record_ids = [record.id for record in records]
+        running_ids = set(
+            self.filter(record_id__in=record_ids, status__in=APPROVAL_TASK_UNFINISHED_STATUS).values_list(
+                "record_id", flat=True
+            )
+        )
+        batch_id = uuid.uuid4().hex
+        self.bulk_create(
+            [
+                self.model(
+                    batch_id=batch_id,
+                    record_id=record.id,
+                    app_code=record.app_code,
+                    api_id=record.api_id,
+                    operator=operator,
+                )
+                for record in records
+                if record.id not in running_ids
+            ]
+        )
+        return batch_id
+
+    def reclaim_stale_tasks(self, batch_id=None):
+        """
+        将租约过期的未完成任务重置为等待处理并续约，返回重置的任务数
+        并发调用时只有一个调用方能重置成功，避免重复执行
+        """
+        now = timezone.now()
+        queryset = self.filter(
+            status__in=APPROVAL_TASK_UNFINISHED_STATUS,
+            update_time__lt=now - timedelta(seconds=APPROVAL_TASK_LEASE_SECONDS),
+        )
+        if batch_id is not None:
+            queryset = queryset.filter(batch_id=batch_id)
+        return queryset.update(status=ApprovalTaskStatusEnum.PENDING, update_time=now)
+
+    def get_unfinished_batch_ids(self):
+        return list(
+            self.filter(status__in=APPROVAL_TASK_UNFINISHED_STATUS).values_list("batch_id", flat=True).distinct()
+        )
+
+    def get_batch_status(self, batch_id):
+        """
+        批次进度，包括各状态的数量及每条记录的状态
+        """
+        tasks = list(self.filter(batch_id=batch_id).values("record_id", "status", "message"))
+        counts = dict(self.filter(batch_id=batch_id).values_list("status").annotate(count=Count("id")))
+        status = {
+            "total": len(tasks),
+            "records": tasks,
+        }
+        for value in [
+            ApprovalTaskStatusEnum.PENDING,
+            ApprovalTaskStatusEnum.RUNNING,
+            ApprovalTaskStatusEnum.SUCCEEDED,
+            ApprovalTaskStatusEnum.FAILED,
+        ]:
+            status[value] = counts.get(value, 0)
+        status["finished"] = status[ApprovalTaskStatusEnum.SUCCEEDED] + status[ApprovalTaskStatusEnum.FAILED]
+        return status
+
+
+def _parse_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        create_time, record_id = cursor.rsplit(",", 1)
+        if create_time == CURSOR_NULL_CREATE_TIME:
+            return None, int(record_id)
+        return datetime.fromisoformat(create_time), int(record_id)
+    except (TypeError, ValueError):
+        return None
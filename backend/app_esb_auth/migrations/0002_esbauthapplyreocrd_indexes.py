@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_esb_auth", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="esbauthapplyreocrd",
+            index=models.Index(fields=["create_time", "id"], name="esb_apply_ctime_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="esbauthapplyreocrd",
+            index=models.Index(fields=["approval_result", "create_time", "id"], name="esb_apply_result_ctime_idx"),
+        ),
+    ]
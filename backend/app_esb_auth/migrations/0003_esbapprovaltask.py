@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_esb_auth", "0002_esbauthapplyreocrd_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EsbApprovalTask",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("batch_id", models.CharField(db_index=True, max_length=32, verbose_name="批次ID")),
+                ("record_id", models.IntegerField(db_index=True, verbose_name="申请记录ID")),
+                ("app_code", models.CharField(max_length=32, verbose_name="申请的应用")),
+                ("api_id", models.IntegerField(verbose_name="组件系统API ID")),
+                ("operator", models.CharField(max_length=32, verbose_name="审批人")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "等待处理"),
+                            ("running", "处理中"),
+                            ("succeeded", "成功"),
+                            ("failed", "失败"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="任务状态",
+                    ),
+                ),
+                ("retries", models.IntegerField(default=0, verbose_name="重试次数")),
+                ("message", models.CharField(blank=True, default="", max_length=512, verbose_name="错误信息")),
+                ("create_time", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                ("update_time", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+            ],
+            options={
+                "verbose_name": "组件权限批量审批任务",
+                "verbose_name_plural": "组件权限批量审批任务",
+                "db_table": "console_esb_approval_task",
+            },
+        ),
+    ]
@@ -22,6 +22,8 @@ from builtins import object
 from django.db import models
 from django.utils import timezone
 
+from app_esb_auth.constants import APPROVAL_TASK_STATUS_CHOICES, ApprovalTaskStatusEnum
+from app_esb_auth.manager import EsbApprovalTaskManager, EsbAuthApplyReocrdManager
 from common.constants import APPROVAL_RESULT_CHOICE
 
 
@@ -41,11 +43,18 @@ class EsbAuthApplyReocrd(models.Model):
     approval_result = models.CharField(u"审批结果", max_length=32, choices=APPROVAL_RESULT_CHOICE, default="applying")
     approval_time = models.DateTimeField(u"审批时间", null=True, blank=True)
 
+    objects = EsbAuthApplyReocrdManager()
+
     class Meta(object):
         verbose_name = u"app组件申请记录表"
         verbose_name_plural = u"app组件申请记录表"
         db_table = "paas_app_esb_auth_apply_record"
         app_label = "app_esb_auth"
+        indexes = [
+            # 审批记录按 (create_time, id) 分页
+            models.Index(fields=["create_time", "id"], name="esb_apply_ctime_id_idx"),
+            models.Index(fields=["approval_result", "create_time", "id"], name="esb_apply_result_ctime_idx"),
+        ]
 
     def __unicode__(self):
         return "%s(%s)" % (self.operator, self.app_code)
@@ -61,3 +70,33 @@ class EsbAuthApplyReocrd(models.Model):
         if not self.approval_time:
             return self.approval_time
         return timezone.localtime(self.approval_time).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class EsbApprovalTask(models.Model):
+    """
+    组件权限批量审批任务，每条申请记录一个任务，用于后台处理及前端查询进度
+    """
+
+    batch_id = models.CharField(u"批次ID", max_length=32, db_index=True)
+    record_id = models.IntegerField(u"申请记录ID", db_index=True)
+    app_code = models.CharField(u"申请的应用", max_length=32)
+    api_id = models.IntegerField(u"组件系统API ID")
+    operator = models.CharField(u"审批人", max_length=32)
+    status = models.CharField(
+        u"任务状态", max_length=16, choices=APPROVAL_TASK_STATUS_CHOICES, default=ApprovalTaskStatusEnum.PENDING
+    )
+    retries = models.IntegerField(u"重试次数", default=0)
+    message = models.CharField(u"错误信息", max_length=512, blank=True, default="")
+    create_time = models.DateTimeField(u"创建时间", auto_now_add=True)
+    update_time = models.DateTimeField(u"更新时间", auto_now=True)
+
+    objects = EsbApprovalTaskManager()
+
+    class Meta(object):
+        verbose_name = u"组件权限批量审批任务"
+        verbose_name_plural = u"组件权限批量审批任务"
+        db_table = "console_esb_approval_task"
+        app_label = "app_esb_auth"
+
+    def __unicode__(self):
+        return "%s(%s)" % (self.batch_id, self.record_id)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from app_esb_auth.approval import resume_stale_batch
+from app_esb_auth.constants import APPROVAL_TASK_LEASE_SECONDS, ApprovalTaskStatusEnum
+from app_esb_auth.models import EsbApprovalTask, EsbAuthApplyReocrd
+
+
+def _create_task(batch_id, status, seconds_ago):
+    task = EsbApprovalTask.objects.create(
+        batch_id=batch_id, record_id=1, app_code="app", api_id=1, operator="admin", status=status
+    )
+    EsbApprovalTask.objects.filter(id=task.id).update(update_time=timezone.now() - timedelta(seconds=seconds_ago))
+    return task
+
+
+@pytest.mark.django_db
+class TestResumeStaleBatch:
+    @pytest.mark.parametrize("status", [ApprovalTaskStatusEnum.PENDING, ApprovalTaskStatusEnum.RUNNING])
+    def test_resume_expired_lease(self, status):
+        task = _create_task("batch", status, APPROVAL_TASK_LEASE_SECONDS + 10)
+        with mock.patch("app_esb_auth.approval.submit_batch") as submit_batch:
+            assert resume_stale_batch("batch")
+            # 已续约，租约过期前不会重复执行
+            assert not resume_stale_batch("batch")
+        submit_batch.assert_called_once_with("batch")
+        task.refresh_from_db()
+        assert task.status == ApprovalTaskStatusEnum.PENDING
+
+    @pytest.mark.parametrize(
+        "status, seconds_ago",
+        [
+            (ApprovalTaskStatusEnum.RUNNING, 10),
+            (ApprovalTaskStatusEnum.SUCCEEDED, APPROVAL_TASK_LEASE_SECONDS + 10),
+            (ApprovalTaskStatusEnum.FAILED, APPROVAL_TASK_LEASE_SECONDS + 10),
+        ],
+    )
+    def test_skip_active_or_finished(self, status, seconds_ago):
+        task = _create_task("batch", status, seconds_ago)
+        with mock.patch("app_esb_auth.approval.submit_batch") as submit_batch:
+            assert not resume_stale_batch("batch")
+        submit_batch.assert_not_called()
+        task.refresh_from_db()
+        assert task.status == status
+
+
+@pytest.mark.django_db
+class TestEsbAuthApplyRecordPage:
+    @pytest.fixture
+    def records(self):
+        now = timezone.now()
+        records = EsbAuthApplyReocrd.objects.bulk_create(
+            [
+                EsbAuthApplyReocrd(operator="admin", app_code="app", sys_name="sys", api_id=i, api_name="api")
+                for i in range(13)
+            ]
+        )
+        # 部分记录创建时间相同，历史记录创建时间为空
+        for i, record in enumerate(records):
+            create_time = now - timedelta(seconds=i // 2) if i < 9 else None
+            EsbAuthApplyReocrd.objects.filter(id=record.id).update(create_time=create_time)
+        return EsbAuthApplyReocrd.objects.get_not_done_records()
+
+    @pytest.mark.parametrize("page_size", [1, 3, 4, 9, 20])
+    def test_cursor_pages(self, records, page_size):
+        expected = [record.id for record in records]
+        ids = []
+        part_record, cursor = EsbAuthApplyReocrd.objects.get_page(records, 0, page_size)
+        ids += [record.id for record in part_record]
+        while cursor:
+            part_record, cursor = EsbAuthApplyReocrd.objects.get_page(records, 0, page_size, cursor)
+            ids += [record.id for record in part_record]
+        assert ids == expected
@@ -57,7 +57,7 @@ def get_client_by_user(user, **kwargs):
         else:
             username = user
     except Exception:
-        logger.exception(u"Get user failed, User: %s" % user)
+        logger.exception(u"Get user failed, User: %s", user)
 
     common_args = {"username": username}
     common_args.update(kwargs)
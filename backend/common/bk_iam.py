@@ -17,11 +17,17 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import operator
+import threading
+import time
 from builtins import object
+from functools import reduce
 
+from cachetools import TTLCache, cached
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext as _
-from iam import IAM, Action, Request, Resource, Subject
+from iam import IAM, Action, DjangoQuerySetConverter, MultiActionRequest, Request, Resource, Subject
 from iam.apply.models import (
     ActionWithoutResources,
     ActionWithResources,
@@ -32,7 +38,7 @@ from iam.apply.models import (
 )
 
 from app.models import App
-from common.constants import enum
+from common.constants import IAM_TOKEN_CACHE_KEY, IAM_TOKEN_REFRESH_LOCK_KEY, enum
 from common.log import logger
 
 if settings.DEBUG:
@@ -85,10 +91,109 @@ APP_CODE = SYSTEM_ID
 # SECRET_KEY from settings_*.py, production is __ESB_TOKEN__
 APP_SECRET = settings.ESB_TOKEN
 
+# 桌面菜单入口相关的无资源权限
+MENU_ACTIONS = [
+    ActionEnum.ACCESS_DEVELOPER_CENTER,
+    ActionEnum.MANAGE_SMART,
+    ActionEnum.OPS_SYSTEM,
+    ActionEnum.MANAGE_APIGATEWAY,
+]
+
+_iam_client = None
+_iam_client_lock = threading.Lock()
+
+# 鉴权结果缓存, key: (username, action_id, resource_id)，无资源的权限 resource_id 为空字符串
+_decision_cache = TTLCache(maxsize=4096, ttl=30)
+_decision_cache_lock = threading.Lock()
+
+
+# 系统 token 缓存有效期，到期前 IAM_TOKEN_REFRESH_AHEAD 秒在后台刷新
+IAM_TOKEN_TTL = 600
+IAM_TOKEN_REFRESH_AHEAD = 60
+# 过期后仍保留一段时间，权限中心不可用时作为兜底
+IAM_TOKEN_STALE_TTL = 3600
+
+# 获取 token 失败后的退避时间，期间直接返回最近一次获取成功的 token（没有则为空字符串），不再请求权限中心
+IAM_TOKEN_FAIL_BACKOFF = 10
+
+_token_lock = threading.Lock()
+_last_good_token = ""
+_token_backoff_until = 0
+
+# 用户有开发权限的应用过滤条件缓存, key: username
+_app_filter_cache = TTLCache(maxsize=1024, ttl=30)
+_app_filter_cache_lock = threading.Lock()
+
+# 策略为 any(所有应用) 时的过滤条件
+ANY_POLICY = object()
+
+
+class AppFilterConverter(DjangoQuerySetConverter):
+    """
+    将 any 策略转换为 ANY_POLICY，而非 ~Q(pk=None)，拥有所有应用权限时直接返回缓存的全部应用编码，无需按条件查询
+    """
+
+    def _any(self, left, right):
+        return ANY_POLICY
+
+    def _and(self, content):
+        filters = [f for f in [self.convert(c) for c in content] if f is not ANY_POLICY]
+        if not filters:
+            return ANY_POLICY
+        return reduce(operator.and_, filters)
+
+    def _or(self, content):
+        filters = [self.convert(c) for c in content]
+        if ANY_POLICY in filters:
+            return ANY_POLICY
+        return reduce(operator.or_, filters)
+
+
+# 全部应用编码缓存，策略为 any 时使用
+_all_app_codes_cache = TTLCache(maxsize=1, ttl=60)
+
+
+@cached(cache=_all_app_codes_cache)
+def get_all_app_codes():
+    return tuple(App.objects.values_list("code", flat=True))
+
+
+def filter_app_codes(filters):
+    """
+    根据策略转换后的过滤条件获取应用编码列表
+    """
+    if not filters:
+        return []
+    if filters is ANY_POLICY:
+        return list(get_all_app_codes())
+    return list(App.objects.filter(filters).values_list("code", flat=True))
+
+
+def get_iam_client():
+    """
+    IAM 客户端进程内单例，复用底层连接
+    """
+    global _iam_client
+    if _iam_client is None:
+        with _iam_client_lock:
+            if _iam_client is None:
+                _iam_client = IAM(APP_CODE, APP_SECRET, BK_IAM_HOST, BK_PAAS_HOST)
+    return _iam_client
+
+
+def _get_cached_decision(key):
+    with _decision_cache_lock:
+        return _decision_cache.get(key)
+
+
+def _set_cached_decision(key, allowed):
+    with _decision_cache_lock:
+        _decision_cache[key] = allowed
+
 
 class Permission(object):
     def __init__(self):
-        self._iam = IAM(APP_CODE, APP_SECRET, BK_IAM_HOST, BK_PAAS_HOST)
+        self._iam = get_iam_client()
 
     def _make_request_without_resources(self, username, action_id):
         request = Request(
@@ -120,49 +225,161 @@ class Permission(object):
         )
         return request
 
+    def _is_allowed_with_cache(self, username, action_id, resource_id="", resources=None):
+        key = (username, action_id, resource_id)
+        allowed = _get_cached_decision(key)
+        if allowed is not None:
+            return allowed
+
+        if resources:
+            request = self._make_request_with_resources(username, action_id, resources)
+        else:
+            request = self._make_request_without_resources(username, action_id)
+        allowed = self._iam.is_allowed(request)
+        _set_cached_decision(key, allowed)
+        return allowed
+
     # TODO: 处理异常 => try except return false
 
     def allowed_access_developer_center(self, username):
         """
         访问开发者中心权限
         """
-        request = self._make_request_without_resources(username, ActionEnum.ACCESS_DEVELOPER_CENTER)
-        return self._iam.is_allowed(request)
+        return self._is_allowed_with_cache(username, ActionEnum.ACCESS_DEVELOPER_CENTER)
 
     def allowed_manage_smart(self, username):
         """
         smart管理权限
         """
-        request = self._make_request_without_resources(username, ActionEnum.MANAGE_SMART)
-        return self._iam.is_allowed(request)
+        return self._is_allowed_with_cache(username, ActionEnum.MANAGE_SMART)
 
     def allowed_ops_system(self, username):
         """
         PaaSAgent和第三方服务管理权限
         """
-        request = self._make_request_without_resources(username, ActionEnum.OPS_SYSTEM)
-        return self._iam.is_allowed(request)
+        return self._is_allowed_with_cache(username, ActionEnum.OPS_SYSTEM)
 
     def allowed_manage_apigateway(self, username):
         """
         网关管理权限
         """
-        request = self._make_request_without_resources(username, ActionEnum.MANAGE_APIGATEWAY)
-        return self._iam.is_allowed(request)
+        return self._is_allowed_with_cache(username, ActionEnum.MANAGE_APIGATEWAY)
+
+    def allowed_actions(self, username, action_ids=None):
+        """
+        批量校验多个无资源权限，未命中缓存的 action 只发起一次策略查询
+
+        返回: {action_id: True/False}
+        """
+        action_ids = action_ids or MENU_ACTIONS
+
+        result = {}
+        missing_action_ids = []
+        for action_id in action_ids:
+            allowed = _get_cached_decision((username, action_id, ""))
+            if allowed is None:
+                missing_action_ids.append(action_id)
+            else:
+                result[action_id] = allowed
+
+        if not missing_action_ids:
+            return result
+
+        request = MultiActionRequest(
+            SYSTEM_ID,
+            Subject(PrincipalTypeEnum.USER, username),
+            [Action(action_id) for action_id in missing_action_ids],
+            [],
+            None,
+        )
+        try:
+            actions_allowed = self._iam.resource_multi_actions_allowed(request)
+        except Exception:
+            logger.exception("batch query iam actions fail, username: %s, actions: %s", username, missing_action_ids)
+            # 查询失败不缓存，按无权限处理
+            result.update(dict.fromkeys(missing_action_ids, False))
+            return result
+
+        for action_id in missing_action_ids:
+            allowed = actions_allowed.get(action_id, False)
+            _set_cached_decision((username, action_id, ""), allowed)
+            result[action_id] = allowed
+        return result
 
     def get_token(self):
-        ok, message, token = self._iam.get_token(SYSTEM_ID)
-        if not ok:
-            logger.error("get token from iam fail: %s, will try again", message)
+        """
+        获取系统 token，缓存在 django 默认缓存中，临近过期时后台刷新
+        默认缓存为共享缓存(如 redis)时多进程共用同一个 token，LocMemCache 下每个进程各自获取和刷新
+        """
+        token_data = cache.get(IAM_TOKEN_CACHE_KEY)
+        if not token_data:
+            return self._refresh_token()
+
+        now = time.time()
+        if now >= token_data["expires_at"]:
+            return self._refresh_token()
+        if now >= token_data["expires_at"] - IAM_TOKEN_REFRESH_AHEAD:
+            self._refresh_token_in_background()
+        return token_data["token"]
+
+    def _refresh_token_in_background(self):
+        # 同一时间只允许一个刷新任务（共享缓存时跨进程生效，LocMemCache 下仅在进程内生效）
+        if not cache.add(IAM_TOKEN_REFRESH_LOCK_KEY, 1, 30):
+            return
+
+        def _refresh():
+            try:
+                self._refresh_token()
+            finally:
+                cache.delete(IAM_TOKEN_REFRESH_LOCK_KEY)
+
+        threading.Thread(target=_refresh, daemon=True).start()
+
+    def _refresh_token(self):
+        """
+        请求权限中心获取 token，进程内同一时间只有一个请求，其他调用方等待其结果
+        请求失败时返回最近一次获取成功的 token，并在退避时间内不再请求
+        """
+        global _last_good_token, _token_backoff_until
+
+        if time.time() < _token_backoff_until:
+            return self._get_stale_token()
+
+        with _token_lock:
+            # 等待锁期间 token 可能已被刷新，或者已获取失败进入退避
+            token_data = cache.get(IAM_TOKEN_CACHE_KEY)
+            if token_data and time.time() < token_data["expires_at"] - IAM_TOKEN_REFRESH_AHEAD:
+                return token_data["token"]
+            if time.time() < _token_backoff_until:
+                return self._get_stale_token()
+
+            stale_token = token_data["token"] if token_data else _last_good_token
 
-            # try again
             ok, message, token = self._iam.get_token(SYSTEM_ID)
+            if not ok and not stale_token:
+                logger.error("get token from iam fail: %s, will try again", message)
+                ok, message, token = self._iam.get_token(SYSTEM_ID)
+
             if not ok:
+                _token_backoff_until = time.time() + IAM_TOKEN_FAIL_BACKOFF
+                if stale_token:
+                    logger.error("get token from iam fail: %s, will return last token", message)
+                    return stale_token
                 logger.error("get token from iam fail: %s, will return empty string", message)
                 return ""
+
+            cache.set(
+                IAM_TOKEN_CACHE_KEY,
+                {"token": token, "expires_at": time.time() + IAM_TOKEN_TTL},
+                IAM_TOKEN_TTL + IAM_TOKEN_STALE_TTL,
+            )
+            _last_good_token = token
+            _token_backoff_until = 0
             return token
 
-        return token
+    def _get_stale_token(self):
+        token_data = cache.get(IAM_TOKEN_CACHE_KEY)
+        return token_data["token"] if token_data else _last_good_token
 
     def allowed_develop_app(self, username, app_code):
         """
@@ -172,8 +389,7 @@ class Permission(object):
 
         r = Resource(SYSTEM_ID, ResourceTypeEnum.APP, app_code, {})
         resources = [r]
-        request = self._make_request_with_resources(username, ActionEnum.DEVELOP_APP, resources)
-        return self._iam.is_allowed(request)
+        return self._is_allowed_with_cache(username, ActionEnum.DEVELOP_APP, app_code, resources)
 
     def app_list(self, username):
         """
@@ -181,18 +397,23 @@ class Permission(object):
 
         拉回策略, 自己算!
         """
+        return filter_app_codes(self._develop_app_filter(username))
+
+    def _develop_app_filter(self, username):
+        with _app_filter_cache_lock:
+            if username in _app_filter_cache:
+                return _app_filter_cache[username]
+
         request = self._make_request_without_resources(username, ActionEnum.DEVELOP_APP)
 
         # 两种策略 1) 实例级别 2) 用户级别
         # 只有条件 code in []
         key_mapping = {"app.id": "code"}
 
-        filters = self._iam.make_filter(request, key_mapping=key_mapping)
-        if not filters:
-            return []
-
-        apps = App.objects.filter(filters).all()
-        return [app.code for app in apps]
+        filters = self._iam.make_filter(request, converter_class=AppFilterConverter, key_mapping=key_mapping)
+        with _app_filter_cache_lock:
+            _app_filter_cache[username] = filters
+        return filters
 
     def make_no_app_application(self, action_id, with_access_developer_center=True):
         action = ActionWithoutResources(action_id)
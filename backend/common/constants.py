@@ -57,6 +57,14 @@ ROLECODE_LIST = [RoleCodeEnum.STAFF, RoleCodeEnum.SUPERUSER, RoleCodeEnum.DEVELO
 
 DATETIME_FORMAT_STRING = "%Y-%m-%d %H:%M:%S"
 LICENSE_VAILD_CACHE_KEY = "BK_LICENSE_VALID"
+IAM_TOKEN_CACHE_KEY = "BK_IAM_SYSTEM_TOKEN"
+IAM_TOKEN_REFRESH_LOCK_KEY = "BK_IAM_SYSTEM_TOKEN_REFRESHING"
+USERMGR_PROFILE_CACHE_KEY = "BK_USERMGR_PROFILE_%s"
+ESB_DONE_RECORD_TOTAL_CACHE_KEY = "BK_ESB_DONE_RECORD_TOTAL"
+MARKET_APP_DETAIL_CACHE_KEY = "BK_MARKET_APP_DETAIL_%s_%s"
+MARKET_NAV_VERSION_CACHE_KEY = "BK_MARKET_NAV_VERSION"
+APP_CATALOG_VERSION_CACHE_KEY = "BK_APP_CATALOG_VERSION"
+MARKET_LIST_CACHE_KEY = "BK_MARKET_LIST_%s"
 
 ModeEnum = enum(TEST="test", PROD="prod", ALL="all")
 
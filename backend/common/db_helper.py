@@ -50,12 +50,12 @@ class SqlOperate(object):
                 cursor.execute(sql)
                 result = self.dictfetchall(cursor)
             except Exception as error:
-                logger.error(u"sql(%s) query error: %s" % (sql, error))
+                logger.error(u"sql(%s) query error: %s", sql, error)
                 result = []
             finally:
                 cursor.close()
         except Exception as error:
-            logger.error(u"database connection error: %s" % error)
+            logger.error(u"database connection error: %s", error)
             result = []
         return result
 
@@ -70,11 +70,11 @@ class SqlOperate(object):
             try:
                 result = cursor.execute(sql)
             except Exception as error:
-                logger.error(u"sql(%s) execute error: %s" % (sql, error))
+                logger.error(u"sql(%s) execute error: %s", sql, error)
                 result = 0
             finally:
                 cursor.close()
         except Exception as error:
-            logger.error(u"database connection error: %s" % error)
+            logger.error(u"database connection error: %s", error)
             result = 0
         return result
@@ -32,6 +32,7 @@ ConsoleErrorCodes = enum(
     E1303003_BASE_HTTP_DEPENDENCE_ERROR=1303003,
     E1303004_BASE_BKSUITE_DATABASE_ERROR=1303004,
     E1303005_BASE_LICENSE_ERROR=1303005,
+    E1303006_BASE_CHECK_TIMEOUT=1303006,
     # 加载桌面应用错误
     E1303100_DESKTOP_USER_APP_LOAD_ERROR=1303100,
     # 应用市场查询应用失败
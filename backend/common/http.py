@@ -25,8 +25,6 @@ Rules:
 3. 以统一的header头发送请求
 """
 
-from builtins import str
-
 import requests
 
 from common.log import logger
@@ -54,7 +52,7 @@ def _http_request(method, url, headers=None, data=None, verify=False, cert=None)
         else:
             return False, None
     except requests.exceptions.RequestException:
-        logger.exception("http request error! type: %s, url: %s, data: %s" % (method, url, str(data)))
+        logger.exception("http request error! type: %s, url: %s, data: %s", method, url, data)
         return False, None
     else:
         if resp.status_code != 200:
@@ -62,7 +60,7 @@ def _http_request(method, url, headers=None, data=None, verify=False, cert=None)
             error_msg = (
                 "http request error! type: %s, url: %s, data: %s, " "response_status_code: %s, response_content: %s"
             )
-            logger.error(error_msg % (method, url, str(data), resp.status_code, content))
+            logger.error(error_msg, method, url, data, resp.status_code, content)
             return False, None
 
         return True, resp.json()
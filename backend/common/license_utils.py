@@ -107,7 +107,7 @@ def check_license():
     is_valid, message, message_cn, valid_start_time, valid_end_time = remote_license_result
 
     if not is_valid:
-        logger.error(message)
+        logger.error("%s", message)
         # TODO to write a function for selecting data of current lageuage
         error_message = message_cn if translation.get_language() in ["zh-hans"] else message
         return False, error_message, None, None
@@ -117,6 +117,6 @@ def check_license():
         valid_start_time = parse_local_datetime(valid_start_time, zone=timezone.utc)
         valid_end_time = parse_local_datetime(valid_end_time, zone=timezone.utc)
     except Exception as error:
-        logger.exception("An error occurred while checking enterprise certificate conversion time：%s" % error)
+        logger.exception("An error occurred while checking enterprise certificate conversion time：%s", error)
         return False, _(u"证书不可用，请求未返回有效期或返回格式有误"), None, None
     return True, _(u"证书校验成功"), valid_start_time, valid_end_time
@@ -32,6 +32,127 @@ Usage:
         logger.exception("wrong3")
 """
 
+import collections
+import copy
+import importlib
 import logging
 
+from prometheus_client import Counter
+
 logger = logging.getLogger("root")
+
+LOG_DROPPED_COUNT = Counter(
+    "console_log_dropped_total",
+    "Number of log records dropped because the log queue is full",
+    ["handler"],
+)
+
+
+def _get_original(module_name, attr):
+    """
+    gevent monkey patch 后 threading 等模块均被替换为协程实现，日志写线程需使用原始实现才能真正脱离事件循环
+    """
+    try:
+        from gevent import monkey
+
+        if monkey.is_module_patched(module_name):
+            return monkey.get_original(module_name, attr)
+    except ImportError:
+        pass
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    异步日志 handler：调用方只将日志记录放入有界队列，由独立线程格式化并写入目标 handler（如 RotatingFileHandler）
+    队列满时直接丢弃并计数，避免磁盘IO、日志轮转阻塞 gevent worker
+
+    配置示例:
+        "root": {
+            "class": "common.log.QueueLogHandler",
+            "target_class": "logging.handlers.RotatingFileHandler",
+            "queue_size": 10000,
+            "formatter": "verbose",
+            "filename": "/path/to/console.log",
+            ...
+        }
+    target_class 以外的参数透传给目标 handler
+    """
+
+    def __init__(self, target_class, queue_size=10000, **target_kwargs):
+        super(QueueLogHandler, self).__init__()
+        module_name, class_name = target_class.rsplit(".", 1)
+        self.target = getattr(importlib.import_module(module_name), class_name)(**target_kwargs)
+        # 目标 handler 只在写线程中使用，不能使用被 gevent 替换的协程锁
+        self.target.lock = _get_original("_thread", "RLock")()
+        self.queue = collections.deque()
+        self.queue_size = queue_size
+        self.dropped = 0
+
+        allocate_lock = _get_original("_thread", "allocate_lock")
+        self._wakeup = allocate_lock()
+        self._wakeup.acquire()
+        self._done = allocate_lock()
+        self._done.acquire()
+        self._stopped = False
+        _get_original("_thread", "start_new_thread")(self._monitor, ())
+
+    def setFormatter(self, fmt):
+        # 格式化在写线程中进行
+        self.target.setFormatter(fmt)
+
+    def emit(self, record):
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            LOG_DROPPED_COUNT.labels(handler=self.name or "").inc()
+            return
+        try:
+            self.queue.append(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+            return
+        self._notify()
+
+    def _notify(self):
+        if self._wakeup.locked():
+            try:
+                self._wakeup.release()
+            except RuntimeError:
+                # 写线程已被其他调用方唤醒
+                pass
+
+    def prepare(self, record):
+        """
+        在调用方完成参数合并，防止参数对象在写线程处理前被修改
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def _monitor(self):
+        try:
+            while True:
+                stopped = self._stopped
+                while self.queue:
+                    record = self.queue.popleft()
+                    try:
+                        self.target.handle(record)
+                    except Exception:
+                        self.target.handleError(record)
+                if stopped:
+                    return
+                self._wakeup.acquire(timeout=1)
+        finally:
+            self._done.release()
+
+    def close(self):
+        """
+        logging.shutdown 时调用，等待写线程写完队列中剩余的日志
+        """
+        if not self._stopped:
+            self._stopped = True
+            self._notify()
+            self._done.acquire(timeout=5)
+            self.target.close()
+        super(QueueLogHandler, self).close()
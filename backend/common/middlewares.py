@@ -17,11 +17,20 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import cProfile
+import hmac
 import json
+import os
+import random
 import re
+import threading
+import time
+from datetime import datetime
 
 from django.conf import settings
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
+from prometheus_client import Counter, Histogram
 
 from common.log import logger
 from common.utils.xss.escape_function import html_escape, texteditor_escape, url_escape
@@ -51,7 +60,7 @@ class CheckXssMiddleware(MiddlewareMixin):
             # post参数转换
             request.POST = self.__escape_data(request.path, request.POST, escape_type)
         except Exception as e:
-            logger.error("CheckXssMiddleware Conversion failed! Error message: %s" % e)
+            logger.error("CheckXssMiddleware Conversion failed! Error message: %s", e)
         return None
 
     def __escape_data(self, path, query_dict, escape_type=None):  # noqa
@@ -83,13 +92,13 @@ class CheckXssMiddleware(MiddlewareMixin):
                         else:
                             new_value = html_escape(_get_value)
                     except Exception as e:
-                        logger.error("CheckXssMiddleware GET/POST Parameters conversion failed: %s" % e)
+                        logger.error("CheckXssMiddleware GET/POST Parameters conversion failed: %s", e)
                         new_value = _get_value
                 else:
                     try:
                         new_value = html_escape(_get_value, True)
                     except Exception as e:
-                        logger.error("CheckXssMiddleware GET/POST Parameters conversion failed: %s" % e)
+                        logger.error("CheckXssMiddleware GET/POST Parameters conversion failed: %s", e)
                         new_value = _get_value
                 new_value_list.append(new_value)
             data_copy.setlist(_get_key, new_value_list)
@@ -126,7 +135,7 @@ class CheckXssMiddleware(MiddlewareMixin):
                     result_type = escape_type
                     break
         except Exception as e:
-            logger.error("CheckXssMiddleware Special path processing failed! Error message: %s" % e)
+            logger.error("CheckXssMiddleware Special path processing failed! Error message: %s", e)
         return result_type
 
     def __filter_path_list(self):
@@ -140,3 +149,169 @@ class CheckXssMiddleware(MiddlewareMixin):
         }
         use_texteditor_paths = {}
         return (use_url_paths, use_texteditor_paths)
+
+
+# 视图数据库查询指标
+VIEW_DB_QUERY_COUNT = Histogram(
+    "console_view_db_queries",
+    "Number of database queries executed per view",
+    ["view"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+VIEW_DB_QUERY_SECONDS = Histogram(
+    "console_view_db_query_seconds",
+    "Total database time per view",
+    ["view"],
+)
+VIEW_DB_QUERY_BUDGET_EXCEEDED = Counter(
+    "console_view_db_query_budget_exceeded_total",
+    "Number of requests exceeding the configured database query budget",
+    ["view"],
+)
+
+
+class _QueryCounter(object):
+    """
+    通过 connection.execute_wrapper 统计请求内的 SQL 数量与耗时
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        st = time.time()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.time() - st
+
+
+class DBQueryBudgetMiddleware(object):
+    """
+    统计每个视图的数据库查询次数及耗时，导出为 metrics，超出预算的视图记录告警日志
+    预算配置：settings.DB_QUERY_BUDGETS = {"desktop.views.get_my_app": 20}，未配置的视图使用 DB_QUERY_BUDGET_DEFAULT
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DB_QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        view_name = getattr(request, "_db_budget_view_name", None)
+        if view_name:
+            self._record(request, view_name, counter)
+        return response
+
+    def process_view(self, request, view, args, kwargs):
+        request._db_budget_view_name = "%s.%s" % (view.__module__, getattr(view, "__name__", view.__class__.__name__))
+        return None
+
+    def _record(self, request, view_name, counter):
+        VIEW_DB_QUERY_COUNT.labels(view=view_name).observe(counter.count)
+        VIEW_DB_QUERY_SECONDS.labels(view=view_name).observe(counter.duration)
+
+        budget = settings.DB_QUERY_BUDGETS.get(view_name, settings.DB_QUERY_BUDGET_DEFAULT)
+        if budget and counter.count > budget:
+            VIEW_DB_QUERY_BUDGET_EXCEEDED.labels(view=view_name).inc()
+            logger.warning(
+                "view exceeds db query budget! view: %s, path: %s, queries: %d, budget: %d, db_time: %dms",
+                view_name,
+                request.path,
+                counter.count,
+                budget,
+                int(counter.duration * 1000),
+            )
+
+
+# 同一线程内只能有一个 profiler 生效（gevent 下所有协程共享线程），采样时互斥
+_PROFILER_LOCK = threading.Lock()
+
+
+def get_profile_dir():
+    return settings.PROFILING_DIR or os.path.join(settings.LOGGING_DIR, "profiles")
+
+
+class ProfilingMiddleware(object):
+    """
+    请求采样性能分析，默认关闭，开启后按 PROFILING_SAMPLE_RATE 比例采样，
+    或者请求头携带与 PROFILING_HEADER_TOKEN 一致的 X-Bk-Console-Profile 时强制采样
+    采样结果以 cProfile 格式写入 LOGGING_DIR/profiles，文件名包含视图名和耗时，可使用 profile_summary 命令汇总
+    注意：gevent 模式下采样期间同线程其他协程的调用也会被记录
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED or not self._should_profile(request):
+            return self.get_response(request)
+
+        if not _PROFILER_LOCK.acquire(False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            st = time.time()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.time() - st
+        finally:
+            _PROFILER_LOCK.release()
+
+        if duration * 1000 >= settings.PROFILING_MIN_DURATION_MS:
+            self._dump(request, profiler, duration)
+        return response
+
+    def process_view(self, request, view, args, kwargs):
+        request._profiling_view_name = "%s.%s" % (view.__module__, getattr(view, "__name__", view.__class__.__name__))
+        return None
+
+    def _should_profile(self, request):
+        token = settings.PROFILING_HEADER_TOKEN
+        header = request.META.get("HTTP_X_BK_CONSOLE_PROFILE")
+        if token and header and hmac.compare_digest(header, token):
+            return True
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def _dump(self, request, profiler, duration):
+        profile_dir = get_profile_dir()
+        view_name = getattr(request, "_profiling_view_name", None) or "unknown"
+        filename = "%s_%s_%dms_%d.prof" % (
+            datetime.now().strftime("%Y%m%d%H%M%S%f"),
+            view_name,
+            duration * 1000,
+            os.getpid(),
+        )
+        try:
+            if not os.path.exists(profile_dir):
+                os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(profile_dir, filename))
+            self._cleanup(profile_dir)
+        except Exception:
+            logger.exception("dump request profile fail, path: %s", request.path)
+
+    def _cleanup(self, profile_dir):
+        """
+        仅保留最新的 PROFILING_MAX_FILES 个采样文件
+        """
+        entries = [i for i in os.scandir(profile_dir) if i.is_file() and i.name.endswith(".prof")]
+        if len(entries) <= settings.PROFILING_MAX_FILES:
+            return
+        entries.sort(key=lambda i: i.stat().st_mtime)
+        for entry in entries[: len(entries) - settings.PROFILING_MAX_FILES]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                # 多进程同时清理时文件可能已被删除
+                pass
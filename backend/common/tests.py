@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from iam import DjangoQuerySetConverter
+
+from app.models import App
+from common import bk_iam
+
+pytestmark = pytest.mark.django_db
+
+
+class TestDBQueryBudgetMiddleware:
+    def test_exceed_budget(self, login_client):
+        with override_settings(DB_QUERY_BUDGETS={"desktop.views.get_appxy": 1}), mock.patch(
+            "common.middlewares.logger"
+        ) as logger:
+            login_client.get("/console/get_appxy/")
+        assert logger.warning.call_count == 1
+        assert logger.warning.call_args[0][1] == "desktop.views.get_appxy"
+
+    def test_within_budget(self, login_client):
+        with mock.patch("common.middlewares.logger") as logger:
+            login_client.get("/console/get_appxy/")
+        assert not logger.warning.called
+
+
+@pytest.fixture
+def many_apps(db):
+    """
+    2000 个应用，用于对比策略转换结果，耗时对比见 bench_iam_app_list 命令
+    """
+    call_command("gen_synthetic_data", users=1, apps=2000, user_apps=0, use_records=0, prefix="iam", stdout=StringIO())
+    return list(App.objects.order_by("id").values_list("code", flat=True))
+
+
+@pytest.fixture(autouse=True)
+def clear_iam_cache():
+    bk_iam._all_app_codes_cache.clear()
+    bk_iam._app_filter_cache.clear()
+    bk_iam._decision_cache.clear()
+    yield
+    bk_iam._all_app_codes_cache.clear()
+    bk_iam._app_filter_cache.clear()
+    bk_iam._decision_cache.clear()
+
+
+def _policies(codes):
+    return {
+        "any": {"op": "any", "field": "app.id", "value": []},
+        "in": {"op": "in", "field": "app.id", "value": codes[:1000]},
+        "or(eq)": {"op": "OR", "content": [{"op": "eq", "field": "app.id", "value": c} for c in codes[:200]]},
+        "and(any, in)": {
+            "op": "AND",
+            "content": [
+                {"op": "any", "field": "app.id", "value": []},
+                {"op": "in", "field": "app.id", "value": codes[:10]},
+            ],
+        },
+    }
+
+
+def _app_list_before(policy):
+    # 优化前: 转换为 ~Q(pk=None) 等条件后查询完整的 App 对象
+    filters = DjangoQuerySetConverter({"app.id": "code"}).convert(policy)
+    return [app.code for app in App.objects.filter(filters).all()]
+
+
+def _app_list_after(policy):
+    return bk_iam.filter_app_codes(bk_iam.AppFilterConverter({"app.id": "code"}).convert(policy))
+
+
+class TestIamAppList:
+    @pytest.mark.parametrize("policy_name", ["any", "in", "or(eq)", "and(any, in)"])
+    def test_same_result_as_before(self, many_apps, policy_name):
+        policy = _policies(many_apps)[policy_name]
+        assert sorted(_app_list_after(policy)) == sorted(_app_list_before(policy))
+
+    def test_any_policy_without_app_query(self, many_apps):
+        policy = _policies(many_apps)["any"]
+        assert len(_app_list_after(policy)) == len(many_apps)
+        with CaptureQueriesContext(connection) as queries:
+            _app_list_after(policy)
+        assert len(queries) == 0
+
+    def test_app_list_cache_policy_filter(self, many_apps):
+        iam_client = mock.MagicMock()
+        iam_client.make_filter.side_effect = lambda request, converter_class, key_mapping: converter_class(
+            key_mapping
+        ).convert({"op": "in", "field": "app.id", "value": many_apps[:3]})
+        with mock.patch.object(bk_iam, "get_iam_client", return_value=iam_client):
+            assert sorted(bk_iam.Permission().app_list("admin")) == sorted(many_apps[:3])
+            assert sorted(bk_iam.Permission().app_list("admin")) == sorted(many_apps[:3])
+        assert iam_client.make_filter.call_count == 1
+
+
+class TestIamAllowedActions:
+    def _permission(self, iam_client):
+        with mock.patch.object(bk_iam, "get_iam_client", return_value=iam_client):
+            return bk_iam.Permission()
+
+    def test_batch_query_once(self):
+        iam_client = mock.MagicMock()
+        iam_client.resource_multi_actions_allowed.return_value = {
+            bk_iam.ActionEnum.ACCESS_DEVELOPER_CENTER: True,
+            bk_iam.ActionEnum.OPS_SYSTEM: True,
+        }
+        permission = self._permission(iam_client)
+        expected = {
+            bk_iam.ActionEnum.ACCESS_DEVELOPER_CENTER: True,
+            bk_iam.ActionEnum.MANAGE_SMART: False,
+            bk_iam.ActionEnum.OPS_SYSTEM: True,
+            bk_iam.ActionEnum.MANAGE_APIGATEWAY: False,
+        }
+        assert permission.allowed_actions("admin") == expected
+        assert iam_client.resource_multi_actions_allowed.call_count == 1
+        request = iam_client.resource_multi_actions_allowed.call_args[0][0]
+        assert [action.id for action in request.actions] == bk_iam.MENU_ACTIONS
+
+        # 结果与单个权限校验共用缓存
+        assert permission.allowed_actions("admin") == expected
+        assert permission.allowed_ops_system("admin") is True
+        assert iam_client.resource_multi_actions_allowed.call_count == 1
+        iam_client.is_allowed.assert_not_called()
+
+    def test_only_query_missing_actions(self):
+        iam_client = mock.MagicMock()
+        iam_client.is_allowed.return_value = True
+        iam_client.resource_multi_actions_allowed.return_value = {}
+        permission = self._permission(iam_client)
+        permission.allowed_access_developer_center("admin")
+        result = permission.allowed_actions(
+            "admin", [bk_iam.ActionEnum.ACCESS_DEVELOPER_CENTER, bk_iam.ActionEnum.MANAGE_SMART]
+        )
+        assert result == {bk_iam.ActionEnum.ACCESS_DEVELOPER_CENTER: True, bk_iam.ActionEnum.MANAGE_SMART: False}
+        request = iam_client.resource_multi_actions_allowed.call_args[0][0]
+        assert [action.id for action in request.actions] == [bk_iam.ActionEnum.MANAGE_SMART]
+
+    def test_query_fail_not_cached(self):
+        iam_client = mock.MagicMock()
+        iam_client.resource_multi_actions_allowed.side_effect = [Exception("timeout"), {}]
+        permission = self._permission(iam_client)
+        assert permission.allowed_actions("admin") == dict.fromkeys(bk_iam.MENU_ACTIONS, False)
+        permission.allowed_actions("admin")
+        assert iam_client.resource_multi_actions_allowed.call_count == 2
+
+
+class TestIamToken:
+    @pytest.fixture(autouse=True)
+    def reset_token(self):
+        bk_iam._last_good_token = ""
+        bk_iam._token_backoff_until = 0
+        yield
+        bk_iam._last_good_token = ""
+        bk_iam._token_backoff_until = 0
+
+    def _permission(self, *results):
+        iam_client = mock.MagicMock()
+        iam_client.get_token.side_effect = list(results)
+        with mock.patch.object(bk_iam, "get_iam_client", return_value=iam_client):
+            return bk_iam.Permission(), iam_client
+
+    def test_get_token(self):
+        permission, iam_client = self._permission((True, "ok", "token-1"))
+        assert permission.get_token() == "token-1"
+        assert permission.get_token() == "token-1"
+        assert iam_client.get_token.call_count == 1
+
+    def test_backoff_without_stale_token(self):
+        permission, iam_client = self._permission((False, "timeout", ""), (False, "timeout", ""))
+        assert permission.get_token() == ""
+        assert permission.get_token() == ""
+        # 首次失败重试一次，退避期间不再请求
+        assert iam_client.get_token.call_count == 2
+
+    def test_backoff_with_stale_token(self):
+        permission, iam_client = self._permission((True, "ok", "token-1"), (False, "timeout", ""))
+        assert permission.get_token() == "token-1"
+
+        bk_iam.cache.set(bk_iam.IAM_TOKEN_CACHE_KEY, {"token": "token-1", "expires_at": time.time() - 1})
+        assert permission.get_token() == "token-1"
+        assert permission.get_token() == "token-1"
+        assert iam_client.get_token.call_count == 2
+
+    def test_retry_after_backoff(self):
+        permission, iam_client = self._permission(
+            (False, "timeout", ""), (False, "timeout", ""), (True, "ok", "token-2")
+        )
+        assert permission.get_token() == ""
+        bk_iam._token_backoff_until = time.time() - 1
+        assert permission.get_token() == "token-2"
+        assert iam_client.get_token.call_count == 3
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from common.log import logger
+
+
+class VersionedLocalCache(object):
+    """
+    进程内缓存的只读数据，通过共享缓存中的版本号失效
+
+    - 每隔 check_interval 秒读取一次共享版本号，版本变化时重新加载
+    - 共享缓存为进程内缓存（LocMem）或外部直接修改数据库（不触发信号）时，最多 max_age 秒后重新加载
+    - invalidate() 更新共享版本号，所有进程在下次检查时重新加载
+    """
+
+    def __init__(self, version_key, loader, check_interval=5, max_age=60):
+        self.version_key = version_key
+        self.loader = loader
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._loaded_at = 0
+        self._checked_at = 0
+
+    def get(self):
+        now = time.time()
+        if self._data is not None and now - self._loaded_at < self.max_age:
+            if now - self._checked_at < self.check_interval:
+                return self._data
+            self._checked_at = now
+            if self._get_version() == self._version:
+                return self._data
+
+        with self._lock:
+            # 等待锁期间其他线程可能已经加载
+            if self._data is not None and self._loaded_at > now:
+                return self._data
+            version = self._get_version()
+            data = self.loader()
+            self._data, self._version = data, version
+            self._loaded_at = self._checked_at = time.time()
+            return data
+
+    def get_version(self):
+        """
+        当前数据对应的共享版本号，可用于拼接依赖该数据的缓存 key
+        """
+        self.get()
+        return self._version
+
+    def invalidate(self):
+        self._data = None
+        try:
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+        except Exception:
+            logger.exception("update catalog version fail, key: %s", self.version_key)
+
+    def _get_version(self):
+        try:
+            return cache.get(self.version_key)
+        except Exception:
+            logger.exception("get catalog version fail, key: %s", self.version_key)
+            return None
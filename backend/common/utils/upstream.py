@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+
+def request_memo(request, key, func, *args, **kwargs):
+    """
+    请求级别的上游调用结果缓存，同一请求内相同 key 只调用一次（如中间件已获取的登录用户信息）
+    调用异常时不缓存
+    """
+    memo = request.__dict__.setdefault("_upstream_memo", {})
+    if key not in memo:
+        memo[key] = func(*args, **kwargs)
+    return memo[key]
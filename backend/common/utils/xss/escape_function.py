@@ -65,5 +65,5 @@ def texteditor_escape(str_escape):
         parser.close()
         return parser.get_html()
     except Exception as e:
-        logger.error("There are abnormalities in script injection detection, Error message: %s" % e)
+        logger.error("There are abnormalities in script injection detection, Error message: %s", e)
         return str_escape
@@ -22,14 +22,35 @@ from __future__ import unicode_literals
 
 import copy
 import json
+import random
+import threading
+import time
+from functools import lru_cache
 
 from django.conf import settings
 from django.utils.translation import get_language
+from prometheus_client import Counter
 
 from common.log import logger
-
-
-def _call_esb_api(http_func, url_path, data, timeout=30):
+from components.http import http_get
+
+ESB_API_RETRY_COUNT = Counter(
+    "console_esb_api_retries_total",
+    "Number of retried esb api calls",
+    ["path"],
+)
+ESB_API_COALESCED_COUNT = Counter(
+    "console_esb_api_coalesced_total",
+    "Number of esb api calls served by an identical in-flight call",
+    ["path"],
+)
+
+
+@lru_cache(maxsize=32)
+def _get_headers(language):
+    """
+    请求头只与语言相关，按语言缓存
+    """
     # ESB调用的鉴权信息
     common_params = {
         "bk_app_code": "bk_paas",
@@ -38,15 +59,90 @@ def _call_esb_api(http_func, url_path, data, timeout=30):
     }
 
     # 默认请求头
-    headers = {
+    return {
         "Content-Type": "application/json",
-        "blueking-language": get_language(),
+        "blueking-language": language,
         "X-Bkapi-Authorization": json.dumps(common_params),
     }
 
+
+class _InflightCall(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = (False, -1, "in-flight call failed", None)
+
+
+_inflight_calls = {}
+_inflight_lock = threading.Lock()
+
+
+def _call_with_single_flight(key, url_path, func):
+    """
+    相同的请求同时只发出一次，其他调用方等待并复用结果
+    """
+    with _inflight_lock:
+        call = _inflight_calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _inflight_calls[key] = _InflightCall()
+
+    if not is_leader:
+        ESB_API_COALESCED_COUNT.labels(path=url_path).inc()
+        call.event.wait()
+        # 返回副本，避免调用方修改共享的结果
+        return copy.deepcopy(call.result)
+
+    try:
+        call.result = func()
+    finally:
+        with _inflight_lock:
+            _inflight_calls.pop(key, None)
+        call.event.set()
+    return call.result
+
+
+def _call_esb_api(http_func, url_path, data, timeout=30, idempotent=None):
+    """
+    调用 ESB API
+    GET 请求相同参数并发调用时合并为一次请求；幂等请求(默认 GET)网络错误或 5xx 错误时按 ESB_API_MAX_RETRIES 重试
+    """
+    is_get = http_func is http_get
+    if idempotent is None:
+        idempotent = is_get
+
+    language = get_language()
+
+    def _call():
+        return _do_call_esb_api(http_func, url_path, data, timeout, language, idempotent)
+
+    if is_get:
+        key = (url_path, json.dumps(data, sort_keys=True), language)
+        return _call_with_single_flight(key, url_path, _call)
+    return _call()
+
+
+def _is_retryable_error(resp_data):
+    """
+    仅网络错误(连接失败、超时等，无状态码)与 5xx 错误可重试，4xx 为请求本身的问题，重试无意义
+    """
+    status_code = resp_data.get("status_code")
+    return status_code is None or status_code >= 500
+
+
+def _do_call_esb_api(http_func, url_path, data, timeout, language, idempotent):
+    headers = _get_headers(language)
+
     url = f"{settings.BK_COMPONENT_API_URL}{url_path}"
 
-    ok, resp_data = http_func(url, data, headers=headers)
+    max_retries = settings.ESB_API_MAX_RETRIES if idempotent else 0
+    for retry in range(max_retries + 1):
+        if retry:
+            ESB_API_RETRY_COUNT.labels(path=url_path).inc()
+            # 指数退避 + 随机抖动，避免重试请求集中
+            time.sleep(random.uniform(0, settings.ESB_API_RETRY_BACKOFF_SECONDS * 2**retry))
+        ok, resp_data = http_func(url, data, headers=headers, timeout=timeout)
+        if ok or not _is_retryable_error(resp_data):
+            break
 
     # 调用 API 的返回数据中有 request_id，出错时需要将 request_id 记录到日志中方便排查
     request_id = resp_data.get("request_id", "")
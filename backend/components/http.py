@@ -98,7 +98,8 @@ def _http_request(method, url, headers=None, data=None, timeout=None, verify=Fal
                 "error": (
                     f"status_code is {resp.status_code}, not 200! "
                     f"{method} {urlparse(url).path}, request_id={request_id}, resp.body={content}"
-                )
+                ),
+                "status_code": resp.status_code,
             }
 
         return True, resp.json()
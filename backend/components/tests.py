@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from components import esb, usermgr
+from components.http import http_get, http_post
+
+ESB_PATH = "/api/c/compapi/v2/usermanage/list_users/"
+
+
+def _mock_response(status_code=200, data=None):
+    resp = mock.Mock(status_code=status_code, content=b"error")
+    resp.json.return_value = {"result": True, "code": 0, "data": data}
+    return resp
+
+
+@pytest.fixture
+def no_sleep():
+    with mock.patch("components.esb.time.sleep") as sleep:
+        yield sleep
+
+
+class TestCallEsbApi:
+    @pytest.mark.parametrize(
+        "error",
+        [
+            requests.exceptions.ConnectionError("connection refused"),
+            requests.exceptions.Timeout("read timeout"),
+            _mock_response(status_code=502),
+        ],
+    )
+    def test_retry_retryable_error(self, settings, no_sleep, error):
+        settings.ESB_API_MAX_RETRIES = 2
+        with mock.patch("components.http.session.get", side_effect=[error, _mock_response(data=[1])]) as get:
+            result = esb._call_esb_api(http_get, ESB_PATH, {})
+        assert result == (True, 0, "ok", [1])
+        assert get.call_count == 2
+
+    def test_no_retry_client_error(self, settings, no_sleep):
+        settings.ESB_API_MAX_RETRIES = 2
+        with mock.patch("components.http.session.get", return_value=_mock_response(status_code=403)) as get:
+            ok, code, _, _ = esb._call_esb_api(http_get, ESB_PATH, {})
+        assert (ok, code) == (False, -1)
+        assert get.call_count == 1
+        no_sleep.assert_not_called()
+
+    def test_max_retries(self, settings, no_sleep):
+        settings.ESB_API_MAX_RETRIES = 2
+        with mock.patch("components.http.session.get", return_value=_mock_response(status_code=503)) as get:
+            ok, _, _, _ = esb._call_esb_api(http_get, ESB_PATH, {})
+        assert not ok
+        assert get.call_count == 3
+
+    def test_no_retry_non_idempotent(self, settings, no_sleep):
+        settings.ESB_API_MAX_RETRIES = 2
+        with mock.patch("components.http.session.post", return_value=_mock_response(status_code=503)) as post:
+            ok, _, _, _ = esb._call_esb_api(http_post, ESB_PATH, {})
+        assert not ok
+        assert post.call_count == 1
+
+    def test_coalesce_inflight_get(self):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.2)
+            return _mock_response(data={"users": []})
+
+        results = []
+        with mock.patch("components.http.session.get", side_effect=slow_get) as get:
+            threads = [
+                threading.Thread(target=lambda: results.append(esb._call_esb_api(http_get, ESB_PATH, {"page": 1})))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert get.call_count == 1
+        assert results == [(True, 0, "ok", {"users": []})] * 5
+        # 复用的结果互相独立，调用方修改不影响其他调用方
+        assert len({id(result[3]) for result in results}) == 5
+
+    def test_headers_cached_by_language(self):
+        assert esb._get_headers("zh-hans") is esb._get_headers("zh-hans")
+        assert esb._get_headers("en")["blueking-language"] == "en"
+
+
+class TestUsermgrProfileCache:
+    @pytest.mark.parametrize(
+        "shared, timeout",
+        [(True, usermgr.USER_PROFILE_CACHE_TIMEOUT), (False, usermgr.USER_PROFILE_LOCAL_CACHE_TIMEOUT)],
+    )
+    @mock.patch("components.usermgr.usermgr_api.batch_query_users", return_value=(True, "ok", [{"username": "admin"}]))
+    def test_profile_cache_timeout(self, batch_query_users, shared, timeout):
+        with mock.patch("components.usermgr.is_shared_cache", return_value=shared), mock.patch.object(
+            cache, "set"
+        ) as cache_set:
+            usermgr.get_user("admin")
+        cache_set.assert_called_once_with(usermgr._get_profile_cache_key("admin"), {"username": "admin"}, timeout)
@@ -20,11 +20,34 @@ to the current version of the project delivered to anyone in the future.
 usermgr methods
 """
 
+from django.core.cache import cache
+
+from common.constants import USERMGR_PROFILE_CACHE_KEY
+from common.log import logger
 from components import usermgr_api
+from user_center.utils import is_shared_cache
+
+# 用户信息缓存时间(秒)
+USER_PROFILE_CACHE_TIMEOUT = 300
+# 未配置共享缓存时，更新用户信息只能清理当前进程的缓存，仅短暂缓存(秒)
+USER_PROFILE_LOCAL_CACHE_TIMEOUT = 5
+# 批量查询用户时每次请求的用户数
+BATCH_QUERY_USERS_CHUNK_SIZE = 100
+
+
+def _get_profile_cache_key(username):
+    return USERMGR_PROFILE_CACHE_KEY % username
+
+
+def _get_profile_cache_timeout():
+    return USER_PROFILE_CACHE_TIMEOUT if is_shared_cache() else USER_PROFILE_LOCAL_CACHE_TIMEOUT
 
 
 def _update_user(username, **kwargs):
     ok, message, _ = usermgr_api.upsert_user(username, **kwargs)
+    if ok:
+        # 更新成功后清理缓存，下次读取时从用户管理获取最新数据
+        cache.delete(_get_profile_cache_key(username))
     return ok, message
 
 
@@ -59,19 +82,54 @@ def reset_user_i18n_timezone(username, timezone):
     return _update_user(username, **kwargs)
 
 
-def get_user(username):
+def get_user(username, use_cache=True):
     """
-    获取单个用户信息
+    获取单个用户信息，use_cache 为 False 时直接查询用户管理
     """
+    cache_key = _get_profile_cache_key(username)
+    _data = cache.get(cache_key) if use_cache else None
+    if _data is not None:
+        return True, "ok", _data
+
     ok, message, _data = usermgr_api.batch_query_users(username_list=[username])
     if ok:
         # 判断是否能拿到数据
         if not _data or len(_data) != 1:
             return False, "user do not exists", {}
         _data = _data[0]
+        cache.set(cache_key, _data, _get_profile_cache_timeout())
     return ok, message, _data
 
 
+def batch_get_users(username_list):
+    """
+    批量获取用户信息，未命中缓存的用户按批次查询用户管理
+    返回: {username: 用户信息}，不存在或查询失败的用户不在结果中
+    """
+    username_list = list({username for username in username_list if username})
+    if not username_list:
+        return {}
+
+    key_username_dict = {_get_profile_cache_key(username): username for username in username_list}
+    users = {key_username_dict[key]: data for key, data in cache.get_many(list(key_username_dict)).items()}
+
+    missing_username_list = [username for username in username_list if username not in users]
+    for i in range(0, len(missing_username_list), BATCH_QUERY_USERS_CHUNK_SIZE):
+        chunk = missing_username_list[i : i + BATCH_QUERY_USERS_CHUNK_SIZE]
+        ok, message, _data = usermgr_api.batch_query_users(username_list=chunk)
+        if not ok:
+            logger.error("batch query users fail, username_list: %s, message: %s", chunk, message)
+            continue
+
+        chunk_users = {data["username"]: data for data in _data or [] if data.get("username")}
+        cache.set_many(
+            {_get_profile_cache_key(username): data for username, data in chunk_users.items()},
+            _get_profile_cache_timeout(),
+        )
+        users.update(chunk_users)
+    return users
+
+
 def unbind_user_wx(username):
     kwargs = {
         "wx_userid": "",
@@ -87,8 +145,8 @@ def bind_user_wx(username, wx):
     return _update_user(username, **kwargs)
 
 
-def get_user_wx(username):
-    ok, _, _data = get_user(username)
+def get_user_wx(username, use_cache=True):
+    ok, _, _data = get_user(username, use_cache=use_cache)
     if not ok:
         return ""
 
@@ -36,7 +36,8 @@ def batch_query_users(username_list=[], is_complete=False):
         "is_complete": is_complete,
     }
 
-    ok, _, message, _data = _call_esb_api(http_post, path, data)
+    # 查询接口，可重试
+    ok, _, message, _data = _call_esb_api(http_post, path, data, idempotent=True)
     return ok, message, _data
 
 
@@ -116,6 +116,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "common.middlewares.ProfilingMiddleware",
+    "common.middlewares.DBQueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -288,6 +290,50 @@ IS_IAM_ENABLED = True
 REQUESTS_POOL_CONNECTIONS = 20
 REQUESTS_POOL_MAXSIZE = 20
 
+# ESB 幂等请求失败重试次数，及退避时间基数(秒)
+ESB_API_MAX_RETRIES = 2
+ESB_API_RETRY_BACKOFF_SECONDS = 0.1
+
+# 视图数据库查询预算，超出预算的请求会记录告警日志并计入 metrics
+DB_QUERY_BUDGET_ENABLED = True
+# 预算包含登录态校验、session 等中间件的查询（约 8 次），由 desktop/analysis 的单元测试校验
+# 未单独配置预算的视图使用默认值, 0 表示不检查
+DB_QUERY_BUDGET_DEFAULT = 50
+DB_QUERY_BUDGETS = {
+    # 桌面
+    "desktop.views.get_my_app": 30,
+    "desktop.views.get_my_app_by_id": 10,
+    "desktop.views.get_my_app_by_code": 10,
+    "desktop.views.search_apps": 10,
+    # 应用市场
+    "desktop.market_views.market": 10,
+    "desktop.market_views.market_get_list": 30,
+    "desktop.market_views.market_app_detail": 20,
+    "desktop.market_views.market_get_nearest_open_app": 15,
+    "desktop.market_views.update_app_star": 15,
+    # 统计上报
+    "analysis.views.app_record_by_user": 15,
+    "analysis.views.app_liveness_save": 20,
+    "analysis.views.app_online_time_save": 20,
+}
+
+# 就绪检查(healthz/readiness)单项检查超时时间(秒)及结果缓存时间(秒)
+HEALTHZ_CHECK_TIMEOUT = 3
+HEALTHZ_READINESS_CACHE_SECONDS = 10
+
+# 请求采样性能分析，默认关闭
+PROFILING_ENABLED = False
+# 采样比例，0~1
+PROFILING_SAMPLE_RATE = 0.0
+# 请求头 X-Bk-Console-Profile 与该值一致时强制采样，为空则不允许通过请求头触发
+PROFILING_HEADER_TOKEN = ""
+# 只保存耗时不低于该值(ms)的采样结果
+PROFILING_MIN_DURATION_MS = 0
+# 采样文件目录，为空则使用 LOGGING_DIR/profiles
+PROFILING_DIR = ""
+# 采样文件最大保留数量
+PROFILING_MAX_FILES = 200
+
 # 默认数据库AUTO字段类型
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
@@ -336,6 +382,9 @@ if not os.path.exists(LOGGING_DIR):
 LOG_MAX_BYTES = 1024 * 1024 * 10
 LOG_BACKUP_COUNT = 10
 LOG_CLASS = "logging.handlers.RotatingFileHandler"
+# 异步写日志：日志记录放入有界队列，由独立线程写文件，避免磁盘IO、日志轮转阻塞 gevent worker，队列满时丢弃
+LOG_QUEUE_ENABLED = os.environ.get("BK_CONSOLE_LOG_QUEUE_ENABLED", "false").lower() == "true"
+LOG_QUEUE_SIZE = 10000
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -403,3 +452,9 @@ LOGGING = {
         },
     },
 }
+if LOG_QUEUE_ENABLED:
+    for _handler_name in ["root", "wb_mysql", "iam"]:
+        _handler = LOGGING["handlers"][_handler_name]
+        _handler["target_class"] = _handler["class"]
+        _handler["class"] = "common.log.QueueLogHandler"
+        _handler["queue_size"] = LOG_QUEUE_SIZE
@@ -125,6 +125,15 @@ BK_NOTICE = {
 # 产品 title/footer/name/logo 等资源自定义配置的路径
 BK_SHARED_RES_URL = env.str("BK_SHARED_RES_URL", "")
 
+# 是否开启视图数据库查询预算统计
+DB_QUERY_BUDGET_ENABLED = env.bool("BK_CONSOLE_DB_QUERY_BUDGET_ENABLED", True)
+
+# 请求采样性能分析
+PROFILING_ENABLED = env.bool("BK_CONSOLE_PROFILING_ENABLED", False)
+PROFILING_SAMPLE_RATE = env.float("BK_CONSOLE_PROFILING_SAMPLE_RATE", 0.0)
+PROFILING_HEADER_TOKEN = env.str("BK_CONSOLE_PROFILING_HEADER_TOKEN", "")
+PROFILING_MIN_DURATION_MS = env.int("BK_CONSOLE_PROFILING_MIN_DURATION_MS", 0)
+
 # 是否开启多租户
 ENABLE_MULTI_TENANT_MODE = env.str("ENABLE_MULTI_TENANT_MODE", False)
 
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+
+单元测试配置，数据库使用 sqlite，必填的环境变量未设置时使用占位值
+"""
+import os
+
+for _key, _value in {
+    "BK_PAAS_DATABASE_USER": "",
+    "BK_PAAS_DATABASE_PASSWORD": "",
+    "BK_PAAS_DATABASE_PORT": "0",
+    "BK_PAAS_SECRET_KEY": "bk-console-unittest",
+    "BK_PAAS_PUBLIC_ADDR": "paas.example.com",
+    "BK_DOMAIN": "example.com",
+    "PAAS_LOGGING_DIR": "/tmp/bk-console-unittest-logs",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from settings import *  # noqa
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
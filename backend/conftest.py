@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    用例之间不共享缓存及进程内快照
+    """
+    from django.core.cache import cache
+
+    from desktop.app_catalog import app_catalog
+    from desktop.market_utils import market_nav_catalog
+
+    cache.clear()
+    app_catalog.invalidate()
+    market_nav_catalog.invalidate()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def synthetic_data(db):
+    """
+    用 gen_synthetic_data 生成的固定数据集：3 个用户、60 个已上线应用，每个用户桌面 20 个应用
+    """
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    from account.models import BkUser
+    from app.models import App
+
+    call_command(
+        "gen_synthetic_data", users=3, apps=60, user_apps=20, use_records=300, prefix="ut", seed=1, stdout=StringIO()
+    )
+    return {
+        "users": list(BkUser.objects.filter(username__startswith="ut_user_").order_by("id")),
+        "apps": list(App.objects.filter(code__startswith="ut-app-").order_by("id")),
+    }
+
+
+@pytest.fixture
+def login_client(client, synthetic_data):
+    """
+    以数据集中第一个用户登录的 test client，登录态校验不请求登录服务
+    """
+    from unittest import mock
+
+    from django.conf import settings
+
+    user = synthetic_data["users"][0]
+    userinfo = {
+        "bk_username": user.username,
+        "display_name": user.username,
+        "tenant_id": user.tenant_id,
+        "language": "zh-cn",
+        "time_zone": "Asia/Shanghai",
+    }
+    client.cookies[settings.BK_COOKIE_NAME] = "ut-bk-token"
+    with mock.patch("account.accounts.get_bk_login_userinfo", return_value=userinfo):
+        yield client
+
+
+@pytest.fixture
+def assert_query_budget():
+    """
+    请求视图并校验数据库查询次数不超过 settings.DB_QUERY_BUDGETS 中该视图的预算（与 DBQueryBudgetMiddleware 统计口径一致）
+    返回查询次数
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def _assert(view_name, request_func, path, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = request_func(path, data or {})
+        assert response.status_code == 200
+        assert response.wsgi_request._db_budget_view_name == view_name
+        budget = settings.DB_QUERY_BUDGETS.get(view_name, settings.DB_QUERY_BUDGET_DEFAULT)
+        assert len(queries) <= budget, "%s: %d queries, budget %d\n%s" % (
+            view_name,
+            len(queries),
+            budget,
+            "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        return len(queries)
+
+    return _assert
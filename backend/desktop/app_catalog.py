@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from app.models import App
+from common.constants import APP_CATALOG_VERSION_CACHE_KEY, AppTenantMode
+from common.utils.catalog import VersionedLocalCache
+
+
+def is_app_visible_to_tenant(app_tenant_mode, app_tenant_id, tenant_id):
+    """
+    应用是否对租户可用：全租户应用 + 本租户的应用，未开启多租户时都可用
+    """
+    if not settings.ENABLE_MULTI_TENANT_MODE:
+        return True
+    return app_tenant_mode == AppTenantMode.GLOBAL or (
+        app_tenant_mode == AppTenantMode.SINGLE and app_tenant_id == tenant_id
+    )
+
+
+class AppCatalog(object):
+    """
+    已上线应用（过滤已下架应用（state=0）、开发中应用（state=1））快照，只读
+    """
+
+    def __init__(self, apps, developer_search_text):
+        # 按 id 排序，与数据库默认顺序一致
+        self.apps = apps
+        # 设置了可见范围的应用的可见范围，小写
+        self.visiable_labels_texts = {app.visiable_labels.lower() for app in apps if app.visiable_labels}
+        # {app_id: 开发者用户名及中文名，小写}
+        self.developer_search_text = developer_search_text
+        # {tenant_id: [app]}，按需计算
+        self._tenant_apps = {}
+
+    def get_tenant_apps(self, tenant_id):
+        """
+        租户可用的应用
+        """
+        apps = self._tenant_apps.get(tenant_id)
+        if apps is None:
+            apps = [
+                app for app in self.apps if is_app_visible_to_tenant(app.app_tenant_mode, app.app_tenant_id, tenant_id)
+            ]
+            self._tenant_apps[tenant_id] = apps
+        return apps
+
+
+def _load_app_catalog():
+    apps = list(App.objects.filter(state__gt=1, is_already_online=True).select_related("tags").order_by("id"))
+    developers = (
+        get_user_model()
+        .objects.filter(developers__in=[app.id for app in apps])
+        .values_list("developers__id", "username", "chname")
+    )
+    developer_search_text = {}
+    for app_id, username, chname in developers:
+        developer_search_text.setdefault(app_id, []).extend([username or "", chname or ""])
+    developer_search_text = {app_id: "\n".join(names).lower() for app_id, names in developer_search_text.items()}
+    return AppCatalog(apps, developer_search_text)
+
+
+# 已上线应用快照，应用变更或上线时失效
+app_catalog = VersionedLocalCache(APP_CATALOG_VERSION_CACHE_KEY, _load_app_catalog)
+
+
+def get_online_apps(tenant_id):
+    """
+    租户可用的已上线应用，返回的应用对象只读
+    """
+    return app_catalog.get().get_tenant_apps(tenant_id)
+
+
+def icontains(value, keyword):
+    """
+    与数据库 icontains 查询一致，keyword 需为小写
+    """
+    return bool(value) and keyword in value.lower()
+
+
+def get_effective_visiable_labels(visiable_labels):
+    """
+    用户可见范围标签中被应用可见范围引用的部分，小写并排序
+    未被引用的标签（如大部分用户的 u:user_id）不影响筛选结果，去掉后同部门用户的结果相同
+    """
+    texts = app_catalog.get().visiable_labels_texts
+    labels = {label.lower() for label in visiable_labels}
+    return sorted(label for label in labels if any(label in text for text in texts))
+
+
+def search_online_apps(tenant_id, keyword, with_developer=False):
+    """
+    按应用编码、名称、创建者（或开发者）搜索已上线应用
+    """
+    keyword = keyword.lower()
+    catalog = app_catalog.get()
+    result = []
+    for app in catalog.get_tenant_apps(tenant_id):
+        if icontains(app.code, keyword) or icontains(app.name, keyword):
+            result.append(app)
+        elif with_developer and keyword in catalog.developer_search_text.get(app.id, ""):
+            result.append(app)
+        elif not with_developer and icontains(app.creater, keyword):
+            result.append(app)
+    return result
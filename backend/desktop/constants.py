@@ -27,6 +27,12 @@ from common.constants import enum
 # 文件夹图标默认图片
 DEFALUT_FOLDER_ICO = settings.STATIC_URL + "img/base_ui/folder_default.png"
 
+# 应用市场应用详情缓存时间(秒)，也是 PaaS 直接修改应用、发布记录时详情的最长过期时间，本月访问量允许在此时间内不精确
+MARKET_APP_DETAIL_CACHE_SECONDS = 60
+
+# 应用市场应用列表缓存时间(秒)，应用或分类变更时通过版本号失效，使用人数、访问量允许在此时间内不精确
+MARKET_LIST_CACHE_SECONDS = 60
+
 # 应用市场左侧导航类别
 MarketNavEnum = enum(
     CREATOR=0,
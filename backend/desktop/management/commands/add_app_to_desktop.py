@@ -3,11 +3,10 @@ import logging
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 from django.db import models, transaction  # noqa
-from django.db.models import F
 
 from account.models import BkUser
 from app.models import App
-from desktop.models import UserApp, UserSettings, Wallpaper
+from desktop.models import AppUseCountDelta, UserApp, UserSettings, Wallpaper
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +20,13 @@ class Command(BaseCommand):
         try:
             user = BkUser.objects.get(username=username)
         except ObjectDoesNotExist:
-            logger.error("user(%s) not exists" % username)
+            logger.error("user(%s) not exists", username)
             return
 
         try:
             app = App.objects.get(code=app_code)
         except ObjectDoesNotExist:
-            logger.error("App(%s) not exists" % app_code)
+            logger.error("App(%s) not exists", app_code)
             return
 
         with transaction.atomic():
@@ -35,8 +34,9 @@ class Command(BaseCommand):
                 user=user, app=app, defaults={'desk_app_type': 0, 'app_position': 'desk1'}
             )
 
-            # app use_count 加1， 不能使用 save 方法，save 方法会自动重新 logo
-            App.objects.filter(code=app_code).update(use_count=F("use_count") + 1)
+            # app use_count 加1，记录增量，由定时任务合并
+            if _user_app_create:
+                AppUseCountDelta.objects.add_delta(app.id, 1)
 
             # 将应用添加到用户的桌面设置中
             user_setting, _c = UserSettings.objects.get_or_create(
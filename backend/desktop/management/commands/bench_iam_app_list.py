@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from iam import DjangoQuerySetConverter
+
+from app.models import App
+from common.bk_iam import AppFilterConverter, filter_app_codes
+
+KEY_MAPPING = {"app.id": "code"}
+
+
+class Command(BaseCommand):
+    """
+    对比 Permission.app_list 优化前后的耗时（不请求权限中心，直接使用构造的策略）
+
+    可先使用 gen_synthetic_data --apps 5000 生成足够多的应用
+    示例: python manage.py bench_iam_app_list --policy-size 1000 --rounds 20
+    """
+
+    help = "Benchmark converting IAM develop_app policies into app code lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--policy-size", type=int, dest="policy_size", default=1000, help="app codes in policy")
+        parser.add_argument("--rounds", type=int, dest="rounds", default=20)
+
+    def handle(self, policy_size, rounds, *args, **options):
+        codes = list(App.objects.values_list("code", flat=True)[:policy_size])
+        if not codes:
+            raise CommandError("no app found, please run gen_synthetic_data first")
+
+        policies = {
+            "any": {"op": "any", "field": "app.id", "value": []},
+            "in": {"op": "in", "field": "app.id", "value": codes},
+            "or(eq)": {"op": "OR", "content": [{"op": "eq", "field": "app.id", "value": c} for c in codes[:200]]},
+        }
+
+        self.stdout.write("apps: %d, policy size: %d, rounds: %d" % (App.objects.count(), len(codes), rounds))
+        self.stdout.write("%-10s %14s %14s" % ("policy", "before(ms)", "after(ms)"))
+        for name, policy in policies.items():
+            before = self._bench(rounds, lambda: self._app_list_before(policy))
+            after = self._bench(rounds, lambda: self._app_list_after(policy))
+            self.stdout.write("%-10s %14.2f %14.2f" % (name, before, after))
+
+    def _bench(self, rounds, func):
+        st = time.time()
+        for _ in range(rounds):
+            func()
+        return (time.time() - st) * 1000 / rounds
+
+    def _app_list_before(self, policy):
+        filters = DjangoQuerySetConverter(KEY_MAPPING).convert(policy)
+        apps = App.objects.filter(filters).all()
+        return [app.code for app in apps]
+
+    def _app_list_after(self, policy):
+        filters = AppFilterConverter(KEY_MAPPING).convert(policy)
+        return filter_app_codes(filters)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.core.management.base import BaseCommand
+
+from desktop.models import AppUseCountDelta
+
+
+class Command(BaseCommand):
+    """
+    将应用使用人数增量合并到 App.use_count，需配置为定时任务
+    指定 --reconcile 时根据用户桌面应用重新计算所有应用的使用人数
+
+    示例: python manage.py fold_app_use_count --batch-size 1000
+    """
+
+    help = "Fold pending app use count deltas into App.use_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, dest="batch_size", default=1000)
+        parser.add_argument("--reconcile", action="store_true", dest="reconcile", default=False)
+
+    def handle(self, batch_size, reconcile, *args, **options):
+        if reconcile:
+            updated = AppUseCountDelta.objects.reconcile()
+            self.stdout.write("reconciled %d apps" % updated)
+            return
+        folded = AppUseCountDelta.objects.fold(batch_size=batch_size)
+        self.stdout.write("folded %d deltas" % folded)
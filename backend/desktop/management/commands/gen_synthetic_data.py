@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from account.models import BkUser
+from analysis.models import AppUseRecord
+from app.constants import AppStateEnum
+from app.models import App, AppTags
+from desktop.constants import BK_CREATOR_TAG_STR_LIST
+from desktop.models import UserApp, UserSettings, Wallpaper
+
+
+class Command(BaseCommand):
+    """
+    生成用于本地压测的合成数据：N 个用户、M 个已上线应用、用户桌面应用以及应用访问记录
+
+    示例: python manage.py gen_synthetic_data --users 1000 --apps 500 --user-apps 20 --use-records 100000
+    """
+
+    help = "Generate synthetic users, apps, UserApp and AppUseRecord rows for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, dest="users", default=100, help="number of users")
+        parser.add_argument("--apps", type=int, dest="apps", default=100, help="number of online apps")
+        parser.add_argument("--user-apps", type=int, dest="user_apps", default=10, help="desktop apps per user")
+        parser.add_argument("--use-records", type=int, dest="use_records", default=10000, help="AppUseRecord rows")
+        parser.add_argument("--prefix", type=str, dest="prefix", default="syn", help="username/app code prefix")
+        parser.add_argument("--batch-size", type=int, dest="batch_size", default=1000)
+        parser.add_argument("--seed", type=int, dest="seed", default=None)
+
+    def handle(self, users, apps, user_apps, use_records, prefix, batch_size, seed, *args, **options):
+        rnd = random.Random(seed)
+
+        user_list = self._create_users(prefix, users, batch_size)
+        app_list = self._create_apps(prefix, apps, batch_size, rnd)
+        self.stdout.write("users: %d, apps: %d" % (len(user_list), len(app_list)))
+        if not (user_list and app_list):
+            return
+
+        user_app_count = self._create_user_apps(user_list, app_list, user_apps, batch_size, rnd)
+        self.stdout.write("user apps: %d" % user_app_count)
+
+        records = [
+            AppUseRecord(
+                user=rnd.choice(user_list), app=rnd.choice(app_list), access_host="127.0.0.1", source_ip="127.0.0.1"
+            )
+            for _ in range(use_records)
+        ]
+        AppUseRecord.objects.bulk_create(records, batch_size=batch_size)
+        self.stdout.write("use records: %d" % len(records))
+
+    def _create_users(self, prefix, count, batch_size):
+        usernames = ["%s_user_%d" % (prefix, i) for i in range(count)]
+        exist_usernames = set(BkUser.objects.filter(username__in=usernames).values_list("username", flat=True))
+        now = timezone.now()
+        new_users = [
+            BkUser(username=username, chname=username, last_login=now, date_joined=now)
+            for username in usernames
+            if username not in exist_usernames
+        ]
+        BkUser.objects.bulk_create(new_users, batch_size=batch_size)
+        return list(BkUser.objects.filter(username__in=usernames))
+
+    def _create_apps(self, prefix, count, batch_size, rnd):
+        codes = ["%s-app-%d" % (prefix, i) for i in range(count)]
+        exist_codes = set(App.objects.filter(code__in=codes).values_list("code", flat=True))
+        tags = list(AppTags.objects.all()) or [None]
+        creaters = list(BK_CREATOR_TAG_STR_LIST) + ["%s_user_0" % prefix]
+        now = timezone.now()
+        new_apps = [
+            App(
+                code=code,
+                name=code[:20],
+                name_en=code,
+                introduction="synthetic app %s" % code,
+                creater=rnd.choice(creaters),
+                state=AppStateEnum.ONLINE,
+                is_already_test=True,
+                is_already_online=True,
+                first_online_time=now - timezone.timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+                tags=rnd.choice(tags),
+                is_saas=rnd.random() < 0.3,
+            )
+            for code in codes
+            if code not in exist_codes
+        ]
+        App.objects.bulk_create(new_apps, batch_size=batch_size)
+        return list(App.objects.filter(code__in=codes))
+
+    def _create_user_apps(self, user_list, app_list, per_user, batch_size, rnd):
+        wallpaper_id = Wallpaper.objects.get_default_wallpaper()
+        per_user = min(per_user, len(app_list))
+        total = 0
+        for user in user_list:
+            exist_app_ids = set(UserApp.objects.filter(user=user).values_list("app_id", flat=True))
+            chosen = [app for app in rnd.sample(app_list, per_user) if app.id not in exist_app_ids]
+            with transaction.atomic():
+                UserApp.objects.bulk_create(
+                    [UserApp(user=user, app=app, desk_app_type=0, app_position="desk1") for app in chosen],
+                    batch_size=batch_size,
+                )
+                App.objects.filter(id__in=[app.id for app in chosen]).update(use_count=F("use_count") + 1)
+                # 将用户所有应用放到桌面1
+                user_app_ids = UserApp.objects.filter(user=user).values_list("id", flat=True)
+                user_setting, _c = UserSettings.objects.get_or_create(
+                    user=user, defaults={"wallpaper_id": wallpaper_id, "wallpaper_type": "lashen"}
+                )
+                user_setting.desk1 = ",".join(str(i) for i in user_app_ids)
+                user_setting.save()
+            total += len(chosen)
+        return total
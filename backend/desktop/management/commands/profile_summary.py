@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import io
+import os
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.middlewares import get_profile_dir
+
+
+class Command(BaseCommand):
+    """
+    汇总 ProfilingMiddleware 采样结果，输出最耗时的函数
+
+    示例: python manage.py profile_summary --view desktop.views.get_my_app --top 30
+    """
+
+    help = "Summarize the hottest functions from sampled request profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", type=str, dest="profile_dir", default="", help="profile directory")
+        parser.add_argument("--view", type=str, dest="view", default="", help="only include profiles of this view")
+        parser.add_argument("--latest", type=int, dest="latest", default=0, help="only include the latest N profiles")
+        parser.add_argument("--top", type=int, dest="top", default=20, help="number of functions to print")
+        parser.add_argument(
+            "--sort",
+            type=str,
+            dest="sort",
+            default="cumulative",
+            choices=["cumulative", "tottime", "ncalls"],
+        )
+
+    def handle(self, profile_dir, view, latest, top, sort, *args, **options):
+        profile_dir = profile_dir or get_profile_dir()
+        if not os.path.isdir(profile_dir):
+            raise CommandError("profile directory not exists: %s" % profile_dir)
+
+        entries = [i for i in os.scandir(profile_dir) if i.is_file() and i.name.endswith(".prof")]
+        if view:
+            entries = [i for i in entries if self._parse_view_name(i.name) == view]
+        entries.sort(key=lambda i: i.stat().st_mtime, reverse=True)
+        if latest:
+            entries = entries[:latest]
+        if not entries:
+            self.stdout.write("no profile found")
+            return
+
+        self._print_views(entries)
+
+        # pstats 逐段输出，不能直接写入 self.stdout（每次 write 都会追加换行）
+        output = io.StringIO()
+        stats = pstats.Stats(*[i.path for i in entries], stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(output.getvalue())
+
+    def _parse_view_name(self, filename):
+        # 文件名格式: {时间}_{视图名}_{耗时}ms_{进程号}.prof
+        return filename.split("_", 1)[-1].rsplit("_", 2)[0]
+
+    def _print_views(self, entries):
+        view_durations = {}
+        for entry in entries:
+            view_name = self._parse_view_name(entry.name)
+            duration = int(entry.name.rsplit("_", 2)[-2].rstrip("ms") or 0)
+            view_durations.setdefault(view_name, []).append(duration)
+
+        self.stdout.write("%-60s %8s %10s %10s" % ("view", "profiles", "avg(ms)", "max(ms)"))
+        for view_name, durations in sorted(view_durations.items(), key=lambda i: -sum(i[1])):
+            self.stdout.write(
+                "%-60s %8d %10d %10d" % (view_name, len(durations), sum(durations) / len(durations), max(durations))
+            )
+        self.stdout.write("")
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SCENARIOS = ["desktop", "market", "drag", "analytics"]
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(percent / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Stats(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, latency, ok):
+        with self._lock:
+            self.latencies[name].append(latency)
+            if not ok:
+                self.errors[name] += 1
+
+
+class _VirtualUser(object):
+    """
+    模拟一个已登录的桌面用户，bk_token 直接使用用户名（需配合 run_upstream_stubs 使用）
+    """
+
+    def __init__(self, base_url, username, stats, rnd):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.rnd = rnd
+        self.session = requests.Session()
+        self.session.cookies.set(settings.BK_COOKIE_NAME, username)
+        self.my_app_ids = []
+        self.market_app_ids = []
+        self.market_app_codes = []
+
+    def _request(self, name, method, path, data=None):
+        headers = {"X-Requested-With": "XMLHttpRequest", "Referer": self.base_url + settings.SITE_URL}
+        csrf_token = self.session.cookies.get(settings.CSRF_COOKIE_NAME)
+        if csrf_token:
+            headers["X-CSRFToken"] = csrf_token
+
+        st = time.time()
+        try:
+            resp = self.session.request(method, self.base_url + path, data=data, headers=headers, timeout=30)
+            ok = resp.status_code == 200
+        except requests.exceptions.RequestException:
+            resp, ok = None, False
+        self.stats.record(name, time.time() - st, ok)
+        return resp if ok else None
+
+    def _json(self, resp):
+        try:
+            return resp.json() if resp is not None else {}
+        except ValueError:
+            return {}
+
+    def desktop(self):
+        resp = self._request("desktop.get_my_app", "GET", settings.SITE_URL + "get_my_app/")
+        data = self._json(resp)
+        self.my_app_ids = [i["appid"] for i in data.get("desk1", [])]
+        self._request("desktop.get_wallpaper", "GET", settings.SITE_URL + "get_wallpaper/")
+
+    def market(self):
+        params = "from=0&to=7&topbar_select=%s" % self.rnd.choice([1, 2])
+        resp = self._request("market.get_list", "GET", settings.SITE_URL + "market_get_list/?" + params)
+        data = self._json(resp)
+        app_info_list = data.get("app_info_list", [])
+        self.market_app_ids = [i["relapp_id"] for i in app_info_list]
+        self.market_app_codes = [i["code"] for i in app_info_list]
+        if self.market_app_ids:
+            app_id = self.rnd.choice(self.market_app_ids)
+            self._request("market.app_detail", "GET", settings.SITE_URL + "market_app_detail/%s/" % app_id)
+        self._request("market.nearest_open_app", "GET", settings.SITE_URL + "market_get_nearest_open_app/")
+
+    def drag(self):
+        if len(self.my_app_ids) < 2:
+            return
+        my_app_id = self.rnd.choice(self.my_app_ids)
+        data = {
+            "movetype": "desk-desk",
+            "desk": 1,
+            "from": self.my_app_ids.index(my_app_id),
+            "to": self.rnd.randint(0, len(self.my_app_ids) - 1),
+        }
+        self._request("drag.update_my_app", "POST", settings.SITE_URL + "update_my_app/%s/" % my_app_id, data)
+
+    def analytics(self):
+        if not self.market_app_codes:
+            return
+        app_code = self.rnd.choice(self.market_app_codes)
+        self._request("analytics.app_record", "POST", settings.SITE_URL + "analysis/app_record_by_user/%s/" % app_code)
+        app_msg = json.dumps({app_code: self.rnd.randint(1, 10)})
+        self._request(
+            "analytics.liveness_save", "POST", settings.SITE_URL + "analysis/app_liveness_save/", {"app_msg": app_msg}
+        )
+
+    def run_iteration(self, scenarios):
+        for scenario in scenarios:
+            getattr(self, scenario)()
+
+
+class Command(BaseCommand):
+    """
+    桌面压测脚本：模拟用户加载桌面、浏览应用市场、拖动图标、上报统计数据，输出吞吐量和 p50/p95/p99 延迟
+
+    示例: python manage.py run_load_test --base-url http://127.0.0.1:8000 --concurrency 50 --duration 60
+    """
+
+    help = "Run a scripted load test against desktop, market, icon drag and analytics endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", type=str, dest="base_url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, dest="concurrency", default=10)
+        parser.add_argument("--duration", type=int, dest="duration", default=30, help="seconds")
+        parser.add_argument("--users", type=int, dest="users", default=100, help="number of synthetic users")
+        parser.add_argument("--prefix", type=str, dest="prefix", default="syn", help="synthetic username prefix")
+        parser.add_argument(
+            "--scenario", type=str, dest="scenario", default=",".join(SCENARIOS), help="comma separated scenarios"
+        )
+
+    def handle(self, base_url, concurrency, duration, users, prefix, scenario, *args, **options):
+        scenarios = [i.strip() for i in scenario.split(",") if i.strip()]
+        invalid = set(scenarios) - set(SCENARIOS)
+        if invalid:
+            raise CommandError("unknown scenario: %s" % ",".join(invalid))
+
+        stats = _Stats()
+        deadline = time.time() + duration
+
+        def worker(index):
+            rnd = random.Random(index)
+            username = "%s_user_%d" % (prefix, rnd.randint(0, users - 1))
+            vuser = _VirtualUser(base_url, username, stats, rnd)
+            # 首次访问首页，获取 csrf token
+            vuser._request("desktop.index", "GET", settings.SITE_URL)
+            while time.time() < deadline:
+                vuser.run_iteration(scenarios)
+
+        st = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+        elapsed = time.time() - st
+
+        self._report(stats, elapsed)
+
+    def _report(self, stats, elapsed):
+        row = "%-32s %8s %8s %10s %8s %8s %8s"
+        self.stdout.write(row % ("endpoint", "requests", "errors", "rps", "p50(ms)", "p95(ms)", "p99(ms)"))
+        all_latencies = []
+        for name in sorted(stats.latencies):
+            latencies = sorted(stats.latencies[name])
+            all_latencies.extend(latencies)
+            self.stdout.write(self._format_row(row, name, latencies, stats.errors[name], elapsed))
+        all_latencies.sort()
+        self.stdout.write(self._format_row(row, "TOTAL", all_latencies, sum(stats.errors.values()), elapsed))
+
+    def _format_row(self, row, name, latencies, errors, elapsed):
+        return row % (
+            name,
+            len(latencies),
+            errors,
+            "%.1f" % (len(latencies) / elapsed if elapsed else 0),
+            int(_percentile(latencies, 50) * 1000),
+            int(_percentile(latencies, 95) * 1000),
+            int(_percentile(latencies, 99) * 1000),
+        )
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+import random
+import ssl
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from common.constants import DATETIME_FORMAT_STRING
+
+
+def _esb_ok(data):
+    return {"result": True, "code": 0, "message": "ok", "request_id": "synthetic", "data": data}
+
+
+def _login_userinfo(params, body):
+    # bk_token 即为用户名，方便压测脚本直接构造登录态
+    username = params.get("bk_token", ["admin"])[0]
+    return {
+        "data": {
+            "bk_username": username,
+            "display_name": username,
+            "tenant_id": "default",
+            "language": "zh-cn",
+            "time_zone": "Asia/Shanghai",
+        }
+    }
+
+
+def _usermgr_list_users(params, body):
+    username = params.get("exact_lookups", ["admin"])[0]
+    return _esb_ok([{"username": username, "id": abs(hash(username)) % 100000}])
+
+
+def _usermgr_list_profile_departments(params, body):
+    return _esb_ok([{"id": 1, "name": "synthetic", "family": []}])
+
+
+def _usermgr_batch_query_users(params, body):
+    return _esb_ok([{"username": username, "wx_userid": ""} for username in body.get("username_list", [])])
+
+
+def _usermgr_upsert_user(params, body):
+    return _esb_ok({})
+
+
+def _esb_get_weixin_config(params, body):
+    return _esb_ok({})
+
+
+def _iam_policy_query(params, body):
+    return {"code": 0, "message": "ok", "data": {"op": "any", "field": "app.id", "value": []}}
+
+
+def _iam_policy_query_by_actions(params, body):
+    actions = body.get("actions", [])
+    data = [
+        {"action": {"id": action.get("id")}, "condition": {"op": "any", "field": "", "value": []}}
+        for action in actions
+    ]
+    return {"code": 0, "message": "ok", "data": data}
+
+
+def _iam_get_token(params, body):
+    return {"code": 0, "message": "ok", "data": {"token": "synthetic-token"}}
+
+
+def _license_certificate(params, body):
+    now = timezone.now()
+    return {
+        "result": False,
+        "validstarttime": now.strftime(DATETIME_FORMAT_STRING),
+        "validendtime": (now + timezone.timedelta(days=365 * 10)).strftime(DATETIME_FORMAT_STRING),
+    }
+
+
+def _healthz(params, body):
+    return {"result": True}
+
+
+# (路径后缀, 处理函数)，按后缀匹配以兼容不同的网关前缀
+ROUTES = [
+    ("/login/api/v3/open/bk-tokens/userinfo/", _login_userinfo),
+    ("/login/api/v3/open/bk-tokens/verify/", _login_userinfo),
+    ("/usermanage/list_users/", _usermgr_list_users),
+    ("/usermanage/list_profile_departments/", _usermgr_list_profile_departments),
+    ("/usermanage/login/profile/query/", _usermgr_batch_query_users),
+    ("/usermanage/login/profile/", _usermgr_upsert_user),
+    ("/esb/get_weixin_config/", _esb_get_weixin_config),
+    ("/policy/query/", _iam_policy_query),
+    ("/policy/query_by_actions/", _iam_policy_query_by_actions),
+    ("/token", _iam_get_token),
+    ("/certificate", _license_certificate),
+    ("/healthz/", _healthz),
+]
+
+
+class UpstreamStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        body = {}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = {}
+
+        for suffix, handler in ROUTES:
+            if url.path.rstrip("/").endswith(suffix.rstrip("/")):
+                break
+        else:
+            self.send_error(404)
+            return
+
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        content = json.dumps(handler(params, body)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    """
+    启动模拟上游依赖的 HTTP 服务(登录网关、用户管理、权限中心、证书服务)，用于本地压测
+
+    启动后将以下配置指向该服务即可脱离真实依赖运行:
+        BK_API_URL_TMPL=http://127.0.0.1:8100/api/{api_name}
+        BK_COMPONENT_API_URL=http://127.0.0.1:8100
+        BK_IAM_API_URL=http://127.0.0.1:8100
+        BK_LOGIN_API_URL=http://127.0.0.1:8100
+    证书服务固定使用 https 访问，需要通过 --certfile/--keyfile 启用 TLS
+    """
+
+    help = "Run stand-in HTTP servers emulating login gateway, usermgr, IAM and license server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", type=str, dest="host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, dest="port", default=8100)
+        parser.add_argument("--latency", type=float, dest="latency", default=0, help="fixed latency in ms")
+        parser.add_argument("--jitter", type=float, dest="jitter", default=0, help="random extra latency in ms")
+        parser.add_argument("--certfile", type=str, dest="certfile", default="")
+        parser.add_argument("--keyfile", type=str, dest="keyfile", default="")
+
+    def handle(self, host, port, latency, jitter, certfile, keyfile, *args, **options):
+        UpstreamStubHandler.latency = latency / 1000.0
+        UpstreamStubHandler.jitter = jitter / 1000.0
+
+        server = ThreadingHTTPServer((host, port), UpstreamStubHandler)
+        scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile or None)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            scheme = "https"
+
+        self.stdout.write(
+            "upstream stubs listening on %s://%s:%d, latency=%sms, jitter=%sms" % (scheme, host, port, latency, jitter)
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -18,17 +18,17 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
+import random
 from builtins import str
 
-from django.conf import settings
 from django.db import models, transaction
-from django.db.models import F, Q
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import translation
 
-from common.constants import AppTenantMode
 from common.log import logger
 from desktop.constants import DEFALUT_FOLDER_ICO, MarketNavEnum
-from desktop.utils import get_app_logo_url
+from desktop.utils import build_app_logo_url
 
 
 class WallpaperManager(models.Manager):
@@ -47,7 +47,7 @@ class WallpaperManager(models.Manager):
             if default_paper:
                 wallpaper_id = default_paper[0].number
         except Exception as error:
-            logger.error("Get default wallpaper failed！Error message: %s" % error)
+            logger.error("Get default wallpaper failed！Error message: %s", error)
             wallpaper_id = 1
         return wallpaper_id
 
@@ -80,7 +80,7 @@ class UserSettingsManager(models.Manager):
             return True
         except Exception as error:
             logger.error(
-                "Category setting in the left navigation of user's desktop app market failed, Error message：%s" % error
+                "Category setting in the left navigation of user's desktop app market failed, Error message：%s", error
             )
             return False
 
@@ -98,7 +98,7 @@ class UserSettingsManager(models.Manager):
                 self.model(user=user, appxy=appxy).save()
             return True
         except Exception as error:
-            logger.error("The arrangement mode of app setting failed, Error message: %s" % error)
+            logger.error("The arrangement mode of app setting failed, Error message: %s", error)
             return False
 
     def update_user_dock_pos(self, user, dockpos):
@@ -115,7 +115,7 @@ class UserSettingsManager(models.Manager):
                 self.model(user=user, dockpos=dockpos).save()
             return True
         except Exception as error:
-            logger.error("Dock position setting failed, Error message: %s" % error)
+            logger.error("Dock position setting failed, Error message: %s", error)
             return False
 
     def update_user_wallpaper(self, user, wp, wptype):
@@ -137,7 +137,7 @@ class UserSettingsManager(models.Manager):
                 self.model(user=user, wallpaper_type=wptype, wallpaper_id=wp).save()
             return True
         except Exception as error:
-            logger.error("User wallpaper setting failed, Error message: %s" % error)
+            logger.error("User wallpaper setting failed, Error message: %s", error)
             return False
 
     def update_user_skin(self, user, skin):
@@ -154,14 +154,14 @@ class UserSettingsManager(models.Manager):
                 self.model(user=user, skin=skin).save()
             return True
         except Exception as error:
-            logger.error("Window skin setting failed, Error message: %s" % error)
+            logger.error("Window skin setting failed, Error message: %s", error)
             return False
 
     def init_user_settings(self, user):
         """
         初始化用户设置
         """
-        from app.models import App
+        from desktop.app_catalog import get_online_apps
         from desktop.models import UserApp, Wallpaper
 
         try:
@@ -174,16 +174,12 @@ class UserSettingsManager(models.Manager):
                 self.model(user=user, wallpaper_id=wallpaper_id_default, wallpaper_type=wallpaper_type_default).save()
                 # 将（已上线）默认应用添加到用户桌面，且需要按租户进行过滤
                 tenant_id = user.tenant_id
-                default_app = (
-                    App.objects.filter_by_tenant_id(tenant_id=tenant_id)
-                    .filter(is_already_online=True, state__gt=1, is_default=True)
-                    .values_list("id", flat=True)
-                )
+                default_app = [app.id for app in get_online_apps(tenant_id) if app.is_default]
                 for app_id in default_app:
                     UserApp.objects.add_app(user, "desk1", app_id)
             return True
         except Exception as error:
-            logger.error("Initialization of user settings failed, Error message: %s" % error)
+            logger.error("Initialization of user settings failed, Error message: %s", error)
             return False
 
     def _update_user_settings_by_desk(self, desk, app_id_list, user_set):
@@ -248,11 +244,12 @@ class UserSettingsManager(models.Manager):
             else:
                 return 0  # 失败返回码
         except Exception as error:
-            msg = (
+            logger.error(
                 "Updating or adding user desktop app information settings when adding an app or folder failed, "
-                "Operate_type: %s, Error message: %s"
-            ) % (operate_type, error)
-            logger.error(msg)
+                "Operate_type: %s, Error message: %s",
+                operate_type,
+                error,
+            )
             return 0  # 失败返回码
 
     def move_my_app_update(self, user, my_app_id, fromdesk, todesk, fromfolder):
@@ -291,7 +288,7 @@ class UserSettingsManager(models.Manager):
                 return 1  # 成功返回码
             return 0  # 失败返回码
         except Exception as error:
-            logger.error("Failed to move the icon from one desktop to another, Error message: %s" % error)
+            logger.error("Failed to move the icon from one desktop to another, Error message: %s", error)
             return 0  # 失败返回码
 
     def my_app_desk_folder(self, user, my_app_id, desk):
@@ -314,7 +311,7 @@ class UserSettingsManager(models.Manager):
                 return 1  # 成功返回码
             return 0  # 失败返回码
         except Exception as error:
-            logger.error("Failed to move the desktop app to the folder, Error message: %s" % error)
+            logger.error("Failed to move the desktop app to the folder, Error message: %s", error)
             return 0  # 失败返回码
 
     def my_app_desk_desk(self, user, my_app_id, desk, _from, _to):
@@ -343,7 +340,7 @@ class UserSettingsManager(models.Manager):
             else:
                 return 0  # 失败返回码
         except Exception as error:
-            logger.error("Failed to drag from one location to another on the same desktop, Error message: %s" % error)
+            logger.error("Failed to drag from one location to another on the same desktop, Error message: %s", error)
             return 0  # 失败返回码
 
     def my_app_desk_otherdesk(self, user, my_app_id, desk, otherdesk, _from, _to):
@@ -382,7 +379,7 @@ class UserSettingsManager(models.Manager):
             else:
                 return 0  # 失败返回码
         except Exception as error:
-            logger.error("Failed to move an app from one desktop to another, Error message: %s" % error)
+            logger.error("Failed to move an app from one desktop to another, Error message: %s", error)
             return 0  # 失败返回码
 
     def my_app_folder_desk(self, user, my_app_id, desk, _to):
@@ -413,7 +410,7 @@ class UserSettingsManager(models.Manager):
             else:
                 return 0  # 失败返回码
         except Exception as error:
-            logger.error("Failed to move folder app to desktop, Error message: %s" % error)
+            logger.error("Failed to move folder app to desktop, Error message: %s", error)
             return 0  # 失败返回码
 
 
@@ -445,7 +442,7 @@ class UserAppManager(models.Manager):
                     UserSettings.objects.update_user_settings_desk(user, desk, new_folder.id, 0)
                     retrun_code = 1
             except Exception as error:
-                logger.error("Failed to add folder, Error message: %s" % error)
+                logger.error("Failed to add folder, Error message: %s", error)
                 retrun_code = 0
             return retrun_code
         return 2  # 文件夹名重复
@@ -466,7 +463,7 @@ class UserAppManager(models.Manager):
                 self.filter(user=user, desk_app_type=1, id=app_id).update(folder_name=folder_name)
                 return 1  # 更名成功
             except Exception as error:
-                logger.error("Failed to update folder name, Error message: %s" % error)
+                logger.error("Failed to update folder name, Error message: %s", error)
                 return 0  # 出错
         else:
             return 2  # 文件夹名重复
@@ -478,8 +475,7 @@ class UserAppManager(models.Manager):
         app_id:app对应的id
         return: 0:app添加失败，1：app添加成功，2：用户已经添加了该应用
         """
-        from app.models import App
-        from desktop.models import UserSettings
+        from desktop.models import AppUseCountDelta, UserSettings
 
         try:
             # 判断用户是否添加了该应用
@@ -490,13 +486,13 @@ class UserAppManager(models.Manager):
                 # 添加新的user_app数据
                 new_app = self.model(app_id=app_id, user=user, desk_app_type=0, app_position=desk)
                 new_app.save()
-                # app use_count 加1
-                App.objects.filter(id=app_id).update(use_count=F("use_count") + 1)
+                # app use_count 加1，记录增量，避免热门应用的 App 行锁竞争
+                AppUseCountDelta.objects.add_delta(app_id, 1)
                 # 更新 User_settings
                 UserSettings.objects.update_user_settings_desk(user, desk, new_app.id, 0)
                 return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to add an app in desktop, Error message: %s" % error)
+            logger.error("Failed to add an app in desktop, Error message: %s", error)
             return_code = 0
         return return_code
 
@@ -506,8 +502,7 @@ class UserAppManager(models.Manager):
         app_id: 删除的app或文件夹对应的user_app_id
         return: 0:app或文件夹删除失败，1：app或文件夹删除成功，2：文件夹内有应用，不能删除，3：用户已经删除了该app或folder
         """
-        from app.models import App
-        from desktop.models import UserApp, UserSettings
+        from desktop.models import AppUseCountDelta, UserApp, UserSettings
 
         try:
             try:
@@ -523,14 +518,14 @@ class UserAppManager(models.Manager):
             with transaction.atomic():
                 if user_app.desk_app_type == 0:
                     # 删除app usecount 减1
-                    App.objects.filter(id=user_app.app.id).update(use_count=F("use_count") - 1)
+                    AppUseCountDelta.objects.add_delta(user_app.app_id, -1)
                 # 删除user_setting数据
                 UserSettings.objects.update_user_settings_desk(user, "", user_app.id, 1)
                 # 删除用户app
                 user_app.delete()
                 return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to delete an app in desktop, Error message: %s" % error)
+            logger.error("Failed to delete an app in desktop, Error message: %s", error)
             return_code = 0  # 失败返回码
         return return_code
 
@@ -557,7 +552,7 @@ class UserAppManager(models.Manager):
                     self.filter(user=user, id=my_app_id).update(app_position=todesk, parent=None)
                     final_return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to move desktop app to another desktop, Error message: %s" % error)
+            logger.error("Failed to move desktop app to another desktop, Error message: %s", error)
             final_return_code = 0
         return final_return_code
 
@@ -586,7 +581,7 @@ class UserAppManager(models.Manager):
                     self.filter(user=user, id=my_app_id).update(parent=folder)
                     final_return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to move desktop app to folder, Error message: %s" % error)
+            logger.error("Failed to move desktop app to folder, Error message: %s", error)
             final_return_code = 0
         return final_return_code
 
@@ -615,7 +610,7 @@ class UserAppManager(models.Manager):
                     self.filter(user=user, id=my_app_id).update(app_position=otherdesk)
                     final_return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to move desktop app to another desktop, Error message: %s" % error)
+            logger.error("Failed to move desktop app to another desktop, Error message: %s", error)
             final_return_code = 0
         return final_return_code
 
@@ -633,7 +628,7 @@ class UserAppManager(models.Manager):
             self.filter(user=user, id=my_app_id).update(parent=to_folder)
             return 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to move an app from one folder to another, Error message: %s" % error)
+            logger.error("Failed to move an app from one folder to another, Error message: %s", error)
             return 0  # 出错返回码
 
     def my_app_folder_desk(self, user, my_app_id, desk, _to):
@@ -659,7 +654,7 @@ class UserAppManager(models.Manager):
                     self.filter(user=user, id=my_app_id).update(app_position=desk, parent=None)
                     final_return_code = 1  # 成功返回码
         except Exception as error:
-            logger.error("Failed to move the folder app to another desktop, Error message: %s" % error)
+            logger.error("Failed to move the folder app to another desktop, Error message: %s", error)
             final_return_code = 0
         return final_return_code
 
@@ -667,17 +662,13 @@ class UserAppManager(models.Manager):
         """
         获取用户各桌面应用，需要按租户过滤
         """
+        from desktop.app_catalog import is_app_visible_to_tenant
+
         folder_dict = {}
         user_app_dict = {}
         user_app_set = set()
         try:
-            user_app_queryset = self.select_related("app", "user", "parent").filter(user=user)
-            #  开启多租户则过滤出：全租户应用 + 本租户的应用
-            if settings.ENABLE_MULTI_TENANT_MODE:
-                user_app_queryset = user_app_queryset.filter(
-                    Q(app__app_tenant_mode=AppTenantMode.GLOBAL)
-                    | Q(app__app_tenant_mode=AppTenantMode.SINGLE, app__app_tenant_id=tenant_id)
-                )
+            user_app_queryset = self.filter(user=user)
             user_app_by_desk = user_app_queryset.values(
                 "id",
                 "desk_app_type",
@@ -692,14 +683,26 @@ class UserAppManager(models.Manager):
                 "app__is_lapp",
                 "app__app_tenant_mode",
                 "app__app_tenant_id",
+                "app__from_paasv3",
+                "app__migrated_to_paasv3",
+                "app__logo",
             )
             is_en = translation.get_language() == "en"
             for user_app in user_app_by_desk:
+                #  开启多租户则过滤出：全租户应用 + 本租户的应用，文件夹不按租户过滤
+                if user_app["desk_app_type"] == 0 and not is_app_visible_to_tenant(
+                    user_app["app__app_tenant_mode"], user_app["app__app_tenant_id"], tenant_id
+                ):
+                    continue
                 # 应用或文件夹信息
                 if user_app["desk_app_type"] == 1:
                     app_icon = DEFALUT_FOLDER_ICO
                 else:
-                    app_icon = get_app_logo_url(user_app["app__code"])
+                    app_icon = build_app_logo_url(
+                        user_app["app__code"],
+                        user_app["app__from_paasv3"] or user_app["app__migrated_to_paasv3"],
+                        user_app["app__logo"],
+                    )
 
                 app_name = user_app["app__name"]
                 if is_en:
@@ -733,6 +736,90 @@ class UserAppManager(models.Manager):
                         folder_dict[user_app["id"]] = []
 
         except Exception as error:
-            logger.error("Get user desktop app failed, Username: %s, Error message: %s" % (user.username, error))
+            logger.error("Get user desktop app failed, Username: %s, Error message: %s", user.username, error)
             user_app_dict = {}
         return user_app_dict, user_app_set, folder_dict
+
+
+class AppUseCountDeltaManager(models.Manager):
+    """
+    应用使用人数增量
+    添加/删除应用时只插入增量记录，定期合并到 App.use_count，避免大量用户同时添加热门应用时在 App 行上串行
+    """
+
+    def add_delta(self, app_id, delta):
+        self.create(app_id=app_id, delta=delta)
+        # 按概率在事务提交后合并一批增量，未配置定时任务时也能保证增量表的大小有上限
+        if random.random() < 0.01:
+            transaction.on_commit(self._fold_quietly)
+
+    def _fold_quietly(self):
+        try:
+            self.fold(max_batches=1)
+        except Exception:
+            logger.exception("fold app use count delta fail")
+
+    def get_use_counts(self, apps):
+        """
+        应用使用人数，App.use_count 加上未合并的增量
+        在同一条查询中读取两者，避免合并增量的同时读取到旧的 use_count 和已删除的增量，导致人数变少
+        """
+        from app.models import App
+
+        if not apps:
+            return {}
+        pending = self.filter(app_id=OuterRef("pk")).values("app_id").annotate(total=Sum("delta")).values("total")
+        use_counts = dict(
+            App._base_manager.filter(id__in=[app.id for app in apps])
+            .annotate(current_use_count=F("use_count") + Coalesce(Subquery(pending), 0))
+            .values_list("id", "current_use_count")
+        )
+        return {app.id: use_counts.get(app.id, app.use_count) for app in apps}
+
+    def fold(self, batch_size=1000, max_batches=None):
+        """
+        分批将增量合并到 App.use_count，返回合并的增量记录数
+        """
+        from app.models import App
+
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with transaction.atomic():
+                # 锁定增量记录，避免并发合并时重复累加
+                rows = list(self.select_for_update().order_by("id").values_list("id", "app_id", "delta")[:batch_size])
+                if not rows:
+                    break
+                app_deltas = {}
+                for _id, app_id, delta in rows:
+                    app_deltas[app_id] = app_deltas.get(app_id, 0) + delta
+                for app_id, delta in app_deltas.items():
+                    if delta:
+                        App.objects.filter(id=app_id).update(use_count=F("use_count") + delta)
+                self.filter(id__in=[row[0] for row in rows]).delete()
+            total += len(rows)
+            batches += 1
+        return total
+
+    def reconcile(self):
+        """
+        根据用户桌面应用重新计算 App.use_count，并清空增量，返回修正的应用数
+        """
+        from app.models import App
+        from desktop.models import UserApp
+
+        updated = 0
+        with transaction.atomic():
+            self.select_for_update().all().delete()
+            real_counts = dict(
+                UserApp.objects.filter(desk_app_type=0, app__isnull=False)
+                .values("app_id")
+                .annotate(count=Count("id"))
+                .values_list("app_id", "count")
+            )
+            for app_id, use_count in App.objects.values_list("id", "use_count"):
+                real_count = real_counts.get(app_id, 0)
+                if use_count != real_count:
+                    App.objects.filter(id=app_id).update(use_count=real_count)
+                    updated += 1
+        return updated
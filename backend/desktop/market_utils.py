@@ -17,20 +17,74 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import copy
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone, translation
+from django.utils.translation import gettext as _
+
+from analysis.models import AppUseRecord
 from app.models import App, AppTags
-from desktop.constants import CREATOR_TAG_CHOICES, MarketNavEnum
-from desktop.models import UserSettings
+from common.constants import (
+    DESKTOP_DEFAULT_APP_HEIGHT,
+    DESKTOP_DEFAULT_APP_WIDTH,
+    MARKET_APP_DETAIL_CACHE_KEY,
+    MARKET_NAV_VERSION_CACHE_KEY,
+    AppTenantMode,
+)
+from common.utils.catalog import VersionedLocalCache
+from desktop.constants import CREATOR_TAG_CHOICES, MARKET_APP_DETAIL_CACHE_SECONDS, MarketNavEnum
+from desktop.models import AppUseCountDelta, UserSettings
+from desktop.utils import get_app_logo_url
+from release.models import Record as App_release_record
+from release.models import Version as App_version
+
+
+def _load_market_nav():
+    """
+    加载应用分类及存在应用的创建者
+    """
+    tags = {tag.id: tag for tag in AppTags.objects.all()}
+    # 创建者分类名称会翻译，需查询所有语言下的名称
+    creater_names = set()
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            creater_names.update(str(i[1]) for i in CREATOR_TAG_CHOICES[2:-1])
+    creaters = set(App.objects.filter(creater__in=creater_names).values_list("creater", flat=True).distinct())
+    return {"tags": tags, "creaters": creaters}
+
+
+# 应用市场导航数据，应用分类或应用变更时失效
+market_nav_catalog = VersionedLocalCache(MARKET_NAV_VERSION_CACHE_KEY, _load_market_nav)
+
+
+def get_all_tags_with_100id():
+    """
+    获取所有分类，并将返回的ID*100，以便应用市场分类的筛选,与创建者分类区分开来
+    """
+    tags = market_nav_catalog.get()["tags"]
+    return [(100 * tag.id, tag.name_display) for tag in tags.values()]
+
+
+def get_tag_by_100id(search_id):
+    """
+    筛选id=search_id/100的应用分类
+    """
+    return market_nav_catalog.get()["tags"].get(search_id // 100)
 
 
 def _get_app_creator_list():
     """
     获取应用创建者分类
     """
+    creaters = market_nav_catalog.get()["creaters"]
     # 默认有分类：蓝鲸智云，用户自建，其它
     creator_tag_list = CREATOR_TAG_CHOICES[:2]
     # 需要检查是否存在应用，否则不展示的分类
     for i in CREATOR_TAG_CHOICES[2:-1]:
-        if App.objects.filter(creater=i[1]).exists():
+        if str(i[1]) in creaters:
             creator_tag_list.append(i)
     creator_tag_list.append(CREATOR_TAG_CHOICES[-1])
     return creator_tag_list
@@ -44,4 +98,113 @@ def get_market_nav_and_tag_list(username):
     # 应用分类
     if market_nav == MarketNavEnum.CREATOR:
         return market_nav, _get_app_creator_list()
-    return market_nav, AppTags.objects.get_all_tags_with_100id()
+    return market_nav, get_all_tags_with_100id()
+
+
+def _build_market_app_detail(app_id):
+    """
+    组装应用市场应用详情数据（不含用户相关信息）
+    """
+    app = App.objects.get(id=app_id)
+    # 查询本月访问量
+    date_time_now = timezone.localtime(timezone.now())
+    date_time_one = timezone.make_aware(datetime.datetime(date_time_now.year, date_time_now.month, 1))
+    app_visit_count = AppUseRecord.objects.filter(
+        app=app, use_time__gte=date_time_one, use_time__lte=date_time_now
+    ).count()
+    # 自建应用展示开发者，SaaS应用或者蓝鲸提供应用展示创建者
+    developers_value_name = app.creater_display
+
+    # 最近上线时间使用应用表的冗余字段，历史数据未记录时从发布记录中查询并回填
+    newst_online_time = app.last_online_time
+    if not newst_online_time:
+        newst_online_time = App_release_record.objects.get_last_online_time(app.code)
+        if newst_online_time:
+            App.objects.update_last_online_time(app.code, newst_online_time)
+    newst_online_time = newst_online_time or "--"
+
+    is_en = translation.get_language() == "en"
+    app_name = app.name_display
+    introduction = app.introduction_display
+    if is_en:
+        app_name = app.name_en or app.name_display
+        introduction = app.introduction_en or app.introduction_display
+
+    app_info = {
+        "app_id": app.id,
+        "name": app_name,
+        "code": app.code,
+        "tag": app.tag_name,
+        "use_count": AppUseCountDelta.objects.get_use_counts([app])[app.id],
+        "star_num": int(app.star_num) if app.star_num else 0,
+        "width": "%s px" % (app.width if app.width else DESKTOP_DEFAULT_APP_WIDTH),
+        "height": "%s px" % (app.height if app.height else DESKTOP_DEFAULT_APP_HEIGHT),
+        "is_max": _(u"是") if app.is_max else _(u"否"),
+        "is_saas": app.is_saas,
+        "is_third": app.is_third,
+        "is_platform": app.is_platform,
+        "introduction": introduction,
+        "creater": app.creater_display,
+        "developer": developers_value_name,
+        "display_type": "app",
+        "first_test_time": app.first_test_time or "--",
+        "first_online_time": app.first_online_time or "--",
+        "newst_online_time": newst_online_time,
+        "logo_url": get_app_logo_url(app.code, app),
+        "issetbar": _(u"是") if app.is_setbar else _(u"否"),
+        "isresize": _(u"是") if app.is_resize else _(u"否"),
+        "is_already_online": app.is_already_online,
+        "is_has": False,
+        "user_app_id": "",
+        "state": app.state,
+        "app_visit_count": app_visit_count,
+        "islapp": app.is_lapp,
+        "app_tenant_id": app.app_tenant_id,
+        "app_tenant_mode": _("全租户") if app.app_tenant_mode == AppTenantMode.GLOBAL else _("单租户"),
+    }
+    # app的版本信息
+    app_version_list = []
+    all_app_version = (
+        App_version.objects.filter(app=app).order_by("-pubdate").prefetch_related("versiondetail_set")[0:5]
+    )
+    for app_version in all_app_version:
+        bug_list = []  # bug信息列表
+        features_list = []  # features信息列表
+        # 获取该版本的bug和feature信息
+        app_features = app_version.versiondetail_set.all()
+        for feature in app_features:
+            if feature.bug:
+                bug_list.append(feature.bug.replace("\n", "<br/>"))
+            if feature.features:
+                features_list.append(feature.features.replace("\n", "<br/>"))
+        app_version_list.append(
+            {
+                "version": app_version.version,
+                "bug": bug_list,
+                "features": features_list,
+                "publisher": app_version.publisher,
+                "pubdate": app_version.pubdate,
+            }
+        )
+    return app_info, app_version_list
+
+
+def get_market_app_detail(app_id):
+    """
+    应用市场应用详情，按 (应用, 语言) 缓存，应用、版本或上线记录变更时清除
+    PaaS 直接写库及其他进程的本地缓存不会触发清除，最长在 MARKET_APP_DETAIL_CACHE_SECONDS 后过期
+    返回 (应用基本信息, 应用版本信息)，调用方可修改返回值
+    """
+    cache_key = MARKET_APP_DETAIL_CACHE_KEY % (app_id, translation.get_language())
+    detail = cache.get(cache_key)
+    if detail is None:
+        detail = _build_market_app_detail(app_id)
+        cache.set(cache_key, detail, MARKET_APP_DETAIL_CACHE_SECONDS)
+    return copy.deepcopy(detail)
+
+
+def clear_market_app_detail_cache(app_id):
+    """
+    清除应用各语言的详情缓存
+    """
+    cache.delete_many([MARKET_APP_DETAIL_CACHE_KEY % (app_id, language) for language, _name in settings.LANGUAGES])
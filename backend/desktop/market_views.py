@@ -17,35 +17,48 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import base64
 import datetime
-import operator
-from functools import reduce
+import hashlib
+import json
+from decimal import Decimal
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Avg, Count, Q
+from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils import timezone, translation
-from django.utils.translation import gettext as _
 
-from analysis.models import AppUseRecord
-from app.models import App, AppStar, AppTags
-from common.constants import DESKTOP_DEFAULT_APP_HEIGHT, DESKTOP_DEFAULT_APP_WIDTH, AppTenantMode
+from analysis.models import AppRecentUse, AppUseRecord
+from app.models import App, AppStar
+from common.constants import MARKET_LIST_CACHE_KEY
 from common.exceptions import ConsoleErrorCodes
 from common.log import logger
+from desktop.app_catalog import (
+    app_catalog,
+    get_effective_visiable_labels,
+    get_online_apps,
+    icontains,
+    search_online_apps,
+)
 from desktop.constants import (
     BK_CREATOR_TAG_LIST,
     BK_CREATOR_TAG_STR_LIST,
     CREATOR_TAG_DICT,
+    MARKET_LIST_CACHE_SECONDS,
     AppCreatorTagEnum,
     AppStarOperatorResult,
 )
-from desktop.market_utils import get_market_nav_and_tag_list
-from desktop.models import UserApp, UserSettings
-from desktop.utils import get_app_logo_url, get_visiable_labels
-from release.models import Record as App_release_record
-from release.models import Version as App_version
+from desktop.market_utils import (
+    get_market_app_detail,
+    get_market_nav_and_tag_list,
+    get_tag_by_100id,
+    market_nav_catalog,
+)
+from desktop.models import AppUseCountDelta, UserApp, UserSettings
+from desktop.utils import build_app_logo_url, get_app_logo_url, get_visiable_labels
 
 
 def market(request):
@@ -99,61 +112,168 @@ def _get_hot_apps():
     return hot_app_dict
 
 
-def _make_query(username, search_tag, search_other, tenant_id):
+def _make_query(visiable_labels, search_tag, search_other, tenant_id):
+    """
+    在已上线应用快照中筛选，不查询数据库，返回应用列表
+    """
     # 所有应用（过滤已下架应用（state=0）、开发中应用（state=1））
-    all_app = App.objects.filter_by_tenant_id(tenant_id=tenant_id).filter(state__gt=1, is_already_online=True)
+    all_app = get_online_apps(tenant_id)
 
     # 筛选创建者类型
     if search_tag == AppCreatorTagEnum.EEUSER:
         # 筛选企业用户自建的应用
-        all_app = all_app.filter(is_saas=False, is_platform=False)
+        all_app = [app for app in all_app if not app.is_saas and not app.is_platform]
     elif search_tag == AppCreatorTagEnum.OTHER:
         # 筛选其他企业，不在默认蓝鲸服务商和自建中的应用
-        all_app = all_app.filter(is_saas=True).exclude(creater__in=BK_CREATOR_TAG_STR_LIST)
+        all_app = [app for app in all_app if app.is_saas and app.creater not in BK_CREATOR_TAG_STR_LIST]
     elif search_tag in BK_CREATOR_TAG_LIST:
         # 筛选 蓝鲸或者蓝鲸服务商的应用
-        all_app = all_app.filter(creater=CREATOR_TAG_DICT[search_tag])
+        all_app = [app for app in all_app if app.creater == CREATOR_TAG_DICT[search_tag]]
 
     # 筛选 应用分类
-    app_tag = AppTags.objects.get_tags_by_100id(search_tag)
+    app_tag = get_tag_by_100id(search_tag)
     if app_tag:
-        all_app = all_app.filter(tags=app_tag)
+        all_app = [app for app in all_app if app.tags_id == app_tag.id]
 
     # NOTE: 2019-08-09 remove 根据开发者搜索 => bk-iam能获取用户的应用列表? 无法模糊匹配
     # 按应用名称, 应用ID, 开发者搜索 -> 按应用名称, 应用ID, 开发负责人搜索
 
     # 过滤搜索
     if search_other:
-        # 组装搜索框中多个搜索条件
-        all_app = all_app.filter(
-            Q(code__icontains=search_other)
-            | Q(name__icontains=search_other)
-            | Q(creater__icontains=search_other)
-            # Q(developer__username__icontains=search_other) |
-            # Q(developer__chname__icontains=search_other) |
-        )
+        # 组装搜索框中多个搜索条件：应用编码、应用名称、创建者
+        all_app_ids = {app.id for app in search_online_apps(tenant_id, search_other)}
+        all_app = [app for app in all_app if app.id in all_app_ids]
 
-    # via username to fetch user_id / [dpid1, dpid2, dpid3]
-    visiable_labels = get_visiable_labels(username)
+    # 按用户可见范围过滤
     if not visiable_labels:
-        logger.error("get visiable_labels from usermgr fail!")
-        # return None
         # NOTE: return no visiable labels apps instead of empty
-        all_app = all_app.filter(Q(visiable_labels__isnull=True) | Q(visiable_labels__exact=""))
+        all_app = [app for app in all_app if not app.visiable_labels]
     else:
-        all_app = all_app.filter(
-            Q(visiable_labels__isnull=True)
-            | Q(visiable_labels__exact="")
-            | (reduce(operator.or_, [Q(visiable_labels__icontains=label) for label in visiable_labels]))
-        )
+        visiable_labels = [label.lower() for label in visiable_labels]
+        all_app = [
+            app
+            for app in all_app
+            if not app.visiable_labels or any(icontains(app.visiable_labels, label) for label in visiable_labels)
+        ]
 
-    all_app = all_app.distinct()
     return all_app
 
 
+def _get_market_list_cache_key(tenant_id, visiable_labels, *args):
+    """
+    应用市场应用列表缓存 key，包含已上线应用和应用分类的版本号，变更后旧缓存不再命中
+    """
+    key_parts = [
+        app_catalog.get_version(),
+        market_nav_catalog.get_version(),
+        tenant_id,
+        ",".join(visiable_labels),
+        translation.get_language(),
+    ]
+    key_parts.extend(args)
+    return MARKET_LIST_CACHE_KEY % hashlib.md5(repr(key_parts).encode("utf-8")).hexdigest()
+
+
+def _get_market_sort_key(search_tag, search_use, hot_app_dict):
+    """
+    应用列表排序键，列表按排序键倒序，排序键相同时按应用 id 正序
+    """
+    if search_use == 1 and search_tag != 1:
+        # 最新应用（按照首次上线排序，未上线时间的排在最后）
+        def sort_key(app):
+            if app.first_online_time:
+                return (1, app.first_online_time.timestamp(), -app.id)
+            return (0, 0, -app.id)
+
+        return sort_key
+    if search_use == 2 and search_tag != 1:
+        # 最热门应用（按照每月访问量）
+        return lambda app: (hot_app_dict.get(app.code, 0), -app.id)
+    return lambda app: (-app.id,)
+
+
+def _make_market_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("utf-8")
+
+
+def _parse_market_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(position, list) or not all(isinstance(i, (int, float)) for i in position):
+        return None
+    return tuple(position)
+
+
+def _build_market_list(
+    visiable_labels, search_tag, search_use, search_other, tenant_id, start_index, page_size, cursor=None
+):
+    """
+    应用市场应用列表（不含用户是否添加的信息），返回 (应用信息列表, 应用总数, 下一页 cursor)
+    传入上一页返回的 cursor 时按排序键定位下一页，否则按 start_index 偏移
+    """
+    all_app = _make_query(visiable_labels, search_tag, search_other, tenant_id)
+    if not all_app:
+        return [], 0, ""
+
+    # 应用总数
+    total = len(all_app)
+
+    # 过滤指标，按排序键倒序
+    hot_app_dict = _get_hot_apps()
+    sort_key = _get_market_sort_key(search_tag, search_use, hot_app_dict)
+    all_app = sorted(all_app, key=sort_key, reverse=True)
+
+    # 组装数据
+    position = _parse_market_cursor(cursor)
+    if position:
+        # 按上一页最后一个应用的排序键定位
+        all_app_limit = [app for app in all_app if sort_key(app) < position][:page_size]
+    else:
+        all_app_limit = all_app[start_index : start_index + page_size]
+
+    next_cursor = ""
+    if len(all_app_limit) == page_size and page_size > 0:
+        next_cursor = _make_market_cursor(sort_key(all_app_limit[-1]))
+    # 使用人数包含未合并的增量
+    use_counts = AppUseCountDelta.objects.get_use_counts(all_app_limit)
+
+    app_info_list = []  # 应用信息列表
+    is_en = translation.get_language() == "en"
+    for app in all_app_limit:
+        # 自建应用展示开发者，SaaS应用或者蓝鲸提供应用展示创建者
+        developers_value_name = app.creater_display
+
+        app_name = app.name_display
+        introduction = app.introduction_display
+        if is_en:
+            app_name = app.name_en or app.name_display
+            introduction = app.introduction_en or app.introduction_display
+
+        app_info = {
+            "name": app_name,  # 应用名称
+            "code": app.code,  # 应用编码
+            "introduction": introduction,  # 应用简介
+            "use_count": use_counts[app.id],  # 应用人气数
+            "star_num": int(app.star_num) if app.star_num else 0,  # 应用评分
+            "relapp_id": app.id,  # 应用id
+            "logo_url": get_app_logo_url(app.code, app),  # 应用logo
+            "developer": developers_value_name if developers_value_name else "--",  # 开发负责人
+            "is_saas": app.is_saas,  # 是否SaaS应用
+            "app_visit_count": hot_app_dict.get(app.code, 0),  # 月访问量
+            "islapp": app.is_lapp,  # 是否轻应用
+        }
+        app_info_list.append(app_info)
+    return app_info_list, total, next_cursor
+
+
 def market_get_list(request):
     """
-    应用市场APP查询（分页查询）
+    应用市场APP查询（分页查询），支持 from/to 偏移分页和 cursor 分页
+    同一可见范围的用户共享列表缓存，用户是否添加应用在读取缓存后补充
     """
     # 参数处理
     try:
@@ -162,80 +282,60 @@ def market_get_list(request):
         search_tag = int(request.GET.get("sidebar_select", "0"))  # 根据标签查询（'0'： 全部应用，'1': 我的应用， '2': 普通应用, '3': 内置应用）
         search_use = int(request.GET.get("topbar_select", "1"))  # 根据使用指标等查询(1:最新应用，2:最热应用)
         search_other = request.GET.get("keyword", "").strip()  # 搜索框（根据应用name、code等搜索）
+        cursor = request.GET.get("cursor", "")  # 上一页返回的 next_cursor，传入时忽略 from
+        page_size = max(end_index - start_index, 0)
     except Exception as error:
-        error_message = "%s, App market APP query (paging query) failed, Error message: %s" % (
+        logger.error(
+            "%s, App market APP query (paging query) failed, Error message: %s",
             ConsoleErrorCodes.E1303101_MARKET_APP_QUERY_FAIL,
             error,
         )
-        logger.error(error_message)
         app_info_list = []
         total = 0
-        return JsonResponse({"app_info_list": app_info_list, "total": total})
+        return JsonResponse({"app_info_list": app_info_list, "total": total, "next_cursor": ""})
 
     username = request.user.username
     tenant_id = request.user.tenant_id
     try:
-        all_app = _make_query(username, search_tag, search_other, tenant_id)
-        if not all_app:
-            app_info_list = []
-            total = 0
-            return JsonResponse({"app_info_list": app_info_list, "total": total})
-
-        # 应用总数
-        total = all_app.count()
-
-        # 过滤指标
-        hot_app_dict = _get_hot_apps()
-        if search_use == 1 and search_tag != 1:
-            # 最新应用（按照首次上线排序）
-            all_app = all_app.order_by("-first_online_time")
-        elif search_use == 2 and search_tag != 1:
-            # 最热门应用（按照每月访问量）
-            hot_app_list = [(i, hot_app_dict.get(i.code, 0)) for i in all_app]
-            hot_app_list.sort(key=lambda obj: obj[1], reverse=True)
-            all_app = [i[0] for i in hot_app_list]
-
-        # 组装数据
+        # via username to fetch user_id / [dpid1, dpid2, dpid3]
+        visiable_labels = get_visiable_labels(username)
+        if not visiable_labels:
+            logger.error("get visiable_labels from usermgr fail!")
+        visiable_labels = get_effective_visiable_labels(visiable_labels)
+
+        # 使用 cursor 时起始位置不影响结果
+        if cursor:
+            start_index = 0
+        cache_key = _get_market_list_cache_key(
+            tenant_id, visiable_labels, search_tag, search_use, search_other, start_index, page_size, cursor
+        )
+        market_list = cache.get(cache_key)
+        if market_list is None:
+            market_list = _build_market_list(
+                visiable_labels, search_tag, search_use, search_other, tenant_id, start_index, page_size, cursor
+            )
+            cache.set(cache_key, market_list, MARKET_LIST_CACHE_SECONDS)
+        cached_app_info_list, total, next_cursor = market_list
+
+        # 补充用户是否添加该应用
         all_user_app = _get_user_apps(request.user)
-        all_app_limit = all_app[start_index:end_index]
-
-        app_info_list = []  # 应用信息列表
-        is_en = translation.get_language() == "en"
-        for app in all_app_limit:
-            # 自建应用展示开发者，SaaS应用或者蓝鲸提供应用展示创建者
-            developers_value_name = app.creater_display
-
-            app_name = app.name_display
-            introduction = app.introduction_display
-            if is_en:
-                app_name = app.name_en or app.name_display
-                introduction = app.introduction_en or app.introduction_display
-
-            app_info = {
-                "name": app_name,  # 应用名称
-                "code": app.code,  # 应用编码
-                "introduction": introduction,  # 应用简介
-                "use_count": app.use_count,  # 应用人气数
-                "star_num": int(app.star_num) if app.star_num else 0,  # 应用评分
-                "user_app_id": all_user_app.get(app.code, "") if app.code in all_user_app else "",  # 应用对应的user_app id
-                "relapp_id": app.id,  # 应用id
-                "logo_url": get_app_logo_url(app.code),  # 应用logo
-                "developer": developers_value_name if developers_value_name else "--",  # 开发负责人
-                "is_saas": app.is_saas,  # 是否SaaS应用
-                "is_has": app.code in all_user_app,  # 用户是否添加该应用
-                "app_visit_count": hot_app_dict.get(app.code, 0),  # 月访问量
-                "islapp": app.is_lapp,  # 是否轻应用
-            }
+        app_info_list = []
+        for app_info in cached_app_info_list:
+            app_code = app_info["code"]
+            app_info = dict(app_info)
+            app_info["user_app_id"] = all_user_app.get(app_code, "")  # 应用对应的user_app id
+            app_info["is_has"] = app_code in all_user_app  # 用户是否添加该应用
             app_info_list.append(app_info)
     except Exception as error:
-        error_message = "%s, App market APP query (paging query) failed, Error message: %s" % (
+        logger.error(
+            "%s, App market APP query (paging query) failed, Error message: %s",
             ConsoleErrorCodes.E1303101_MARKET_APP_QUERY_FAIL,
             error,
         )
-        logger.error(error_message)
         app_info_list = []
         total = 0
-    return JsonResponse({"app_info_list": app_info_list, "total": total})
+        next_cursor = ""
+    return JsonResponse({"app_info_list": app_info_list, "total": total, "next_cursor": next_cursor})
 
 
 def market_app_detail(request, app_id):
@@ -246,99 +346,19 @@ def market_app_detail(request, app_id):
     app_info = {}  # 该应用基本信息
     app_version_list = []  # 应用版本信息
     try:
-        app = App.objects.get(id=app_id)
-        # 查询本月访问量
-        date_time_now = timezone.localtime(timezone.now())
-        date_time_one = timezone.make_aware(datetime.datetime(date_time_now.year, date_time_now.month, 1))
-        app_visit_count = AppUseRecord.objects.filter(
-            app=app, use_time__gte=date_time_one, use_time__lte=date_time_now
-        ).count()
-        # 自建应用展示开发者，SaaS应用或者蓝鲸提供应用展示创建者
-        developers_value_name = app.creater_display
-
-        try:
-            newst_online_time = (
-                App_release_record.objects.filter(app_code=app.code, operate_id=1, is_success=True)
-                .latest("operate_time")
-                .operate_time
-            )
-        except Exception:
-            newst_online_time = "--"
-
-        is_en = translation.get_language() == "en"
-        app_name = app.name_display
-        introduction = app.introduction_display
-        if is_en:
-            app_name = app.name_en or app.name_display
-            introduction = app.introduction_en or app.introduction_display
-
-        app_info = {
-            "app_id": app.id,
-            "name": app_name,
-            "code": app.code,
-            "tag": app.tag_name,
-            "use_count": app.use_count,
-            "star_num": int(app.star_num) if app.star_num else 0,
-            "width": "%s px" % (app.width if app.width else DESKTOP_DEFAULT_APP_WIDTH),
-            "height": "%s px" % (app.height if app.height else DESKTOP_DEFAULT_APP_HEIGHT),
-            "is_max": _(u"是") if app.is_max else _(u"否"),
-            "is_saas": app.is_saas,
-            "is_third": app.is_third,
-            "is_platform": app.is_platform,
-            "introduction": introduction,
-            "creater": app.creater_display,
-            "developer": developers_value_name,
-            "display_type": "app",
-            "first_test_time": app.first_test_time or "--",
-            "first_online_time": app.first_online_time or "--",
-            "newst_online_time": newst_online_time,
-            "logo_url": get_app_logo_url(app.code),
-            "issetbar": _(u"是") if app.is_setbar else _(u"否"),
-            "isresize": _(u"是") if app.is_resize else _(u"否"),
-            "is_already_online": app.is_already_online,
-            "is_has": False,
-            "user_app_id": "",
-            "state": app.state,
-            "app_visit_count": app_visit_count,
-            "islapp": app.is_lapp,
-            "app_tenant_id": app.app_tenant_id,
-            "app_tenant_mode": _("全租户") if app.app_tenant_mode == AppTenantMode.GLOBAL else _("单租户"),
-        }
+        app_info, app_version_list = get_market_app_detail(app_id)
         # 判断用户是否添加了该应用
-        user_app = UserApp.objects.filter(user=request.user, desk_app_type=0, app=app)
+        user_app = UserApp.objects.filter(user=request.user, desk_app_type=0, app_id=app_info["app_id"]).first()
         if user_app:
             app_info["is_has"] = True
-            app_info["user_app_id"] = user_app[0].id
-
-        # app的版本信息
-        app_version_list = []
-        all_app_version = App_version.objects.filter(app=app).order_by("-pubdate")[0:5]
-        for app_version in all_app_version:
-            bug_list = []  # bug信息列表
-            features_list = []  # features信息列表
-            # 获取该版本的bug和feature信息
-            app_features = app_version.versiondetail_set.all()
-            for feature in app_features:
-                if feature.bug:
-                    bug_list.append(feature.bug.replace("\n", "<br/>"))
-                if feature.features:
-                    features_list.append(feature.features.replace("\n", "<br/>"))
-            app_version_list.append(
-                {
-                    "version": app_version.version,
-                    "bug": bug_list,
-                    "features": features_list,
-                    "publisher": app_version.publisher,
-                    "pubdate": app_version.pubdate,
-                }
-            )
+            app_info["user_app_id"] = user_app.id
     except Exception as error:
-        error_message = "%s, An error occurred while getting app detail page data, Error message:%s, App_id: %s" % (
+        logger.error(
+            "%s, An error occurred while getting app detail page data, Error message:%s, App_id: %s",
             ConsoleErrorCodes.E1303102_MARKET_APP_DETAIL_QUERY_FAIL,
             error,
             app_id,
         )
-        logger.error(error_message)
         app_info = {}  # 该应用基本信息
         app_version_list = []  # 应用版本信息
     ctx = {"app": app_info, "app_version": app_version_list, 'is_app_star_enabled': settings.IS_APP_STAR_ENABLED}
@@ -351,33 +371,36 @@ def market_get_nearest_open_app(request):
     """
     user = request.user
     app_list = []
-    # 获取最近打开的应用
-    app_nearest_open = AppUseRecord.objects.filter(user=user).order_by("-use_time")
+    # 获取最近打开的前7个应用
+    app_nearest_open = AppRecentUse.objects.get_recent_apps(user, 7)
     app_nearest_open = app_nearest_open.values(
-        "app__name", "app__name_en", "app__id", "app__code", "app__is_lapp", "use_time"
+        "app__name",
+        "app__name_en",
+        "app__id",
+        "app__code",
+        "app__is_lapp",
+        "app__from_paasv3",
+        "app__migrated_to_paasv3",
+        "app__logo",
     )
     # 组装数据
     is_en = translation.get_language() == "en"
 
-    app_code_set = set()
     for _app in app_nearest_open:
-        if _app["app__code"] not in app_code_set:
-            app_name = _app["app__name"]
-            if is_en:
-                app_name = _app["app__name_en"] or _app["app__name"]
-
-            app_info = {
-                "name": app_name,
-                "code": _app["app__code"],
-                "realid": _app["app__id"],
-                "logo_url": get_app_logo_url(_app["app__code"]),
-                "islapp": _app["app__is_lapp"],
-            }
-            app_list.append(app_info)
-            app_code_set.add(_app["app__code"])
-            # 只取前7个应用
-            if len(app_code_set) >= 7:
-                break
+        app_name = _app["app__name"]
+        if is_en:
+            app_name = _app["app__name_en"] or _app["app__name"]
+
+        app_info = {
+            "name": app_name,
+            "code": _app["app__code"],
+            "realid": _app["app__id"],
+            "logo_url": build_app_logo_url(
+                _app["app__code"], _app["app__from_paasv3"] or _app["app__migrated_to_paasv3"], _app["app__logo"]
+            ),
+            "islapp": _app["app__is_lapp"],
+        }
+        app_list.append(app_info)
     ctx = {"app_list": app_list, "total": len(app_list)}
     return JsonResponse(ctx)
 
@@ -399,13 +422,11 @@ def update_app_star(request, app_id):
     try:
         with transaction.atomic():
             # 记录用户的评分
-            star_num = request.POST.get('star_num')
+            star_num = Decimal(request.POST.get('star_num'))
             AppStar.objects.create(app=app, user=request.user, star_num=star_num)
-            # 更新应用的平均分
-            app_average_star = AppStar.objects.filter(app=app).aggregate(Avg('star_num'))
-            app.star_num = app_average_star['star_num__avg']
-            app.save()
+            # 累加评分总和及人数，更新应用的平均分
+            App.objects.add_star(app.id, star_num)
             return JsonResponse({"result": AppStarOperatorResult.SUCCESS})
     except Exception as error:
-        logger.exception("An error occurred while saving App star num%s" % error)
+        logger.exception("An error occurred while saving App star num%s", error)
         return JsonResponse({"result": AppStarOperatorResult.SYSERROR})
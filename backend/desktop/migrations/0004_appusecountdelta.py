@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0038_app_star_sum_star_count"),
+        ("desktop", "0003_usersettings_market_nav"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppUseCountDelta",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("delta", models.IntegerField(verbose_name="增量")),
+                ("create_time", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                (
+                    "app",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="app.app",
+                        verbose_name="应用",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "应用使用人数增量",
+                "verbose_name_plural": "应用使用人数增量",
+                "db_table": "console_desktop_appusecountdelta",
+            },
+        ),
+    ]
@@ -24,7 +24,7 @@ from django.db import models
 
 from app.models import App
 from desktop.constants import MARKET_NAV_CHOICES, MarketNavEnum
-from desktop.manager import UserAppManager, UserSettingsManager, WallpaperManager
+from desktop.manager import AppUseCountDeltaManager, UserAppManager, UserSettingsManager, WallpaperManager
 
 
 class Wallpaper(models.Model):
@@ -129,3 +129,23 @@ class UserApp(models.Model):
         ordering = ["id"]
         verbose_name = u"用户桌面应用"
         verbose_name_plural = u"用户桌面应用"
+
+
+class AppUseCountDelta(models.Model):
+    """
+    应用使用人数增量，定期合并到 App.use_count
+    """
+
+    app = models.ForeignKey(App, on_delete=models.CASCADE, db_constraint=False, verbose_name=u"应用")
+    delta = models.IntegerField(u"增量")
+    create_time = models.DateTimeField(u"创建时间", auto_now_add=True)
+
+    objects = AppUseCountDeltaManager()
+
+    def __unicode__(self):
+        return "%s(%s)" % (self.app_id, self.delta)
+
+    class Meta(object):
+        db_table = "console_desktop_appusecountdelta"
+        verbose_name = u"应用使用人数增量"
+        verbose_name_plural = u"应用使用人数增量"
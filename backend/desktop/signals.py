@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.models import App, AppTags
+from desktop.app_catalog import app_catalog
+from desktop.market_utils import clear_market_app_detail_cache, market_nav_catalog
+from release.constants import OperateIDEnum
+from release.models import Record, Version, VersionDetail
+
+
+@receiver([post_save, post_delete], sender=App)
+def clear_app_detail_on_app_change(sender, instance, **kwargs):
+    clear_market_app_detail_cache(instance.id)
+    # 应用创建者变化影响创建者分类
+    market_nav_catalog.invalidate()
+    app_catalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=AppTags)
+def clear_market_nav_on_tag_change(sender, instance, **kwargs):
+    market_nav_catalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Version)
+def clear_app_detail_on_version_change(sender, instance, **kwargs):
+    clear_market_app_detail_cache(instance.app_id)
+
+
+@receiver([post_save, post_delete], sender=VersionDetail)
+def clear_app_detail_on_version_detail_change(sender, instance, **kwargs):
+    for app_id in Version.objects.filter(id=instance.app_version_id).values_list("app_id", flat=True):
+        clear_market_app_detail_cache(app_id)
+
+
+@receiver(post_save, sender=Record)
+def clear_app_detail_on_release(sender, instance, **kwargs):
+    """
+    应用上线后已上线应用及最近上线时间变化
+    """
+    if instance.operate_id != OperateIDEnum.TO_ONLINE or not instance.is_success:
+        return
+    app_catalog.invalidate()
+    for app_id in App.objects.filter(code=instance.app_code).values_list("id", flat=True):
+        clear_market_app_detail_cache(app_id)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.models import App
+from desktop.market_utils import get_market_app_detail
+from desktop.models import AppUseCountDelta, UserApp
+from release.constants import OperateIDEnum
+from release.models import Record
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def visiable_labels():
+    # 可见范围需要请求用户管理
+    with mock.patch("desktop.market_views.get_visiable_labels", return_value=[",d:1,"]):
+        yield
+
+
+@pytest.fixture
+def app(synthetic_data):
+    return synthetic_data["apps"][0]
+
+
+class TestDesktopQueryBudget:
+    def test_index(self, login_client, assert_query_budget):
+        assert_query_budget("desktop.views.index", login_client.get, "/console/")
+
+    def test_get_my_app(self, login_client, assert_query_budget):
+        assert_query_budget("desktop.views.get_my_app", login_client.get, "/console/get_my_app/")
+
+    def test_get_my_app_not_grow_with_desktop_apps(self, login_client, synthetic_data, assert_query_budget):
+        user = synthetic_data["users"][0]
+        count = assert_query_budget("desktop.views.get_my_app", login_client.get, "/console/get_my_app/")
+
+        added_app_ids = set(UserApp.objects.filter(user=user).values_list("app_id", flat=True))
+        UserApp.objects.bulk_create(
+            [UserApp(user=user, app=app) for app in synthetic_data["apps"] if app.id not in added_app_ids]
+        )
+        assert assert_query_budget("desktop.views.get_my_app", login_client.get, "/console/get_my_app/") == count
+
+    def test_get_my_app_by_id(self, login_client, app, assert_query_budget):
+        assert_query_budget(
+            "desktop.views.get_my_app_by_id", login_client.get, "/console/get_my_app_by_id/%s/" % app.id
+        )
+
+    def test_get_my_app_by_code(self, login_client, app, assert_query_budget):
+        assert_query_budget(
+            "desktop.views.get_my_app_by_code", login_client.get, "/console/get_my_app_by_code/%s/" % app.code
+        )
+
+    def test_search_apps(self, login_client, assert_query_budget):
+        assert_query_budget(
+            "desktop.views.search_apps", login_client.get, "/console/search_apps/", {"search": "ut-app"}
+        )
+
+    def test_get_appxy(self, login_client, assert_query_budget):
+        assert_query_budget("desktop.views.get_appxy", login_client.get, "/console/get_appxy/")
+
+    def test_is_user_added_app(self, login_client, app, assert_query_budget):
+        assert_query_budget(
+            "desktop.views.is_user_added_app", login_client.get, "/console/is_user_added_app/%s/" % app.code
+        )
+
+    def test_add_and_del_my_app(self, login_client, synthetic_data, assert_query_budget):
+        user = synthetic_data["users"][0]
+        added_app_ids = set(UserApp.objects.filter(user=user).values_list("app_id", flat=True))
+        app = [app for app in synthetic_data["apps"] if app.id not in added_app_ids][0]
+        assert_query_budget("desktop.views.add_my_app", login_client.post, "/console/add_my_app/%s/" % app.id)
+
+        user_app = UserApp.objects.get(user=user, app=app)
+        assert_query_budget("desktop.views.del_my_app", login_client.post, "/console/del_my_app/%s/" % user_app.id)
+
+
+class TestMarketQueryBudget:
+    def test_market(self, login_client, assert_query_budget):
+        assert_query_budget("desktop.market_views.market", login_client.get, "/console/market/")
+
+    @pytest.mark.parametrize("topbar_select", [1, 2])
+    def test_market_get_list(self, login_client, assert_query_budget, topbar_select):
+        assert_query_budget(
+            "desktop.market_views.market_get_list",
+            login_client.get,
+            "/console/market_get_list/",
+            {"from": 0, "to": 20, "topbar_select": topbar_select},
+        )
+
+    def test_market_get_list_not_grow_with_page_size(self, login_client, assert_query_budget):
+        # 首次请求加载进程内应用快照
+        login_client.get("/console/market_get_list/", {"from": 0, "to": 1})
+        small_page = assert_query_budget(
+            "desktop.market_views.market_get_list", login_client.get, "/console/market_get_list/", {"from": 0, "to": 5}
+        )
+        large_page = assert_query_budget(
+            "desktop.market_views.market_get_list",
+            login_client.get,
+            "/console/market_get_list/",
+            {"from": 0, "to": 50},
+        )
+        assert large_page == small_page
+
+    def test_market_app_detail(self, login_client, app, assert_query_budget):
+        assert_query_budget(
+            "desktop.market_views.market_app_detail", login_client.get, "/console/market_app_detail/%s/" % app.id
+        )
+
+    def test_market_get_nearest_open_app(self, login_client, assert_query_budget):
+        assert_query_budget(
+            "desktop.market_views.market_get_nearest_open_app",
+            login_client.get,
+            "/console/market_get_nearest_open_app/",
+        )
+
+    def test_update_app_star(self, login_client, app, assert_query_budget):
+        assert_query_budget(
+            "desktop.market_views.update_app_star",
+            login_client.post,
+            "/console/update_app_star/%s/" % app.id,
+            {"star_num": 4},
+        )
+
+
+class TestMarketAppDetail:
+    def test_backfill_last_online_time(self, app):
+        App.objects.filter(id=app.id).update(last_online_time=None)
+        (record,) = Record.objects.bulk_create(
+            [Record(app_code=app.code, operate_id=OperateIDEnum.TO_ONLINE, is_success=True)]
+        )
+        app_info, _versions = get_market_app_detail(app.id)
+        assert app_info["newst_online_time"] == record.operate_time
+        app.refresh_from_db()
+        assert app.last_online_time == record.operate_time
+
+    def test_read_last_online_time_from_app(self, app):
+        online_time = timezone.now()
+        App.objects.filter(id=app.id).update(last_online_time=online_time)
+        with CaptureQueriesContext(connection) as queries:
+            app_info, _versions = get_market_app_detail(app.id)
+        assert app_info["newst_online_time"] == online_time
+        assert not [query for query in queries if "paas_release_record" in query["sql"]]
+
+
+class TestAppUseCountDelta:
+    def test_use_count_not_drop_after_fold(self, app):
+        AppUseCountDelta.objects.add_delta(app.id, 1)
+        AppUseCountDelta.objects.add_delta(app.id, 1)
+        before = AppUseCountDelta.objects.get_use_counts([app])[app.id]
+        assert before == app.use_count + 2
+
+        # 合并增量后，持有旧 use_count 的应用对象读取的人数不变
+        assert AppUseCountDelta.objects.fold() == 2
+        assert AppUseCountDelta.objects.get_use_counts([app])[app.id] == before
+
+    def test_single_query(self, synthetic_data):
+        apps = synthetic_data["apps"][:10]
+        with CaptureQueriesContext(connection) as queries:
+            AppUseCountDelta.objects.get_use_counts(apps)
+        assert len(queries) == 1
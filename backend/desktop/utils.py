@@ -25,23 +25,33 @@ from blueking.component.shortcuts import get_client_by_user
 from common.log import logger
 
 
-def get_app_logo_url(app_code):
+def build_app_logo_url(app_code, is_in_paas3=False, logo=None):
     """
-    通过app_code 获取 app 的logo (与开发者中心共用同一media资源)
+    根据已查询的应用信息拼接 logo 地址，不查询数据库
     """
-    try:
-        app = App.objects.get(code=app_code)
-        # PaaS3.0 的应用则直接读取 logo 字段中的值
-        if app.is_in_paas3:
-            return str(app.logo)
-    except Exception as error:
-        logger.error("An error occurred while getting app logo url: %s" % error)
+    # PaaS3.0 的应用则直接读取 logo 字段中的值
+    if is_in_paas3:
+        return str(logo or "")
 
     # 判断 以 app_code 命名的 logo 图片是否存在
     logo_name = "%s/%s.png" % (APP_LOGO_IMG_RELATED, app_code)
     return "%s%s" % (settings.MEDIA_URL, logo_name)
 
 
+def get_app_logo_url(app_code, app=None):
+    """
+    通过app_code 获取 app 的logo (与开发者中心共用同一media资源)
+    已查询出应用对象时传入 app，避免逐个查询
+    """
+    if app is None:
+        try:
+            app = App.objects.get(code=app_code)
+        except Exception as error:
+            logger.error("An error occurred while getting app logo url: %s", error)
+            return build_app_logo_url(app_code)
+    return build_app_logo_url(app_code, app.is_in_paas3, app.logo)
+
+
 def _get_user_id(username):
     client = get_client_by_user(username)
     try:
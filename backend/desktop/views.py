@@ -20,7 +20,6 @@ to the current version of the project delivered to anyone in the future.
 from builtins import str
 
 from django.conf import settings
-from django.db.models import Q
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.utils import translation
@@ -30,6 +29,7 @@ from app.models import App
 from common.constants import DESKTOP_DEFAULT_APP_HEIGHT, DESKTOP_DEFAULT_APP_WIDTH
 from common.exceptions import ConsoleErrorCodes
 from common.log import logger
+from desktop.app_catalog import search_online_apps
 from desktop.constants import DEFALUT_FOLDER_ICO
 from desktop.models import UserApp, UserSettings, Wallpaper
 from desktop.utils import get_app_logo_url
@@ -156,7 +156,7 @@ def get_wallpaper(request):
         wp_url = settings.STATIC_URL + "img/wallpaper/wallpaper%s.jpg" % wallpaper_id
         wallpaper = "1<{|}>%s<{|}>%s<{|}>%d<{|}>%d" % (wp_url, wallpaper_type, user_wp.width, user_wp.height)
     except Exception as error:
-        logger.error("An error occurred in getting wallpaper, Error message: %s" % error)
+        logger.error("An error occurred in getting wallpaper, Error message: %s", error)
         wallpaper = "1<{|}>" + settings.STATIC_URL + "img/wallpaper/wallpaper1.jpg<{|}>lashen<{|}>1920<{|}>1080"  # 默认值
     return HttpResponse(wallpaper)
 
@@ -249,12 +249,12 @@ def get_my_app(request):
                         if not _user_app["parentid"]:
                             pos[desk].append(_user_app)
     except Exception as error:
-        error_message = "%s, Failed to assemble user desktop app data, Username: %s, Error message: %s" % (
+        logger.error(
+            "%s, Failed to assemble user desktop app data, Username: %s, Error message: %s",
             ConsoleErrorCodes.E1303100_DESKTOP_USER_APP_LOAD_ERROR,
             user.username,
             error,
         )
-        logger.error(error_message)
 
     # 根据folder_id查询每个文件夹下的app
     pos["folder"] = [{"appid": i, "apps": folder_dict[i]} for i in folder_dict]
@@ -305,7 +305,7 @@ def get_my_app_by_id(request, app_id):
                 "realappid": app.id,
                 "app_code": app.code,
                 "name": app_name,
-                "icon": get_app_logo_url(app.code),
+                "icon": get_app_logo_url(app.code, app),
                 "width": app.width or DESKTOP_DEFAULT_APP_WIDTH,
                 "height": app.height or DESKTOP_DEFAULT_APP_HEIGHT,
                 "isresize": 1 if app.is_resize else 0,
@@ -319,7 +319,7 @@ def get_my_app_by_id(request, app_id):
                 "is_in_paas3": 1 if app.is_in_paas3 else 0,
             }
     except Exception as error:
-        logger.error("Failed to get app info via app_id, User_app_id：%s, Error message: %s" % (app_id, error))
+        logger.error("Failed to get app info via app_id, User_app_id：%s, Error message: %s", app_id, error)
         app_info = {"error": "E100"}  # E100  应用不存在的错误编码
     return JsonResponse(app_info)
 
@@ -353,7 +353,7 @@ def get_my_app_by_code(request, app_code):
                 "realappid": app.id,
                 "app_code": app_code,
                 "name": app_name,
-                "icon": get_app_logo_url(app.code),
+                "icon": get_app_logo_url(app.code, app),
                 "width": app.width or DESKTOP_DEFAULT_APP_WIDTH,
                 "height": app.height or DESKTOP_DEFAULT_APP_HEIGHT,
                 "isresize": 1 if app.is_resize else 0,
@@ -368,7 +368,7 @@ def get_my_app_by_code(request, app_code):
                 "is_in_paas3": 1 if app.is_in_paas3 else 0,
             }
     except Exception as error:
-        logger.error("Failed to get app info via app_code, App_code：%s, Error message: %s" % (app_code, error))
+        logger.error("Failed to get app info via app_code, App_code：%s, Error message: %s", app_code, error)
         app_info = {"error": "E100"}  # E100  应用不存在的错误编码
 
     return JsonResponse(app_info)
@@ -409,7 +409,7 @@ def add_my_app(request, app_id):
             # 把app添加到桌面 insert into user_app
             return_code = UserApp.objects.add_app(request.user, desk, app_id)
     except Exception as error:
-        logger.error("Add app failed, Error message: %s" % error)
+        logger.error("Add app failed, Error message: %s", error)
         return_code = 0
     return HttpResponse(str(return_code))
 
@@ -486,7 +486,7 @@ def is_user_added_app(request, app_code):
             else:
                 result = {"result": False, "realappid": app.id}
     except Exception as error:
-        logger.error("Determine whether the user have added the app, Error message: %s" % error)
+        logger.error("Determine whether the user have added the app, Error message: %s", error)
         result = {"error": "E100"}
     # 返回
     return JsonResponse(result)
@@ -501,15 +501,8 @@ def search_apps(request):
         all_app = []
         if search:
             tenant_id = request.user.tenant_id
-            # 所有应用（过滤已下架应用（state=0）、开发中应用（state=1））
-            all_app = App.objects.filter_by_tenant_id(tenant_id=tenant_id).filter(state__gt=1, is_already_online=True)
-            # 组装搜索框中多个搜索条件
-            all_app = all_app.filter(
-                Q(code__icontains=search)
-                | Q(name__icontains=search)
-                | Q(developer__username__icontains=search)
-                | Q(developer__chname__icontains=search)
-            )
+            # 在已上线应用中按应用编码、名称、开发者搜索
+            all_app = search_online_apps(tenant_id, search, with_developer=True)
 
         is_en = translation.get_language() == "en"
         apps = [
@@ -523,6 +516,6 @@ def search_apps(request):
         ]
 
     except Exception as error:
-        logger.error("An error occurred in desktop search for apps, error：%s" % error)
+        logger.error("An error occurred in desktop search for apps, error：%s", error)
         apps = []
     return JsonResponse({"apps": apps})
@@ -22,4 +22,7 @@ from django.urls import re_path
 
 from healthz import views
 
-urlpatterns = [re_path("^$", views.healthz)]
+urlpatterns = [
+    re_path("^$", views.healthz),
+    re_path("^readiness/$", views.readiness),
+]
@@ -19,10 +19,15 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import os
+import threading
+import time
 from builtins import str
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 import requests
 from django.conf import settings
+from django.db import connection, connections
 from django.http import HttpResponse, JsonResponse
 from django.utils.translation import gettext as _
 
@@ -35,14 +40,14 @@ from common.license_utils import check_license
 CONSOLE_MODULE_CODE = "1303000"
 
 
-def _gen_json_response(ok, code, message, data):
+def _gen_json_response(ok, code, message, data, status=200):
     """
     ok: True/False
     code:  平台 1303000 / 模块 1303100 / 具体错误  1303105
     message: 报错信息
     data: dict, 内容自定义
     """
-    return JsonResponse({"ok": ok, "code:": code, "message": message, "data": data}, status=200)
+    return JsonResponse({"ok": ok, "code:": code, "message": message, "data": data}, status=status)
 
 
 def _gen_success_json_response(data):
@@ -52,11 +57,11 @@ def _gen_success_json_response(data):
     return _gen_json_response(ok=True, code=CONSOLE_MODULE_CODE, message="OK", data=data)
 
 
-def _gen_fail_json_response(code, message, data):
+def _gen_fail_json_response(code, message, data, status=200):
     """
     失败
     """
-    return _gen_json_response(ok=False, code=code, message=message, data=data)
+    return _gen_json_response(ok=False, code=code, message=message, data=data, status=status)
 
 
 # ====================  check =========================
@@ -90,17 +95,15 @@ def _check_settings():
 
 def _check_database():
     try:
-        from desktop.models import Wallpaper
-
-        objs = Wallpaper.objects.all()
-        [o.name for o in objs]
+        with connection.cursor() as c:
+            c.execute("SELECT 1")
     except Exception as e:
         return False, _(u"数据库连接存在问题: %s") % str(e), ConsoleErrorCodes.E1303002_BASE_DATABASE_ERROR
 
     return True, "ok", 0
 
 
-def _check_hosts():
+def _check_hosts(timeout=10):
     # check hosts
     # 不检查cc/jos, 因为不是强依赖只是用来展示, 用户浏览器能访问通即可, paas所在机器不需要
 
@@ -113,7 +116,7 @@ def _check_hosts():
         try:
             if not host.startswith("http"):
                 host = "http://%s" % host
-            requests.get(host, timeout=10)
+            requests.get(host, timeout=timeout)
         except Exception as e:
             return (
                 False,
@@ -195,6 +198,87 @@ def healthz(request):
     return _gen_success_json_response(data)
 
 
+# ====================  readiness =========================
+
+# 检查并发执行，单个检查超时不阻塞其他检查
+_readiness_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="readiness")
+_readiness_lock = threading.Lock()
+_readiness_result = {"expires_at": 0, "response": None}
+
+
+def _run_check(func):
+    st = time.time()
+    try:
+        return func(), time.time() - st
+    finally:
+        # 检查在线程池中执行，需关闭该线程打开的数据库连接
+        connections.close_all()
+
+
+def _run_readiness_checks():
+    """
+    并发执行所有检查，返回 (是否就绪, 错误码, 错误信息, data)
+    """
+    timeout = settings.HEALTHZ_CHECK_TIMEOUT
+    # 强依赖
+    check_funcs = [
+        ("settings", _check_settings),
+        ("database", _check_database),
+        ("hosts", lambda: _check_hosts(timeout=timeout)),
+    ]
+    # 弱依赖, 有损服务
+    warning_funcs = [
+        ("database bksuite", _warning_database_bksuite),
+        ("license", _warning_license),
+    ]
+    check_futures = [(name, _readiness_executor.submit(_run_check, func)) for name, func in check_funcs]
+    warning_futures = [(name, _readiness_executor.submit(_run_check, func)) for name, func in warning_funcs]
+
+    deadline = time.time() + timeout
+    data = {}
+    durations = {}
+    error = None
+    for name, future in check_futures + warning_futures:
+        try:
+            result, duration = future.result(timeout=max(deadline - time.time(), 0))
+        except FutureTimeoutError:
+            result, duration = (False, _(u"检查超时"), ConsoleErrorCodes.E1303006_BASE_CHECK_TIMEOUT), timeout
+        except Exception as e:
+            result, duration = (False, str(e), ConsoleErrorCodes.E1303000_DEFAULT_CODE), 0
+
+        durations[name] = int(duration * 1000)
+        # 弱依赖检查返回 dict，检查失败不影响就绪状态
+        if isinstance(result, dict):
+            data.update(result)
+            continue
+
+        is_health, message, code = result
+        data[name] = "ok" if is_health else message
+        if not is_health and (name, future) in check_futures and error is None:
+            error = (code, message)
+
+    data["durations_ms"] = durations
+    if error:
+        return False, error[0], error[1], data
+    return True, CONSOLE_MODULE_CODE, "OK", data
+
+
+@login_exempt
+def readiness(request):
+    """
+    就绪检查: 并发检查依赖, 每项检查有超时时间, 结果缓存 HEALTHZ_READINESS_CACHE_SECONDS 秒, 未就绪时返回 503
+    """
+    with _readiness_lock:
+        if _readiness_result["expires_at"] > time.time():
+            return _gen_json_response(*_readiness_result["response"])
+
+        is_ready, code, message, data = _run_readiness_checks()
+        _readiness_result["response"] = (is_ready, code, message, data, 200 if is_ready else 503)
+        _readiness_result["expires_at"] = time.time() + settings.HEALTHZ_READINESS_CACHE_SECONDS
+
+    return _gen_json_response(*_readiness_result["response"])
+
+
 @login_exempt
 def ping(request):
     return HttpResponse("pong", content_type="text/plain")
@@ -25,7 +25,7 @@ from django.utils import timezone
 from app.constants import STATE_CHOICES
 from app.models import App
 from common.log import logger
-from release.constants import OPERATE_ID_CHOICES, USER_OPERATE_TYPE_CHOICES
+from release.constants import OPERATE_ID_CHOICES, USER_OPERATE_TYPE_CHOICES, OperateIDEnum
 
 
 class ReleaseRecordManager(models.Manager):
@@ -41,8 +41,22 @@ class ReleaseRecordManager(models.Manager):
             is_success=is_success,
             operate_time=timezone.now(),
         )
+        if operate_id == OperateIDEnum.TO_ONLINE and is_success:
+            App.objects.update_last_online_time(app_code, record_obj.operate_time)
         return record_obj
 
+    def get_last_online_time(self, app_code):
+        """
+        应用最近一次成功上线的时间
+        """
+        record = (
+            self.filter(app_code=app_code, operate_id=OperateIDEnum.TO_ONLINE, is_success=True)
+            .order_by("-operate_time")
+            .only("operate_time")
+            .first()
+        )
+        return record.operate_time if record else None
+
 
 class Record(models.Model):
     """
@@ -153,7 +167,7 @@ class UserOperateRecordManager(models.Manager):
             ).save()
             result = True
         except Exception as e:
-            logger.exception("record user operation fail，error：%s" % e)
+            logger.exception("record user operation fail，error：%s", e)
             result = False
         return result
 
@@ -158,6 +158,11 @@ BLUEKING.marketApp = (function(){
 						'keyword': keyword,				// 查询关键字
 					}
 			}
+			// 翻到下一页时使用上一页返回的 cursor
+			var $setting = $('#pagination_setting');
+			if(flag === undefined && $setting.attr('next_cursor') && parseInt($setting.attr('cursor_page')) == current_page - 1){
+				data_post['cursor'] = $setting.attr('next_cursor');
+			}
 			// ajax强求搜索
 			$.ajax({
 				type : 'GET',
@@ -173,6 +178,7 @@ BLUEKING.marketApp = (function(){
 						var total_page = parseInt(total/per_count);
 					}
 					$('#pagination_setting').attr('count', total_page);//共多少页
+					$('#pagination_setting').attr('next_cursor', data.next_cursor || '').attr('cursor_page', current_page);
 					var html_data = '';
 					for(var i in app_info_list){
 						html_data += apptrTemp({
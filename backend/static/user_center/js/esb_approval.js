@@ -1,3 +1,5 @@
+// 顺序翻到下一页时带上服务端返回的游标，避免大偏移量分页
+var esb_approval_cursor = {start: -1, search: '', cursor: '', pending: null};
 var esb_approval = $('#esb_approval').DataTable({
     processing: true,
     paging: true, //隐藏分页
@@ -10,30 +12,53 @@ var esb_approval = $('#esb_approval').DataTable({
     serverSide: true,
     ajax: {
         url: site_url + 'user_center/esb_apply/get_not_done_record/',
+        data: function (d) {
+            var state = esb_approval_cursor;
+            if (d.start === state.start && d.search.value === state.search) {
+                d.cursor = state.cursor;
+            }
+            state.pending = {start: d.start + d.length, search: d.search.value};
+        },
+        dataSrc: function (json) {
+            var state = esb_approval_cursor;
+            if (state.pending) {
+                state.start = state.pending.start;
+                state.search = state.pending.search;
+                state.cursor = json.next_cursor || '';
+            }
+            return json.data;
+        },
     },
     columnDefs: [
         {
             targets: 0,
-            data: "operator",
+            data: "record_id",
+            render: function ( data, type, full, meta) {
+                return '<input type="checkbox" class="esb-approval-check" value="' + data + '">';
+            }
         },
         {
             targets: 1,
-            data: "apply_time",
+            data: "operator_display",
         },
         {
             targets: 2,
-            data: "app_name",
+            data: "apply_time",
         },
         {
             targets: 3,
-            data: "sys_name",
+            data: "app_name",
         },
         {
             targets: 4,
-            data: "api_name",
+            data: "sys_name",
         },
         {
             targets: 5,
+            data: "api_name",
+        },
+        {
+            targets: 6,
             data: "record_id",
             render: function ( data, type, full, meta) {
                 return '<a class="mr15" href="###" onclick="approval_apply('+data+', \'pass\')">' + gettext('同意') + '</a>' +
@@ -42,6 +67,7 @@ var esb_approval = $('#esb_approval').DataTable({
         },
     ],
     drawCallback: function(settings) {
+      $('#esb_approval_check_all').prop('checked', false);
       var pagination = $(this).closest('.dataTables_wrapper').find('.dataTables_paginate');
       pagination.toggle(this.api().page.info().pages > 1);
     }
@@ -62,3 +88,47 @@ function approval_apply(record_id, approval_result){
 		}
 	}, 'json')
 }
+$('#esb_approval_check_all').on('change', function(){
+	$('#esb_approval .esb-approval-check').prop('checked', this.checked);
+});
+// 批量审批，同意时由后台任务处理，轮询查询进度
+function bulk_approval_apply(approval_result){
+	var record_ids = $('#esb_approval .esb-approval-check:checked').map(function(){
+		return this.value;
+	}).get();
+	if(!record_ids.length){
+		art.dialog({width: 300,icon: 'error',lock: true,content: gettext('请选择申请记录')}).time(2);
+		return;
+	}
+	var param = {
+		record_ids: record_ids.join(','),
+		approval_result: approval_result
+	};
+	$.post(site_url+'user_center/esb_apply/bulk_save_approval_result/', param, function(res){
+		if(!res.result){
+			art.dialog({width: 300,icon: 'error',lock: true,content: res.message});
+			return;
+		}
+		if(res.data.batch_id){
+			poll_bulk_approval_status(res.data.batch_id);
+		}else{
+			art.dialog({width: 300,icon: 'succeed',lock: true,content: gettext('审批成功')}).time(2);
+			esb_approval.ajax.reload();
+		}
+	}, 'json')
+}
+function poll_bulk_approval_status(batch_id){
+	$.get(site_url+'user_center/esb_apply/get_bulk_approval_status/', {batch_id: batch_id}, function(res){
+		var data = res.data;
+		$('#bulk_approval_progress').text(
+			interpolate(gettext('审批进度：%s/%s，失败：%s'), [data.finished, data.total, data.failed])
+		);
+		if(data.finished < data.total){
+			setTimeout(function(){
+				poll_bulk_approval_status(batch_id);
+			}, 2000);
+		}else{
+			esb_approval.ajax.reload();
+		}
+	}, 'json')
+}
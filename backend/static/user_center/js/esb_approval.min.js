@@ -1 +1 @@
-function approval_apply(a,e){var t={record_id:a,approval_result:e};$.post(site_url+"user_center/esb_apply/save_approval_result/",t,function(a){a.result?(art.dialog({width:300,icon:"succeed",lock:!0,content:gettext("审批成功")}).time(2),setTimeout(function(){esb_approval.ajax.reload()},2200)):art.dialog({width:300,icon:"error",lock:!0,content:a.message})},"json")}var esb_approval=$("#esb_approval").DataTable({processing:!0,paging:!0,ordering:!1,info:!0,searching:!1,pageLength:5,lengthChange:!1,language:language,serverSide:!0,ajax:{url:site_url+"user_center/esb_apply/get_not_done_record/"},columnDefs:[{targets:0,data:"operator"},{targets:1,data:"apply_time"},{targets:2,data:"app_name"},{targets:3,data:"sys_name"},{targets:4,data:"api_name"},{targets:5,data:"record_id",render:function(a,e,t,r){return'<a class="mr15" href="###" onclick="approval_apply('+a+", 'pass')\">"+gettext("同意")+'</a><a class="" href="###" onclick="approval_apply('+a+", 'reject')\">"+gettext("驳回")+"</a>"}}],drawCallback:function(a){$(this).closest(".dataTables_wrapper").find(".dataTables_paginate").toggle(this.api().page.info().pages>1)}});
\ No newline at end of file
+function approval_apply(a,e){var t={record_id:a,approval_result:e};$.post(site_url+"user_center/esb_apply/save_approval_result/",t,function(a){a.result?(art.dialog({width:300,icon:"succeed",lock:!0,content:gettext("审批成功")}).time(2),setTimeout(function(){esb_approval.ajax.reload()},2200)):art.dialog({width:300,icon:"error",lock:!0,content:a.message})},"json")}var esb_approval_cursor={start:-1,search:"",cursor:"",pending:null},esb_approval=$("#esb_approval").DataTable({processing:!0,paging:!0,ordering:!1,info:!0,searching:!1,pageLength:5,lengthChange:!1,language:language,serverSide:!0,ajax:{url:site_url+"user_center/esb_apply/get_not_done_record/",data:function(a){var e=esb_approval_cursor;a.start===e.start&&a.search.value===e.search&&(a.cursor=e.cursor),e.pending={start:a.start+a.length,search:a.search.value}},dataSrc:function(a){var e=esb_approval_cursor;return e.pending&&(e.start=e.pending.start,e.search=e.pending.search,e.cursor=a.next_cursor||""),a.data}},columnDefs:[{targets:0,data:"record_id",render:function(a,e,t,r){return'<input type="checkbox" class="esb-approval-check" value="'+a+'">'}},{targets:1,data:"operator_display"},{targets:2,data:"apply_time"},{targets:3,data:"app_name"},{targets:4,data:"sys_name"},{targets:5,data:"api_name"},{targets:6,data:"record_id",render:function(a,e,t,r){return'<a class="mr15" href="###" onclick="approval_apply('+a+", 'pass')\">"+gettext("同意")+'</a><a class="" href="###" onclick="approval_apply('+a+", 'reject')\">"+gettext("驳回")+"</a>"}}],drawCallback:function(a){$("#esb_approval_check_all").prop("checked",!1),$(this).closest(".dataTables_wrapper").find(".dataTables_paginate").toggle(this.api().page.info().pages>1)}});function bulk_approval_apply(a){var e=$("#esb_approval .esb-approval-check:checked").map(function(){return this.value}).get();if(e.length){var t={record_ids:e.join(","),approval_result:a};$.post(site_url+"user_center/esb_apply/bulk_save_approval_result/",t,function(a){a.result?a.data.batch_id?poll_bulk_approval_status(a.data.batch_id):(art.dialog({width:300,icon:"succeed",lock:!0,content:gettext("审批成功")}).time(2),esb_approval.ajax.reload()):art.dialog({width:300,icon:"error",lock:!0,content:a.message})},"json")}else art.dialog({width:300,icon:"error",lock:!0,content:gettext("请选择申请记录")}).time(2)}function poll_bulk_approval_status(a){$.get(site_url+"user_center/esb_apply/get_bulk_approval_status/",{batch_id:a},function(e){var t=e.data;$("#bulk_approval_progress").text(interpolate(gettext("审批进度：%s/%s，失败：%s"),[t.finished,t.total,t.failed])),t.finished<t.total?setTimeout(function(){poll_bulk_approval_status(a)},2e3):esb_approval.ajax.reload()},"json")}$("#esb_approval_check_all").on("change",function(){$("#esb_approval .esb-approval-check").prop("checked",this.checked)});
\ No newline at end of file
@@ -1,3 +1,5 @@
+// 顺序翻到下一页时带上服务端返回的游标，避免大偏移量分页
+var esb_history_cursor = {start: -1, search: '', cursor: '', pending: null};
 var esb_history = $('#esb_history').DataTable({
     processing: true,
     paging: true, //隐藏分页
@@ -10,11 +12,27 @@ var esb_history = $('#esb_history').DataTable({
     serverSide: true,
     ajax: {
         url: site_url + 'user_center/esb_apply/get_done_record/',
+        data: function (d) {
+            var state = esb_history_cursor;
+            if (d.start === state.start && d.search.value === state.search) {
+                d.cursor = state.cursor;
+            }
+            state.pending = {start: d.start + d.length, search: d.search.value};
+        },
+        dataSrc: function (json) {
+            var state = esb_history_cursor;
+            if (state.pending) {
+                state.start = state.pending.start;
+                state.search = state.pending.search;
+                state.cursor = json.next_cursor || '';
+            }
+            return json.data;
+        },
     },
     columnDefs: [
         {
             targets: 0,
-            data: "operator",
+            data: "operator_display",
         },
         {
             targets: 1,
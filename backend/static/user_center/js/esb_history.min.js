@@ -1 +1 @@
-var esb_history=$("#esb_history").DataTable({processing:!0,paging:!0,ordering:!1,info:!0,searching:!0,pageLength:5,lengthChange:!1,language:language,serverSide:!0,ajax:{url:site_url+"user_center/esb_apply/get_done_record/"},columnDefs:[{targets:0,data:"operator"},{targets:1,data:"apply_time"},{targets:2,data:"app_name"},{targets:3,data:"sys_name"},{targets:4,data:"api_name"},{targets:5,data:"approval_result",render:function(a,e,t,r){return"pass"==a?gettext("同意"):gettext("拒绝")}}],drawCallback:function(a){$(this).closest(".dataTables_wrapper").find(".dataTables_paginate").toggle(this.api().page.info().pages>1)}}),sLabel=$(".content-right").find(".dataTables_filter label"),sInput=sLabel.find("input");sInput.attr("placeholder",gettext("查询，模糊查询，支持：申请人、组件"));
\ No newline at end of file
+var esb_history_cursor={start:-1,search:"",cursor:"",pending:null},esb_history=$("#esb_history").DataTable({processing:!0,paging:!0,ordering:!1,info:!0,searching:!0,pageLength:5,lengthChange:!1,language:language,serverSide:!0,ajax:{url:site_url+"user_center/esb_apply/get_done_record/",data:function(a){var e=esb_history_cursor;a.start===e.start&&a.search.value===e.search&&(a.cursor=e.cursor),e.pending={start:a.start+a.length,search:a.search.value}},dataSrc:function(a){var e=esb_history_cursor;return e.pending&&(e.start=e.pending.start,e.search=e.pending.search,e.cursor=a.next_cursor||""),a.data}},columnDefs:[{targets:0,data:"operator_display"},{targets:1,data:"apply_time"},{targets:2,data:"app_name"},{targets:3,data:"sys_name"},{targets:4,data:"api_name"},{targets:5,data:"approval_result",render:function(a,e,t,r){return"pass"==a?gettext("同意"):gettext("拒绝")}}],drawCallback:function(a){$(this).closest(".dataTables_wrapper").find(".dataTables_paginate").toggle(this.api().page.info().pages>1)}}),sLabel=$(".content-right").find(".dataTables_filter label"),sInput=sLabel.find("input");sInput.attr("placeholder",gettext("查询，模糊查询，支持：申请人、组件"));
\ No newline at end of file
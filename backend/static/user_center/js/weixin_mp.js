@@ -2,13 +2,16 @@ var timeout_event;
 
 // 查询绑定状态
 function get_bind_status(){
-	$.get(site_url + 'user_center/weixin/get_bind_status/', function(res){
+	// 长轮询，绑定完成后服务端立即返回；服务端未等待(waited 为 false)时间隔1.5秒再查询
+	$.get(site_url + 'user_center/weixin/wait_bind_status/', function(res){
 		if(res.result){
 			$("#bind_action").html('<a href="#unbind_weixin" role="button" class="btn-control other_operate" data-toggle="modal">' + gettext('解绑微信') + '</a>');
 			$("#bind_weixin").modal("hide");
 		}else{
-			timeout_event = setTimeout("get_bind_status()", 1500);
+			timeout_event = setTimeout("get_bind_status()", res.waited ? 100 : 1500);
 		}
+	}).fail(function(){
+		timeout_event = setTimeout("get_bind_status()", 3000);
 	});
 }
 
@@ -3,17 +3,22 @@ var execute_cnt = 0;
 // 查询绑定状态
 function get_bind_status(){
     execute_cnt += 1;
-	$.get(site_url + 'user_center/weixin/get_bind_status/', function(res){
+	// 长轮询，绑定完成后服务端立即返回
+	$.get(site_url + 'user_center/weixin/wait_bind_status/', function(res){
 		if(res.result){
 			$("#bind_action").html('<a href="#unbind_weixin" role="button" class="btn-control other_operate" data-toggle="modal">' + gettext('解绑微信') + '</a>');
 		}else{
-		    // 小于半个小时，就间隔1.5秒查询，大于则以 （execute_cnt-120）* 1.5秒查询
-            var execute_time = 1500;
-		    if(execute_cnt > 120){
-                execute_time = (execute_cnt - 120) * 1500;
+		    // 服务端长轮询(waited 为 true)时每次请求最长等待25秒，小于半个小时则立即再次请求，大于则以 （execute_cnt-72）* 1.5秒间隔请求
+		    // 服务端未等待时，小于半个小时就间隔1.5秒查询，大于则以 （execute_cnt-120）* 1.5秒查询
+            var execute_time = res.waited ? 100 : 1500;
+            var max_cnt = res.waited ? 72 : 120;
+		    if(execute_cnt > max_cnt){
+                execute_time = (execute_cnt - max_cnt) * 1500;
             }
 			timeout_event = setTimeout("get_bind_status()", execute_time);
 		}
+	}).fail(function(){
+		timeout_event = setTimeout("get_bind_status()", 3000);
 	});
 }
 
@@ -45,3 +45,16 @@ WEIXIN_QY_API_URL = {
 
 # 微信公众号临时二维码过期时长
 WEIXIN_MP_QRCODE_EXPIRE_SECONDS = 7200
+
+# 微信 access_token 缓存：到期前提前刷新的时间，及共享缓存下跨进程刷新租约的时长(不小于请求超时时间)
+WEIXIN_ACCESS_TOKEN_REFRESH_AHEAD_SECONDS = 300
+WEIXIN_ACCESS_TOKEN_LOCK_SECONDS = 15
+# 微信绑定临时记录有效期，与二维码有效期一致
+WEIXIN_TMP_RECORD_EXPIRE_SECONDS = WEIXIN_MP_QRCODE_EXPIRE_SECONDS
+
+# 绑定微信完成标记的有效期，长轮询查询绑定状态的最长等待时间
+WEIXIN_BIND_COMPLETED_EXPIRE_SECONDS = 300
+WEIXIN_BIND_STATUS_WAIT_SECONDS = 25
+
+# ESB 未返回有效期时，从 ESB 获取的 token 缓存时长
+WEIXIN_ESB_ACCESS_TOKEN_EXPIRE_SECONDS = 300
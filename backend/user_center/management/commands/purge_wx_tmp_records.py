@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - 蓝鲸桌面 (BlueKing - bkconsole) available.
+Copyright (C) 2022 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.core.management.base import BaseCommand
+
+from user_center.models import WxBkUserTmpRecord
+
+
+class Command(BaseCommand):
+    """
+    分批清理过期的微信绑定临时记录，可配置为定时任务
+
+    示例: python manage.py purge_wx_tmp_records --chunk-size 1000
+    """
+
+    help = "Purge expired WeChat bind temporary records in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, dest="chunk_size", default=1000)
+
+    def handle(self, chunk_size, *args, **options):
+        deleted = WxBkUserTmpRecord.objects.purge_expired(chunk_size=chunk_size)
+        self.stdout.write("purged %d expired records" % deleted)
@@ -17,8 +17,16 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import datetime
+import random
+
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from common.log import logger
+from user_center.constants import WEIXIN_TMP_RECORD_EXPIRE_SECONDS
 
 
 class WxBkUserTmpRecordManager(models.Manager):
@@ -28,5 +36,58 @@ class WxBkUserTmpRecordManager(models.Manager):
         """
         username = request.user.username
         bk_token = request.COOKIES.get(settings.BK_COOKIE_NAME)
-        self.create(username=username, bk_token=bk_token, wx_ticket=wx_ticket)
+        expire_time = timezone.now() + datetime.timedelta(seconds=WEIXIN_TMP_RECORD_EXPIRE_SECONDS)
+        self.create(username=username, bk_token=bk_token, wx_ticket=wx_ticket, expire_time=expire_time)
+
+        # 按概率顺带清理一批过期记录，未配置定时任务时也能保证表的大小有上限
+        if random.random() < 0.01:
+            try:
+                self.purge_expired(max_chunks=1)
+            except Exception:
+                logger.exception("purge expired wx tmp records fail")
         return True
+
+    def get_valid_record(self, wx_ticket, bk_token=None):
+        """
+        查询未过期的临时记录，wx_ticket 唯一，一次查询即可
+        """
+        queryset = self.filter(wx_ticket=wx_ticket).filter(self._valid_q())
+        if bk_token is not None:
+            queryset = queryset.filter(bk_token=bk_token)
+        return queryset.first()
+
+    def _get_history_expire_time(self, now):
+        # 历史记录没有过期时间，按创建时间计算，创建时间也为空的视为已过期
+        return now - datetime.timedelta(seconds=WEIXIN_TMP_RECORD_EXPIRE_SECONDS)
+
+    def _valid_q(self):
+        """
+        未过期的记录，与 _expired_q 互补，查询有效的记录不会被清理
+        """
+        now = timezone.now()
+        return Q(expire_time__gte=now) | Q(
+            expire_time__isnull=True, create_time__gte=self._get_history_expire_time(now)
+        )
+
+    def _expired_q(self):
+        now = timezone.now()
+        return Q(expire_time__lt=now) | Q(
+            Q(create_time__lt=self._get_history_expire_time(now)) | Q(create_time__isnull=True),
+            expire_time__isnull=True,
+        )
+
+    def purge_expired(self, chunk_size=1000, max_chunks=None):
+        """
+        分批删除过期记录，避免长时间锁表，返回删除的记录数
+        """
+        total = 0
+        chunks = 0
+        expired_q = self._expired_q()
+        while max_chunks is None or chunks < max_chunks:
+            ids = list(self.filter(expired_q).values_list("id", flat=True)[:chunk_size])
+            if not ids:
+                break
+            deleted, _ = self.filter(id__in=ids).delete()
+            total += deleted
+            chunks += 1
+        return total
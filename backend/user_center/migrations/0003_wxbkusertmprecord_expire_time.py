@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-19 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_center", "0002_wxbkusertmprecord"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wxbkusertmprecord",
+            name="expire_time",
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name="过期时间"),
+        ),
+    ]
@@ -33,6 +33,7 @@ class WxBkUserTmpRecord(models.Model):
     bk_token = models.CharField(u"登录态token", max_length=255)
     wx_ticket = models.CharField(u"微信临时标识(state或二维码ticket)", max_length=127, unique=True, db_index=True)
     create_time = models.DateTimeField(u"创建时间", auto_now_add=True, blank=True, null=True)
+    expire_time = models.DateTimeField(u"过期时间", blank=True, null=True, db_index=True)
 
     objects = WxBkUserTmpRecordManager()
 
@@ -17,6 +17,167 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
-from django.test import TestCase  # noqa
+import datetime
+import json
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.utils import timezone
+
+from components import usermgr
+from user_center.constants import WEIXIN_BIND_STATUS_WAIT_SECONDS, WEIXIN_TMP_RECORD_EXPIRE_SECONDS
+from user_center.models import WxBkUserTmpRecord
+from user_center.wx_core import get_cached_access_token
+from user_center.wx_views import wait_bind_status
+
+TOKEN_KEY = "UT_WEIXIN_ACCESS_TOKEN"
+
+
+class TestCachedAccessToken:
+    def test_cache_token(self):
+        calls = []
+
+        def fetch_token():
+            calls.append(1)
+            return "token-%d" % len(calls), 7200
+
+        assert get_cached_access_token(TOKEN_KEY, fetch_token) == "token-1"
+        assert get_cached_access_token(TOKEN_KEY, fetch_token) == "token-1"
+        assert len(calls) == 1
+
+    def test_refresh_ahead(self):
+        cache.set(TOKEN_KEY, {"token": "old", "refresh_at": time.time() - 1}, 60)
+        assert get_cached_access_token(TOKEN_KEY, lambda: ("new", 7200)) == "new"
+
+    def test_keep_old_token_when_refresh_fail(self):
+        cache.set(TOKEN_KEY, {"token": "old", "refresh_at": time.time() - 1}, 60)
+        assert get_cached_access_token(TOKEN_KEY, lambda: (None, None)) == "old"
+
+    def test_single_flight(self):
+        calls = []
+        started = threading.Event()
+
+        def fetch_token():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return "token", 7200
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_cached_access_token(TOKEN_KEY, fetch_token)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ["token"] * 5
+        assert len(calls) == 1
+
+
+class TestCachedAccessTokenLease:
+    """
+    共享缓存下通过缓存租约跨进程只刷新一次
+    """
+
+    LOCK_KEY = "%s_REFRESHING" % TOKEN_KEY
+
+    @pytest.fixture(autouse=True)
+    def shared_cache(self):
+        with mock.patch("user_center.wx_core.is_shared_cache", return_value=True):
+            yield
+
+    def test_fetch_with_lease(self):
+        fetch_token = mock.Mock(return_value=("token", 7200))
+        assert get_cached_access_token(TOKEN_KEY, fetch_token) == "token"
+        fetch_token.assert_called_once_with()
+        # 刷新完成后释放租约
+        assert cache.get(self.LOCK_KEY) is None
+
+    def test_use_old_token_while_other_process_refreshing(self):
+        cache.set(TOKEN_KEY, {"token": "old", "refresh_at": time.time() - 1}, 60)
+        cache.add(self.LOCK_KEY, 1, 60)
+        fetch_token = mock.Mock(return_value=("new", 7200))
+        assert get_cached_access_token(TOKEN_KEY, fetch_token) == "old"
+        fetch_token.assert_not_called()
+
+    def test_wait_other_process_refresh(self):
+        cache.add(self.LOCK_KEY, 1, 60)
+        fetch_token = mock.Mock(return_value=("new", 7200))
+
+        def other_process_refreshed(seconds):
+            cache.set(TOKEN_KEY, {"token": "other", "refresh_at": time.time() + 60}, 60)
+
+        with mock.patch("user_center.wx_core.time.sleep", side_effect=other_process_refreshed):
+            assert get_cached_access_token(TOKEN_KEY, fetch_token) == "other"
+        fetch_token.assert_not_called()
+
+    def test_refresh_after_lease_released(self):
+        cache.add(self.LOCK_KEY, 1, 60)
+        fetch_token = mock.Mock(return_value=("new", 7200))
+
+        # 持有租约的进程刷新失败并释放租约
+        with mock.patch("user_center.wx_core.time.sleep", side_effect=lambda seconds: cache.delete(self.LOCK_KEY)):
+            assert get_cached_access_token(TOKEN_KEY, fetch_token) == "new"
+        fetch_token.assert_called_once_with()
+
+
+class TestWaitBindStatus:
+    def _request(self):
+        request = RequestFactory().get("/user_center/wx/bind/wait/")
+        request.user = mock.Mock(username="admin")
+        return request
+
+    def test_skip_wait_without_shared_cache(self):
+        # 缓存中的用户信息未绑定微信，需绕过缓存直接查询用户管理
+        cache.set(usermgr._get_profile_cache_key("admin"), {"username": "admin", "wx_userid": ""}, 60)
+        with mock.patch(
+            "components.usermgr.usermgr_api.batch_query_users",
+            return_value=(True, "ok", [{"username": "admin", "wx_userid": "wx-admin"}]),
+        ), mock.patch("user_center.wx_views.wait_bind_completed") as wait_bind_completed:
+            start = time.time()
+            response = wait_bind_status(self._request())
+        assert time.time() - start < 1
+        assert json.loads(response.content) == {"result": True, "waited": False}
+        wait_bind_completed.assert_not_called()
+
+    def test_long_poll_with_shared_cache(self):
+        with mock.patch("user_center.wx_views.is_shared_cache", return_value=True), mock.patch(
+            "user_center.wx_views.wait_bind_completed", return_value=False
+        ) as wait_bind_completed:
+            response = wait_bind_status(self._request())
+        assert json.loads(response.content) == {"result": False, "waited": True}
+        wait_bind_completed.assert_called_once_with("admin", WEIXIN_BIND_STATUS_WAIT_SECONDS)
+
+
+@pytest.mark.django_db
+class TestWxBkUserTmpRecord:
+    @pytest.mark.parametrize(
+        "expire_seconds, create_seconds_ago, valid",
+        [
+            (60, 0, True),
+            (-60, 0, False),
+            # 历史记录没有过期时间，按创建时间计算
+            (None, 60, True),
+            (None, WEIXIN_TMP_RECORD_EXPIRE_SECONDS + 60, False),
+            (None, None, False),
+        ],
+    )
+    def test_valid_record_not_purged(self, expire_seconds, create_seconds_ago, valid):
+        now = timezone.now()
+        record = WxBkUserTmpRecord.objects.create(
+            username="admin",
+            bk_token="token",
+            wx_ticket="ticket",
+            expire_time=now + datetime.timedelta(seconds=expire_seconds) if expire_seconds is not None else None,
+        )
+        create_time = now - datetime.timedelta(seconds=create_seconds_ago) if create_seconds_ago is not None else None
+        WxBkUserTmpRecord.objects.filter(id=record.id).update(create_time=create_time)
+
+        assert (WxBkUserTmpRecord.objects.get_valid_record("ticket") is not None) is valid
+        assert WxBkUserTmpRecord.objects.purge_expired() == (0 if valid else 1)
@@ -30,6 +30,8 @@ urlpatterns = [
     re_path(r"^account/change_password/$", views.change_password),
     # 查询绑定状态
     re_path(r"^weixin/get_bind_status/$", wx_views.get_bind_status),
+    # 长轮询等待绑定结果
+    re_path(r"^weixin/wait_bind_status/$", wx_views.wait_bind_status),
     # 解绑用户微信信息
     re_path(r"^weixin/unbind_wx_user_info/$", wx_views.unbind_wx_user_info),
     # 微信公众号
@@ -42,6 +44,8 @@ urlpatterns = [
     re_path(r"^esb_apply/approval/$", views.esb_approval),
     re_path(r"^esb_apply/get_not_done_record/$", views.get_not_done_esb_record),
     re_path(r"^esb_apply/save_approval_result/$", views.save_esb_approval_result),
+    re_path(r"^esb_apply/bulk_save_approval_result/$", views.bulk_save_esb_approval_result),
+    re_path(r"^esb_apply/get_bulk_approval_status/$", views.get_bulk_esb_approval_status),
     # 组件申请记录
     re_path(r"^esb_apply/history/$", views.esb_history),
     re_path(r"^esb_apply/get_done_record/$", views.get_done_esb_record),
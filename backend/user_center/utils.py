@@ -25,6 +25,14 @@ from django.conf import settings
 from common.constants import ROLECODE_DICT, RoleCodeEnum
 
 
+def is_shared_cache():
+    """
+    默认缓存是否为多进程共享(如 redis)，LocMemCache/DummyCache 只在进程内生效
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    return not backend.endswith(("LocMemCache", "DummyCache"))
+
+
 def get_smart_paas_domain():
     """
     智能获取paas域名，80端口去除
@@ -35,6 +43,16 @@ def get_smart_paas_domain():
     return paas_domain
 
 
+def get_user_display_name(username, users):
+    """
+    展示用户名及中文名，users 为 usermgr.batch_get_users 的返回
+    """
+    display_name = users.get(username, {}).get("display_name")
+    if not display_name or display_name == username:
+        return username
+    return "%s(%s)" % (username, display_name)
+
+
 def get_role_display(role: Optional[int]) -> str:
     if not role:
         return ROLECODE_DICT[RoleCodeEnum.STAFF]
@@ -25,10 +25,11 @@ from django.shortcuts import render
 from django.utils import timezone, translation
 from django.utils.translation import gettext as _
 
+from account.accounts import get_bk_login_userinfo
 from account.decorators import is_superuser_perm
-from apigw.client import BkLoginClient
 from app.models import App
-from app_esb_auth.models import EsbAuthApplyReocrd
+from app_esb_auth.approval import resume_stale_batch, submit_batch
+from app_esb_auth.models import EsbApprovalTask, EsbAuthApplyReocrd
 from bk_i18n.constants import TIME_ZONE_LIST
 from blueking.component.shortcuts import get_client_by_request
 from common.constants import ApprovalResultEnum
@@ -57,14 +58,14 @@ def account(request):
             settings.BK_USER_APP_CODE,
         )
 
-    # 微信相关
-    wx_type, wx_userid = get_user_wx_info(request)
-
-    # 获取用户基本信息
+    # 获取用户基本信息，复用登录中间件的结果
     bk_token = request.COOKIES.get(settings.BK_COOKIE_NAME, None)
-    data = BkLoginClient().get_user(bk_token)
+    data = get_bk_login_userinfo(request, bk_token)
     role = data.get("bk_role")
 
+    # 微信相关：仅在配置了微信时查询用户微信ID
+    wx_type, wx_userid = get_user_wx_info(request)
+
     context = {
         "username": username,
         "chname": data.get('chname', '--'),
@@ -148,22 +149,25 @@ def get_not_done_esb_record(request):
     page_size = int(request.GET.get("length"))
     # 分片起始位置
     start = int(request.GET.get("start"))
-    # 分片结束位置
-    end = start + page_size
-    records = EsbAuthApplyReocrd.objects.filter(approval_result=ApprovalResultEnum.APPLYING)
+    # 上一页返回的游标，存在时按游标翻页
+    cursor = request.GET.get("cursor")
+    records = EsbAuthApplyReocrd.objects.get_not_done_records()
     total = records.count()
-    part_record = records[start:end]
-    # 查询应用名称
-    app_code_list = [i.app_code for i in records]
+    part_record, next_cursor = EsbAuthApplyReocrd.objects.get_page(records, start, page_size, cursor)
+    # 只查询当前页的应用名称
+    app_code_list = {i.app_code for i in part_record}
     if translation.get_language() == "en":
         app_code_name_dict = dict(App.objects.filter(code__in=app_code_list).values_list("code", "name"))
     else:
         app_code_name_dict = dict(App.objects.filter(code__in=app_code_list).values_list("code", "name_en"))
 
+    # 批量查询申请人信息
+    users = usermgr.batch_get_users([i.operator for i in part_record])
     # 组装数据
     data = [
         {
             "operator": i.operator,
+            "operator_display": utils.get_user_display_name(i.operator, users),
             "apply_time": i.create_time_display,
             "app_name": app_code_name_dict.get(i.app_code) or i.app_code,
             "sys_name": i.sys_name,
@@ -172,7 +176,16 @@ def get_not_done_esb_record(request):
         }
         for i in part_record
     ]
-    return JsonResponse({"data": data, "recordsTotal": total, "recordsFiltered": total, "draw": draw, "error": ""})
+    return JsonResponse(
+        {
+            "data": data,
+            "recordsTotal": total,
+            "recordsFiltered": total,
+            "draw": draw,
+            "error": "",
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @is_superuser_perm
@@ -199,11 +212,11 @@ def save_esb_approval_result(request):
         client = get_client_by_request(request)
         esb_result = client.esb.add_app_component_perm(param)
         if not esb_result.get("result", False):
-            msg = (
+            logger.error(
                 "An error occurred while calling a component to add"
-                " component permissions to the app, Error message: %s"
-            ) % esb_result.get("message", "")
-            logger.error(msg)
+                " component permissions to the app, Error message: %s",
+                esb_result.get("message", ""),
+            )
             return JsonResponse({"result": False, "message": esb_result.get("message", _(u"调用组件审批接口出错"))})
 
     # 修改记录
@@ -211,10 +224,53 @@ def save_esb_approval_result(request):
     record.approver = request.user.username
     record.approval_time = timezone.now()
     record.save()
+    EsbAuthApplyReocrd.objects.clear_done_total()
 
     return JsonResponse({"result": True, "message": ""})
 
 
+@is_superuser_perm
+def bulk_save_esb_approval_result(request):
+    """
+    批量审批
+    驳回直接修改记录；同意时按应用合并组件，由后台任务调用组件添加权限，返回批次ID用于查询进度
+    """
+    try:
+        record_ids = [int(i) for i in request.POST.get("record_ids", "").split(",") if i]
+    except ValueError:
+        return JsonResponse({"result": False, "message": _(u"申请记录ID格式错误")})
+
+    approval_result = request.POST.get("approval_result")
+    if approval_result not in [ApprovalResultEnum.PASS, ApprovalResultEnum.REJECT]:
+        return JsonResponse({"result": False, "message": _(u"[%s]非正常审批结果") % approval_result})
+
+    records = list(EsbAuthApplyReocrd.objects.filter(id__in=record_ids, approval_result=ApprovalResultEnum.APPLYING))
+    if not records:
+        return JsonResponse({"result": False, "message": _(u"没有待审批的申请记录")})
+
+    if approval_result == ApprovalResultEnum.REJECT:
+        EsbAuthApplyReocrd.objects.filter(
+            id__in=[i.id for i in records], approval_result=ApprovalResultEnum.APPLYING
+        ).update(approval_result=approval_result, approver=request.user.username, approval_time=timezone.now())
+        EsbAuthApplyReocrd.objects.clear_done_total()
+        return JsonResponse({"result": True, "message": "", "data": {"batch_id": ""}})
+
+    batch_id = EsbApprovalTask.objects.create_batch(records, request.user.username)
+    submit_batch(batch_id)
+    return JsonResponse({"result": True, "message": "", "data": {"batch_id": batch_id}})
+
+
+@is_superuser_perm
+def get_bulk_esb_approval_status(request):
+    """
+    查询批量审批进度，批次中有租约过期的未完成任务时重新执行
+    """
+    batch_id = request.GET.get("batch_id", "")
+    if batch_id:
+        resume_stale_batch(batch_id)
+    return JsonResponse({"result": True, "message": "", "data": EsbApprovalTask.objects.get_batch_status(batch_id)})
+
+
 @is_superuser_perm
 def esb_history(request):
     """
@@ -233,11 +289,12 @@ def get_done_esb_record(request):
     page_size = int(request.GET.get("length"))
     # 分片起始位置
     start = int(request.GET.get("start"))
-    # 分片结束位置
-    end = start + page_size
+    # 上一页返回的游标，存在时按游标翻页
+    cursor = request.GET.get("cursor")
     search_value = request.GET.get("search[value]", "")
-    records = EsbAuthApplyReocrd.objects.exclude(approval_result=ApprovalResultEnum.APPLYING)
-    total = records.count()
+    records = EsbAuthApplyReocrd.objects.get_done_records()
+    # 历史记录只增不减，总数使用缓存值
+    total = EsbAuthApplyReocrd.objects.get_done_total()
     if search_value:
         records = records.filter(
             Q(operator__icontains=search_value)
@@ -245,18 +302,23 @@ def get_done_esb_record(request):
             | Q(sys_name__icontains=search_value)
             | Q(api_name__icontains=search_value)
         )
-    filter_total = records.count()
-    part_record = records[start:end]
-    # 查询应用名称
-    app_code_list = [i.app_code for i in records]
+        filter_total = records.count()
+    else:
+        filter_total = total
+    part_record, next_cursor = EsbAuthApplyReocrd.objects.get_page(records, start, page_size, cursor)
+    # 只查询当前页的应用名称
+    app_code_list = {i.app_code for i in part_record}
     if translation.get_language() == "en":
         app_code_name_dict = dict(App.objects.filter(code__in=app_code_list).values_list("code", "name"))
     else:
         app_code_name_dict = dict(App.objects.filter(code__in=app_code_list).values_list("code", "name_en"))
+    # 批量查询申请人信息
+    users = usermgr.batch_get_users([i.operator for i in part_record])
     # 组装数据
     data = [
         {
             "operator": i.operator,
+            "operator_display": utils.get_user_display_name(i.operator, users),
             "apply_time": i.create_time_display,
             "app_name": app_code_name_dict.get(i.app_code) or i.app_code,
             "sys_name": i.sys_name,
@@ -265,5 +327,12 @@ def get_done_esb_record(request):
         }
         for i in part_record
     ]
-    result = {"data": data, "recordsTotal": total, "recordsFiltered": filter_total, "draw": draw, "error": ""}
+    result = {
+        "data": data,
+        "recordsTotal": total,
+        "recordsFiltered": filter_total,
+        "draw": draw,
+        "error": "",
+        "next_cursor": next_cursor,
+    }
     return JsonResponse(result)
@@ -18,8 +18,8 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import hashlib
-import json
 import random
+import threading
 import time
 import uuid
 import xml.etree.cElementTree as ET
@@ -27,6 +27,7 @@ from builtins import object, str
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.encoding import force_bytes
 from django.utils.http import urlencode
 from django.utils.translation import gettext as _
@@ -34,14 +35,104 @@ from django.utils.translation import gettext as _
 from blueking.component.shortcuts import get_client_by_user
 from common.exceptions import ConsoleErrorCodes
 from common.log import logger
-from user_center.constants import WEIXIN_MP_API_URL, WEIXIN_MP_QRCODE_EXPIRE_SECONDS, WEIXIN_QY_API_URL, WxTypeEnum
-from user_center.utils import get_smart_paas_domain
+from user_center.constants import (
+    WEIXIN_ACCESS_TOKEN_LOCK_SECONDS,
+    WEIXIN_ACCESS_TOKEN_REFRESH_AHEAD_SECONDS,
+    WEIXIN_ESB_ACCESS_TOKEN_EXPIRE_SECONDS,
+    WEIXIN_MP_API_URL,
+    WEIXIN_MP_QRCODE_EXPIRE_SECONDS,
+    WEIXIN_QY_API_URL,
+    WxTypeEnum,
+)
+from user_center.utils import get_smart_paas_domain, is_shared_cache
 from user_center.wx_utlis import bind_user_wx_info, get_wx_config
 
 # Use connection pool
 rpool = requests.Session()
 
 
+# 进程内每个 token 一把锁，同一时间只有一个调用方请求微信/ESB，其他调用方等待其结果
+# 共享缓存下再通过缓存租约保证多个进程同一时间只有一个刷新，避免并发刷新使其他进程拿到的 token 失效
+_token_locks = {}
+_token_locks_lock = threading.Lock()
+
+
+def _get_token_lock(key):
+    with _token_locks_lock:
+        if key not in _token_locks:
+            _token_locks[key] = threading.Lock()
+        return _token_locks[key]
+
+
+def _get_fresh_token(key):
+    data = cache.get(key)
+    if data and time.time() < data["refresh_at"]:
+        return data["token"], data
+    return None, data
+
+
+def _fetch_and_cache_token(key, fetch_token):
+    """
+    请求新的 token 并缓存，失败时返回 None
+    """
+    token, expires_in = fetch_token()
+    if not (token and expires_in):
+        return None
+    refresh_ahead = min(WEIXIN_ACCESS_TOKEN_REFRESH_AHEAD_SECONDS, expires_in // 2)
+    cache.set(key, {"token": token, "refresh_at": time.time() + expires_in - refresh_ahead}, expires_in)
+    return token
+
+
+def _fetch_with_lease(key, fetch_token, interval=0.2):
+    """
+    获取跨进程刷新租约后再请求，未获取到时等待持有租约的进程刷新完成
+    租约到期仍未刷新成功（如持有进程退出）时，由重新获取到租约的进程刷新
+    旧 token 未过期时不等待，返回 None 由调用方继续使用旧 token
+    """
+    lock_key = "%s_REFRESHING" % key
+    deadline = time.time() + WEIXIN_ACCESS_TOKEN_LOCK_SECONDS
+    while True:
+        if cache.add(lock_key, 1, WEIXIN_ACCESS_TOKEN_LOCK_SECONDS):
+            try:
+                return _fetch_and_cache_token(key, fetch_token)
+            finally:
+                cache.delete(lock_key)
+
+        token, data = _get_fresh_token(key)
+        if token:
+            return token
+        if data or time.time() >= deadline:
+            return None
+        time.sleep(interval)
+
+
+def get_cached_access_token(key, fetch_token):
+    """
+    获取缓存的 access_token，临近过期时提前刷新
+    fetch_token: 返回 (token, expires_in)
+    """
+    token, data = _get_fresh_token(key)
+    if token:
+        return token
+
+    with _get_token_lock(key):
+        # 等待锁期间 token 可能已被刷新
+        token, data = _get_fresh_token(key)
+        if token:
+            return token
+
+        if is_shared_cache():
+            token = _fetch_with_lease(key, fetch_token)
+        else:
+            token = _fetch_and_cache_token(key, fetch_token)
+        if token:
+            return token
+
+    # 刷新失败或其他进程正在刷新时继续使用未过期的旧 token
+    data = cache.get(key) or data
+    return data["token"] if data else None
+
+
 class WeiXinApiBase(object):
     """
     Api 请求的基础类型
@@ -60,12 +151,12 @@ class WeiXinApiBase(object):
             resp.encoding = "utf-8"
             result = resp.json()
         except Exception as error:
-            error_message = u"%s requests get url:%s error: %s" % (
+            logger.error(
+                u"%s requests get url:%s error: %s",
                 ConsoleErrorCodes.E1303200_WEIXIN_HTTP_GET_REQUEST_ERROR,
                 url,
                 error,
             )
-            logger.error(error_message)
             result = {}
         return result
 
@@ -80,12 +171,12 @@ class WeiXinApiBase(object):
             resp.encoding = "utf-8"
             result = resp.json()
         except Exception as error:
-            error_message = u"%s requests post url:%s error: %s" % (
+            logger.error(
+                u"%s requests post url:%s error: %s",
                 ConsoleErrorCodes.E1303201_WEIXIN_HTTP_POST_REQUEST_ERROR,
                 url,
                 error,
             )
-            logger.error(error_message)
             result = {}
         return result
 
@@ -97,6 +188,17 @@ class WeiXinApiBase(object):
         esb_result = client.esb.get_weixin_access_token({})
         return esb_result
 
+    def _get_access_token_from_esb(self):
+        """
+        从ESB获取access_token，返回 (token, expires_in)
+        """
+        result = self.get_access_token_from_esb()
+        if not result.get("result"):
+            logger.error("esb get_access_token error: %s", result)
+            return None, 0
+        data = result.get("data") or {}
+        return data.get("access_token"), data.get("expires_in") or WEIXIN_ESB_ACCESS_TOKEN_EXPIRE_SECONDS
+
 
 class WeiXinMpApi(WeiXinApiBase):
     """
@@ -114,41 +216,21 @@ class WeiXinMpApi(WeiXinApiBase):
     @property
     def access_token(self):
         """
-        使用ESB提供的token
+        使用ESB提供的token，开发环境直接请求微信
         """
+        key = "WEIXIN_MP_ACCESS_TOKEN_%s" % self.appid
         if settings.ENVIRONMENT == "development":
-            import redis
-
-            rd = redis.Redis("127.0.0.1", 6379)
-            cache_token = rd.get("WEIXIN_MP_ACCESS_TOKEN")
-            if cache_token:
-                token = json.loads(cache_token)["ACCESS_TOKEN"]
-                return token
-            token = self._get_access_token()
-            return token
-
-        result = self.get_access_token_from_esb()
-        if not result.get("result"):
-            logger.error("esb get_access_token error: %s" % result)
-        token = result["data"].get("access_token")
-        return token
+            return get_cached_access_token(key, self._get_access_token)
+        return get_cached_access_token(key, self._get_access_token_from_esb)
 
     def _get_access_token(self):
         """
-        获取access_token
+        获取access_token，返回 (token, expires_in)
         """
         url = WEIXIN_MP_API_URL["get_access_token"]
         param = {"appid": self.appid, "secret": self.secret, "grant_type": "client_credential"}
         resp = self.get(url, **param)
-        token = resp.get("access_token")
-        expires_in = resp.get("expires_in", 7200)
-        data = {"ACCESS_TOKEN": token, "expires_in": expires_in}
-        if token and expires_in:
-            import redis
-
-            rd = redis.Redis("127.0.0.1", 6379)
-            rd.set("WEIXIN_MP_ACCESS_TOKEN", json.dumps(data))
-        return token
+        return resp.get("access_token"), resp.get("expires_in", 7200)
 
     def create_qrcode_with_scene(self):
         """
@@ -165,7 +247,7 @@ class WeiXinMpApi(WeiXinApiBase):
         }
         resp = self.post(url, params=params, json_data=data)
         if resp.get("errcode"):
-            logger.error("create qrcode failed %s" % resp)
+            logger.error("create qrcode failed %s", resp)
             return None
         return resp.get("ticket")
 
@@ -197,12 +279,12 @@ class WeiXinMpApi(WeiXinApiBase):
         """
         解析微信推送的事件或消息内容
         """
-        logger.info("weixin push raw_data is: %s" % raw_data)
+        logger.info("weixin push raw_data is: %s", raw_data)
         try:
             doc = ET.fromstring(raw_data)
             data = {i.tag: i.text for i in doc}
         except Exception as error:
-            logger.info("parse raw_data: error: %s" % error)
+            logger.info("parse raw_data: error: %s", error)
             data = {}
         return data
 
@@ -263,43 +345,21 @@ class WeiXinQyApi(WeiXinApiBase):
     @property
     def access_token(self):
         """
-        使用ESB提供的token
+        使用ESB提供的token，开发环境直接请求微信
         """
+        key = "WEIXIN_%s_ACCESS_TOKEN_%s" % (self.wx_type.upper(), self.corpid)
         if settings.ENVIRONMENT == "development":
-            import redis
-
-            rd = redis.Redis("127.0.0.1", 6379)
-            token_rd_key = "WEIXIN_%s_ACCESS_TOKEN" % self.wx_type.upper()
-            cache_token = rd.get(token_rd_key)
-            if cache_token:
-                token = json.loads(cache_token)["ACCESS_TOKEN"]
-                return token
-            token = self._get_access_token()
-            return token
-
-        result = self.get_access_token_from_esb()
-        if not result.get("result"):
-            logger.error("esb get_access_token error: %s" % result)
-        token = result["data"].get("access_token")
-        return token
+            return get_cached_access_token(key, self._get_access_token)
+        return get_cached_access_token(key, self._get_access_token_from_esb)
 
     def _get_access_token(self):
         """
-        获取access_token
+        获取access_token，返回 (token, expires_in)
         """
         url = self.api_url["get_access_token"]
         param = {"corpid": self.corpid, "corpsecret": self.secret}
         resp = self.get(url, **param)
-        token = resp.get("access_token")
-        expires_in = resp.get("expires_in", 7200)
-        data = {"ACCESS_TOKEN": token, "expires_in": expires_in}
-        if token and expires_in:
-            import redis
-
-            rd = redis.Redis("127.0.0.1", 6379)
-            token_rd_key = "WEIXIN_%s_ACCESS_TOKEN" % self.wx_type.upper()
-            rd.set(token_rd_key, json.dumps(data))
-        return token
+        return resp.get("access_token"), resp.get("expires_in", 7200)
 
     def gen_login_url(self):
         """
@@ -325,10 +385,10 @@ class WeiXinQyApi(WeiXinApiBase):
         data = {"auth_code": auth_code}
         resp = self.post(url, params=params, json_data=data)
         if resp.get("errcode"):
-            logger.error("get login user info failed %s" % resp)
+            logger.error("get login user info failed %s", resp)
             return None
         if not resp.get("user_info").get("userid"):
-            logger.error("get login userid error %s" % resp)
+            logger.error("get login userid error %s", resp)
             return None
         return resp.get("user_info").get("userid")
 
@@ -340,10 +400,10 @@ class WeiXinQyApi(WeiXinApiBase):
         params = {"access_token": self.access_token, "code": code}
         resp = self.get(url, **params)
         if resp.get("errcode"):
-            logger.error("get login user info failed %s" % resp)
+            logger.error("get login user info failed %s", resp)
             return None
         if not resp.get("UserId"):
-            logger.error("get login userid error %s" % resp)
+            logger.error("get login userid error %s", resp)
             return None
         return resp.get("UserId")
 
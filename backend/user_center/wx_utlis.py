@@ -17,12 +17,15 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import time
+
+from django.core.cache import cache
 from django.utils.translation import gettext as _
 
 from common.log import logger
 from components import usermgr
 from components.esb_api import get_weixin_config
-from user_center.constants import WxTypeEnum
+from user_center.constants import WEIXIN_BIND_COMPLETED_EXPIRE_SECONDS, WxTypeEnum
 from user_center.models import WxBkUserTmpRecord
 
 
@@ -40,7 +43,7 @@ def get_wx_config():
         return None
 
     if comp_conf.get("wx_type") not in [WxTypeEnum.MP, WxTypeEnum.QY, WxTypeEnum.QYWX]:
-        logger.error("WeChat notification component WeChat type configuration error, Comp_conf:%s" % comp_conf)
+        logger.error("WeChat notification component WeChat type configuration error, Comp_conf:%s", comp_conf)
         return None
 
     is_complete = comp_conf.get("wx_app_id") and comp_conf.get("wx_secret") and comp_conf.get("wx_token")
@@ -48,8 +51,8 @@ def get_wx_config():
         error_msg = (
             "WeChat Official Account notification component configuration is incomplete"
             "Is_complete: %s, Comp_conf:%s"
-        ) % (is_complete, comp_conf)
-        logger.error(error_msg)
+        )
+        logger.error(error_msg, is_complete, comp_conf)
         return None
 
     is_complete = (
@@ -59,19 +62,19 @@ def get_wx_config():
         error_msg = (
             "WeChat Corporation ID / Work WeChat notification component configuration is incomplete"
             "Is_complete: %s, Comp_conf:%s"
-        ) % (is_complete, comp_conf)
-        logger.error(error_msg)
+        )
+        logger.error(error_msg, is_complete, comp_conf)
         return None
 
     return comp_conf
 
 
-def get_wx_userid(request):
+def get_wx_userid(request, use_cache=True):
     """
     获取微信userid
     """
     username = request.user.username
-    return usermgr.get_user_wx(username)
+    return usermgr.get_user_wx(username, use_cache=use_cache)
 
 
 def get_user_wx_info(request):
@@ -90,11 +93,41 @@ def bind_user_wx_info(wx_ticket, wx_userid):
     """
     绑定用户微信信息
     """
-    try:
-        # bk_token = WxBkUserTmpRecord.objects.get(wx_ticket=wx_ticket).bk_token
-        # is_success, message = remote_bind_wx_user_info(bk_token, wx_userid)
-        username = WxBkUserTmpRecord.objects.get(wx_ticket=wx_ticket).username
-        is_success, message = usermgr.bind_user_wx(username, wx_userid)
-    except WxBkUserTmpRecord.DoesNotExist:
-        is_success, message = False, _(u"不存在该微信二维码的扫描用户")
+    # bk_token = WxBkUserTmpRecord.objects.get(wx_ticket=wx_ticket).bk_token
+    # is_success, message = remote_bind_wx_user_info(bk_token, wx_userid)
+    tmp_record = WxBkUserTmpRecord.objects.get_valid_record(wx_ticket)
+    if not tmp_record:
+        return False, _(u"不存在该微信二维码的扫描用户")
+    is_success, message = usermgr.bind_user_wx(tmp_record.username, wx_userid)
+    if is_success:
+        notify_bind_completed(tmp_record.username)
     return is_success, message
+
+
+def _get_bind_completed_cache_key(username):
+    return "WEIXIN_BIND_COMPLETED_%s" % username
+
+
+def notify_bind_completed(username):
+    """
+    标记用户已完成微信绑定，唤醒等待绑定结果的长轮询请求
+    """
+    cache.set(_get_bind_completed_cache_key(username), 1, WEIXIN_BIND_COMPLETED_EXPIRE_SECONDS)
+
+
+def clear_bind_completed(username):
+    cache.delete(_get_bind_completed_cache_key(username))
+
+
+def wait_bind_completed(username, timeout, interval=0.5):
+    """
+    等待用户完成微信绑定，最多等待 timeout 秒
+    """
+    deadline = time.time() + timeout
+    key = _get_bind_completed_cache_key(username)
+    while True:
+        if cache.get(key):
+            return True
+        if time.time() >= deadline:
+            return False
+        time.sleep(interval)
@@ -27,10 +27,12 @@ from account.decorators import login_exempt
 from common.exceptions import ConsoleErrorCodes
 from common.log import logger
 from components import usermgr
+from user_center.constants import WEIXIN_BIND_STATUS_WAIT_SECONDS
 from user_center.decorators import is_unbound_weixin
 from user_center.models import WxBkUserTmpRecord
+from user_center.utils import is_shared_cache
 from user_center.wx_core import WeiXinMpApi, WeiXinQyApi
-from user_center.wx_utlis import get_wx_userid
+from user_center.wx_utlis import clear_bind_completed, get_wx_userid, notify_bind_completed, wait_bind_completed
 
 
 def get_bind_status(request):
@@ -42,12 +44,28 @@ def get_bind_status(request):
     return JsonResponse({"result": is_bind})
 
 
+def wait_bind_status(request):
+    """
+    【公众号/企业号/企业微信】长轮询查询绑定状态，绑定回调完成后立即返回，最长等待 WEIXIN_BIND_STATUS_WAIT_SECONDS 秒
+    返回的 waited 表示是否进行了长轮询等待，前端据此决定立即再次请求还是间隔一段时间后请求
+    """
+    # 未配置共享缓存时，绑定回调可能由其他进程处理，完成标记不可见，直接查询用户管理后返回，由前端间隔轮询
+    if not is_shared_cache():
+        is_bind = bool(get_wx_userid(request, use_cache=False))
+        return JsonResponse({"result": is_bind, "waited": False})
+
+    username = request.user.username
+    is_bind = wait_bind_completed(username, WEIXIN_BIND_STATUS_WAIT_SECONDS)
+    return JsonResponse({"result": is_bind, "waited": True})
+
+
 def unbind_wx_user_info(request):
     """
     【公众号/企业号/企业微信】解绑微信
     """
     username = request.user.username
     usermgr.unbind_user_wx(username)
+    clear_bind_completed(username)
     return HttpResponseRedirect(settings.SITE_URL + "user_center/")
 
 
@@ -62,6 +80,7 @@ def get_qrcode_by_mp(request):
     if not ticket:
         return JsonResponse({"result": False, "message": _(u"后台获取公众号二维码失败，请联系系统管理员检查微信配置")})
     # 记录username, bk_token, 与 ticket的关系
+    clear_bind_completed(request.user.username)
     is_success = WxBkUserTmpRecord.objects.create_tmp_record(request, ticket)
     if not is_success:
         return JsonResponse({"result": False, "message": _(u"创建记录失败，请联系系统管理员处理")})
@@ -93,11 +112,11 @@ def weixin_mp_callback(request):
         # POST请求，处理微信推送
         message = wxapi.handle_weixin_push(request.body)
     except Exception as error:
-        error_message = u"%s weixin_mp_callback error: %s" % (
+        logger.error(
+            u"%s weixin_mp_callback error: %s",
             ConsoleErrorCodes.E1303202_WEIXIN_MP_EVENT_PUSH_RESPONSE_ERROR,
             error,
         )
-        logger.error(error_message)
         message = _(u"API请求异常，请联系管理员处理")
     return HttpResponse(message)
 
@@ -111,6 +130,7 @@ def get_login_url_by_qy(request):
     wxapi = WeiXinQyApi()
     url, state = wxapi.gen_login_url()
     # 记录username, bk_token, 与 ticket的关系
+    clear_bind_completed(request.user.username)
     is_success = WxBkUserTmpRecord.objects.create_tmp_record(request, state)
     if not is_success:
         return JsonResponse({"result": False, "message": _(u"创建记录失败，请联系系统管理员处理")})
@@ -126,7 +146,8 @@ def weixin_qy_login_callback(request):
     # 企业号为auth_code, 企业微信为 code
     auth_code = request.GET.get("auth_code") or request.GET.get("code")
     # 检查state，防止跨域攻击
-    if not WxBkUserTmpRecord.objects.filter(bk_token=bk_token, wx_ticket=state).exists():
+    tmp_record = WxBkUserTmpRecord.objects.get_valid_record(state, bk_token=bk_token)
+    if not tmp_record:
         return render(request, "user_center/weixin_bind_error.html", {"error_message": _(u"您没有权限，请联系系统管理员")})
     # 获取登录用户的wx_userid
     wxapi = WeiXinQyApi()
@@ -135,9 +156,10 @@ def weixin_qy_login_callback(request):
         return render(request, "user_center/weixin_bind_error.html", {"error_message": _(u"绑定失败，请联系系统管理员")})
     # 绑定
     # is_success, message = remote_bind_wx_user_info(bk_token, wx_userid)
-    username = WxBkUserTmpRecord.objects.get(bk_token=bk_token, wx_ticket=state).username
+    username = tmp_record.username
     is_success, message = usermgr.bind_user_wx(username, wx_userid)
     if not is_success:
         return render(request, "user_center/weixin_bind_error.html", {"error_message": _(u"绑定出错，请联系系统管理员")})
+    notify_bind_completed(username)
 
     return render(request, "user_center/weixin_qy_bind_success.html")